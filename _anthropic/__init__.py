@@ -1,20 +1,8 @@
-from anthropic import Anthropic
-
-API_KEY = None
-
-client = Anthropic(
-    api_key=API_KEY,
-)
-
-message = client.messages.create(
-    max_tokens=64,
-    messages=[
-        {
-            "role": "user",
-            "content": "Hello, Claude",
-        }
-    ],
-    model="claude-3-5-sonnet-latest",
-)
-
-print(message.content)
+"""
+Playing with the Anthropic API.
+
+    python -m _anthropic                 # one cached, streamed hello
+    python -m _anthropic.telemetry ...   # streaming calls logged with latency and usage, percentile summaries
+    python -m _anthropic.batch ...       # concurrent, rate limited, resumable batches of prompts
+    python _anthropic/fake_server.py     # local stand-in for the Messages API
+"""
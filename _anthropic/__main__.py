@@ -0,0 +1,28 @@
+from anthropic import Anthropic
+
+from _anthropic.telemetry import StreamingClient
+from llm_cache import ResponseCache
+
+API_KEY = None
+
+client = StreamingClient(
+    Anthropic(api_key=API_KEY),
+    label="hello",
+    # Same prompt every run, answered from the cache after the first
+    cache=ResponseCache(),
+)
+
+# Streamed, the text shows up as it is generated, timings go to anthropic_calls.jsonl
+message = client.create(
+    max_tokens=64,
+    messages=[
+        {
+            "role": "user",
+            "content": "Hello, Claude",
+        }
+    ],
+    model="claude-3-5-sonnet-latest",
+    on_text=lambda text: print(text, end="", flush=True),
+)
+
+print()
@@ -0,0 +1,246 @@
+"""
+Concurrent batch runner for prompts against the Messages API.
+
+Each input line is {"id": ..., "prompt": "..."} or {"id": ..., "messages": [...]}, optionally with its own
+"model", "max_tokens" and "system". Requests go out through the async client, at most --concurrency at once
+and paced by a token bucket for requests/min and one for tokens/min. 429s, 5xx and connection errors are
+retried with full-jitter exponential backoff, honouring retry-after. Results are appended to the output JSONL
+as they complete, rerunning skips ids that already succeeded, so a crashed run picks up where it stopped.
+
+    python -m _anthropic.batch prompts.jsonl results.jsonl --concurrency 8 --rpm 50 --tpm 40000
+    python -m _anthropic.batch prompts.jsonl results.jsonl --base-url http://127.0.0.1:8765  # fake_server.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+
+import anthropic
+
+MODEL = "claude-3-5-sonnet-latest"
+
+
+class TokenBucket:
+    """Refills per_minute units a minute up to a minute's worth, acquire() waits until n are there."""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = per_minute
+        self.clock = clock
+        self.updated = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, n):
+        self.refill()
+        # More than the capacity could never be waited for, let it through once the bucket is full
+        n = min(n, self.capacity)
+        return 0.0 if self.level >= n else (n - self.level) / self.rate
+
+    def take(self, n):
+        self.refill()
+        self.level -= n
+
+
+class RateLimiter:
+    """Requests/min and tokens/min buckets, a zero limit is no limit. pause() holds everyone after a 429."""
+
+    def __init__(self, rpm=0, tpm=0):
+        self.buckets = [(TokenBucket(rpm), "requests")] if rpm else []
+        if tpm:
+            self.buckets.append((TokenBucket(tpm), "tokens"))
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        # One waiter at a time, so requests leave in the order they arrived
+        async with self.lock:
+            while True:
+                amounts = {"requests": 1, "tokens": tokens}
+                wait = max([bucket.wait_for(amounts[kind]) for bucket, kind in self.buckets]
+                           + [self.paused_until - time.monotonic()])
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            for bucket, kind in self.buckets:
+                bucket.take({"requests": 1, "tokens": tokens}[kind])
+
+    def settle(self, estimated, actual):
+        """Give back (or charge) the difference once the real token usage is known."""
+        for bucket, kind in self.buckets:
+            if kind == "tokens":
+                bucket.level = min(bucket.capacity, bucket.level + estimated - actual)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def request_of(row, model, max_tokens):
+    messages = row.get("messages") or [{"role": "user", "content": row["prompt"]}]
+    params = {"model": row.get("model", model), "max_tokens": row.get("max_tokens", max_tokens), "messages": messages}
+    if row.get("system"):
+        params["system"] = row["system"]
+    return params
+
+
+def id_of(row, params):
+    # Without an id, the request itself, so reruns over the same file line up
+    if "id" in row:
+        return str(row["id"])
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def estimate_tokens(params):
+    # About 4 characters a token, plus every output token the request may use
+    text = json.dumps(params["messages"]) + json.dumps(params.get("system", ""))
+    return len(text) // 4 + params["max_tokens"]
+
+
+def load_done(path):
+    """Ids with a successful result. A line cut short by a crash is ignored, and that id runs again."""
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" not in row:
+                    done.add(row["id"])
+    return done
+
+
+def cut_short(path):
+    """True when path's last line has no newline, what a crash in the middle of a write leaves behind."""
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def retryable(e):
+    # By status, 529 overloaded is not an InternalServerError subclass in every SDK version
+    if isinstance(e, anthropic.APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return isinstance(e, anthropic.APIConnectionError)
+
+
+def retry_after(e):
+    response = getattr(e, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+async def send(client, limiter, params, retries=6, base=1.0, cap=60.0):
+    """(message, attempts), retrying rate limits, server errors and dropped connections."""
+    estimated = estimate_tokens(params)
+    for attempt in range(retries + 1):
+        await limiter.acquire(estimated)
+        try:
+            message = await client.messages.create(**params)
+        except anthropic.APIError as e:
+            if attempt == retries or not retryable(e):
+                raise
+            delay = random.uniform(0, min(cap, base * 2 ** attempt))
+            wait = retry_after(e)
+            if wait is not None:
+                limiter.pause(wait)
+                delay = max(delay, wait)
+            await asyncio.sleep(delay)
+            continue
+        limiter.settle(estimated, message.usage.input_tokens + message.usage.output_tokens)
+        return message, attempt + 1
+
+
+async def run(client, rows, out_path, concurrency=8, rpm=0, tpm=0, model=MODEL, max_tokens=1024, retries=6,
+              base=1.0):
+    """Send every row not yet in out_path, appending results as they complete. Returns {"ok", "failed", "skipped"}."""
+    if concurrency < 1:
+        # No workers would send nothing and still report success
+        raise ValueError(f"concurrency must be at least 1, not {concurrency}")
+    done = load_done(out_path)
+    limiter = RateLimiter(rpm, tpm)
+    queue = asyncio.Queue()
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    for row in rows:
+        params = request_of(row, model, max_tokens)
+        row_id = id_of(row, params)
+        if row_id in done:
+            counts["skipped"] += 1
+        else:
+            queue.put_nowait((row_id, params))
+
+    with open(out_path, "a") as out:
+        if cut_short(out_path):
+            # Ends the broken line, the next result would otherwise be glued onto it and lost too
+            out.write("\n")
+
+        def write(result):
+            out.write(json.dumps(result) + "\n")
+            # A crash loses at most the line being written
+            out.flush()
+
+        async def worker():
+            while not queue.empty():
+                row_id, params = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    message, attempts = await send(client, limiter, params, retries, base)
+                except anthropic.APIError as e:
+                    counts["failed"] += 1
+                    write({"id": row_id, "model": params["model"], "error": f"{type(e).__name__}: {e}",
+                           "seconds": time.perf_counter() - started})
+                    continue
+                counts["ok"] += 1
+                write({"id": row_id, "model": message.model, "text": "".join(
+                    block.text for block in message.content if block.type == "text"),
+                    "stop_reason": message.stop_reason, "usage": message.usage.model_dump(exclude_none=True),
+                    "attempts": attempts, "seconds": time.perf_counter() - started})
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return counts
+
+
+def read_rows(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent batch runner for prompts against the Messages API")
+    parser.add_argument("prompts", help="JSONL of {id, prompt} or {id, messages}")
+    parser.add_argument("out", help="results JSONL, appended to and resumed from")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=50, help="requests per minute, 0 for no limit")
+    parser.add_argument("--tpm", type=int, default=40_000, help="input plus output tokens per minute, 0 for no limit")
+    parser.add_argument("--retries", type=int, default=6)
+    parser.add_argument("--base-url", help="e.g. the fake server, http://127.0.0.1:8765")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    # The runner does its own retrying, the SDK's would multiply with it
+    client = anthropic.AsyncAnthropic(base_url=args.base_url, max_retries=0,
+                                      api_key=os.environ.get("ANTHROPIC_API_KEY") or ("fake" if args.base_url else None))
+    started = time.perf_counter()
+    counts = asyncio.run(run(client, read_rows(args.prompts), args.out, args.concurrency, args.rpm, args.tpm,
+                             args.model, args.max_tokens, args.retries))
+    print(f"{counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} already done "
+          f"in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
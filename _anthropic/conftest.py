@@ -0,0 +1,28 @@
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+
+@pytest.fixture
+def serve():
+    """serve(fake) runs a FakeAnthropic's app on a free local port and returns its base URL, until the test ends."""
+    servers = []
+
+    def start(fake):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(fake.app(), log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        while not server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join()
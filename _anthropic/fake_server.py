@@ -0,0 +1,140 @@
+"""
+Stand-in for the Anthropic Messages API, for exercising the batch runner and the streaming client offline.
+
+POST /v1/messages echoes the last user message back word by word, as JSON or, with "stream": true, as the
+same server-sent events the real API sends, each word --token-delay seconds apart. Past --rpm requests in the
+last minute it answers 429 with retry-after, and a --fail-rate fraction of requests get a 500 or a 529.
+/fake/stats counts requests per status.
+
+    python _anthropic/fake_server.py --port 8765 --rpm 120 --fail-rate 0.1
+    client = AsyncAnthropic(base_url="http://127.0.0.1:8765", api_key="fake")
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import deque
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+def error(status, kind, message, **headers):
+    return JSONResponse({"type": "error", "error": {"type": kind, "message": message}}, status_code=status,
+                        headers=headers)
+
+
+def text_of(content):
+    if isinstance(content, str):
+        return content
+    return " ".join(block.get("text", "") for block in content if block.get("type") == "text")
+
+
+class FakeAnthropic:
+    def __init__(self, rpm=0, fail_rate=0.0, latency=0.0, token_delay=0.0, seed=0):
+        self.rpm = rpm
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.token_delay = token_delay
+        self.rng = random.Random(seed)
+        self.recent = deque() # arrival times within the last minute
+        self.statuses = {}
+        self.active = self.peak = 0
+
+    def count(self, status):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def limited(self):
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 60:
+            self.recent.popleft()
+        if self.rpm and len(self.recent) >= self.rpm:
+            return 60 - (now - self.recent[0])
+        self.recent.append(now)
+        return None
+
+    async def messages(self, request):
+        body = await request.json()
+        wait = self.limited()
+        if wait is not None:
+            self.count(429)
+            return error(429, "rate_limit_error", "Number of requests has exceeded your rate limit",
+                         **{"retry-after": str(max(1, round(wait)))})
+        if self.rng.random() < self.fail_rate:
+            status = self.rng.choice([500, 529])
+            self.count(status)
+            return error(status, "api_error" if status == 500 else "overloaded_error", "Fake failure")
+
+        prompt = text_of(body["messages"][-1]["content"])
+        words = ("Echo: " + prompt).split()[:body.get("max_tokens", 1024)]
+        input_tokens = max(1, sum(len(text_of(m["content"])) for m in body["messages"]) // 4)
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant", "model": body["model"],
+            "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 0},
+        }
+        self.count(200)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(self.latency + self.token_delay * len(words))
+            finally:
+                self.active -= 1
+            message["content"] = [{"type": "text", "text": " ".join(words)}]
+            message["stop_reason"] = "end_turn"
+            message["usage"]["output_tokens"] = len(words)
+            return JSONResponse(message)
+
+        def event(kind, **data):
+            return f"event: {kind}\ndata: {json.dumps({'type': kind, **data})}\n\n"
+
+        async def events():
+            try:
+                await asyncio.sleep(self.latency)
+                yield event("message_start", message=message)
+                yield event("content_block_start", index=0, content_block={"type": "text", "text": ""})
+                for i, word in enumerate(words):
+                    await asyncio.sleep(self.token_delay)
+                    yield event("content_block_delta", index=0,
+                                delta={"type": "text_delta", "text": word if i == 0 else " " + word})
+                yield event("content_block_stop", index=0)
+                yield event("message_delta", delta={"stop_reason": "end_turn", "stop_sequence": None},
+                            usage={"output_tokens": len(words)})
+                yield event("message_stop")
+            finally:
+                self.active -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def stats(self, request):
+        return JSONResponse({"statuses": self.statuses, "active": self.active, "peak": self.peak})
+
+    def app(self):
+        return Starlette(routes=[
+            Route("/v1/messages", self.messages, methods=["POST"]),
+            Route("/fake/stats", self.stats),
+        ])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before answering 429, 0 for no limit")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests failing with 500 or 529")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between words")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    app = FakeAnthropic(args.rpm, args.fail_rate, args.latency, args.token_delay, args.seed).app()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Streaming Messages API calls with latency and usage telemetry.
+
+StreamingClient.create() takes the same parameters as client.messages.create() but always streams, hands each
+piece of text to on_text as it arrives and returns the assembled Message, or raises if the stream ended before
+any event. Every call appends one line to a JSONL log: time to first token, the gaps between text deltas, total
+latency and input/output tokens, with the model and a caller-chosen label for the prompt shape. summarize()
+turns the log into percentiles per model and label.
+
+    client = StreamingClient(Anthropic(), label="hello")
+    message = client.create(model=MODEL, max_tokens=64, messages=[...], on_text=print)
+
+    python -m _anthropic.telemetry ask "Hello, Claude" --base-url http://127.0.0.1:8765   # fake_server.py
+    python -m _anthropic.telemetry summary
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+import anthropic
+from anthropic.types import Message
+
+LOG = "anthropic_calls.jsonl"
+MODEL = "claude-3-5-sonnet-latest"
+METRICS = ("ttft_s", "itl_p50_s", "itl_p90_s", "total_s", "output_tps", "input_tokens", "output_tokens")
+
+
+def percentile(values, q):
+    """Linear interpolation between the closest ranks, None for no values."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _accumulate(message, event):
+    # The parts of the event protocol text replies use, other block types keep their start state
+    if event.type == "message_start":
+        return event.message.model_dump()
+    if event.type == "content_block_start":
+        message["content"].append(event.content_block.model_dump())
+    elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+        message["content"][event.index]["text"] += event.delta.text
+    elif event.type == "message_delta":
+        message.update(event.delta.model_dump(exclude_none=True))
+        message["usage"]["output_tokens"] = event.usage.output_tokens
+        if getattr(event.usage, "input_tokens", None):
+            message["usage"]["input_tokens"] = event.usage.input_tokens
+    return message
+
+
+class StreamingClient:
+    """
+    Wraps an Anthropic client, every create() streams and is logged to log_path.
+
+    With a ResponseCache the call goes through llm_cache, replays are logged with "cached": true so they can
+    be left out of latency comparisons.
+    """
+
+    def __init__(self, client, log_path=LOG, label=None, cache=None):
+        self.client = client
+        self.log_path = log_path
+        self.label = label
+        self.cache = cache
+
+    def _events(self, params):
+        # A generator either way, closing it closes the HTTP response even when the caller stops early
+        if self.cache is not None:
+            from llm_cache import anthropic_message
+
+            yield from anthropic_message(self.cache, self.client, stream=True, **params)
+            return
+        with self.client.messages.create(stream=True, **params) as stream:
+            yield from stream
+
+    def create(self, on_text=None, label=None, **params):
+        record = {"at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "model": params.get("model"),
+                  "label": label or self.label, "messages": len(params.get("messages", ())),
+                  "max_tokens": params.get("max_tokens")}
+        hits = self.cache.hits if self.cache is not None else 0
+        started = time.perf_counter()
+        first = last = None
+        gaps = []
+        message = None
+        try:
+            with closing(self._events(params)) as events:
+                for event in events:
+                    message = _accumulate(message, event)
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        now = time.perf_counter()
+                        if first is None:
+                            first = now
+                        else:
+                            gaps.append(now - last)
+                        last = now
+                        if on_text:
+                            on_text(event.delta.text)
+        except Exception as e:
+            # API errors, dropped connections and on_text failures alike, the record says the call failed
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            total = time.perf_counter() - started
+            usage = (message or {}).get("usage") or {}
+            output_tokens = usage.get("output_tokens")
+            record.update({
+                "model": (message or {}).get("model") or record["model"],
+                "cached": self.cache is not None and self.cache.hits > hits,
+                "ttft_s": first - started if first is not None else None,
+                # Between text deltas, a delta may carry more than one token
+                "itl_p50_s": percentile(gaps, 50), "itl_p90_s": percentile(gaps, 90),
+                "itl_max_s": max(gaps, default=None), "deltas": len(gaps) + (first is not None),
+                "total_s": total,
+                "output_tps": output_tokens / (last - first) if output_tokens and gaps and last > first else None,
+                "input_tokens": usage.get("input_tokens"), "output_tokens": output_tokens,
+                "stop_reason": (message or {}).get("stop_reason"),
+            })
+            if message is None and "error" not in record:
+                record["error"] = "no events"
+            self.log(record)
+        if message is None:
+            raise RuntimeError(f"The stream for {record['model']} ended without any events")
+        return Message.model_validate(message)
+
+    def log(self, record):
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def load_log(path=LOG):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records, by=("model", "label"), include_cached=False):
+    """{(model, label): {"calls", "errors", metric: {"p50", "p90", "p99"}}} over the logged calls."""
+    groups = {}
+    for record in records:
+        if record.get("cached") and not include_cached:
+            continue
+        groups.setdefault(tuple(record.get(key) for key in by), []).append(record)
+    summary = {}
+    for group, calls in sorted(groups.items(), key=lambda item: str(item[0])):
+        ok = [call for call in calls if "error" not in call]
+        summary[group] = {"calls": len(calls), "errors": len(calls) - len(ok)}
+        for metric in METRICS:
+            values = [call.get(metric) for call in ok]
+            summary[group][metric] = {f"p{q}": percentile(values, q) for q in (50, 90, 99)}
+    return summary
+
+
+def describe(summary):
+    def number(value):
+        return "-" if value is None else f"{value:.3g}"
+
+    lines = []
+    for group, stats in summary.items():
+        lines.append(f"{' / '.join(str(part) for part in group)}: {stats['calls']} calls, {stats['errors']} errors")
+        for metric in METRICS:
+            p = stats[metric]
+            lines.append(f"  {metric:<14} p50 {number(p['p50']):>8}  p90 {number(p['p90']):>8}  "
+                         f"p99 {number(p['p99']):>8}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming Messages API calls with latency telemetry")
+    parser.add_argument("--log", default=LOG, help="JSONL file the calls are appended to")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ask = commands.add_parser("ask", help="stream one prompt to stdout, --repeat times")
+    ask.add_argument("prompt")
+    ask.add_argument("--model", default=MODEL)
+    ask.add_argument("--max-tokens", type=int, default=256)
+    ask.add_argument("--label", help="prompt shape to group the calls by")
+    ask.add_argument("--repeat", type=int, default=1)
+    ask.add_argument("--base-url", help="e.g. the fake server, http://127.0.0.1:8765")
+    summary = commands.add_parser("summary", help="percentiles per model and label")
+    summary.add_argument("--cached", action="store_true", help="include calls replayed from the cache")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print(describe(summarize(load_log(args.log), include_cached=args.cached)))
+        return
+    client = StreamingClient(
+        anthropic.Anthropic(base_url=args.base_url,
+                            api_key=os.environ.get("ANTHROPIC_API_KEY") or ("fake" if args.base_url else None)),
+        args.log, args.label)
+    for _ in range(args.repeat):
+        client.create(model=args.model, max_tokens=args.max_tokens,
+                      messages=[{"role": "user", "content": args.prompt}],
+                      on_text=lambda text: print(text, end="", flush=True))
+        print()
+
+
+if __name__ == "__main__":
+    main()
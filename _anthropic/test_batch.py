@@ -0,0 +1,78 @@
+"""
+The batch runner against fake_server.py with injected failures and rate limits.
+
+    python -m pytest _anthropic
+"""
+import asyncio
+import json
+import time
+
+import anthropic
+import pytest
+
+from _anthropic.batch import RateLimiter, load_done, run, send
+from _anthropic.fake_server import FakeAnthropic
+
+ROWS = [{"id": i, "prompt": f"question {i}"} for i in range(20)]
+
+
+def client_for(base_url):
+    # No SDK retries, the runner's are under test
+    return anthropic.AsyncAnthropic(base_url=base_url, api_key="fake", max_retries=0)
+
+
+def read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_retries_server_errors(serve, tmp_path):
+    fake = FakeAnthropic(fail_rate=0.3, seed=1)
+    out = tmp_path / "results.jsonl"
+
+    counts = asyncio.run(run(client_for(serve(fake)), ROWS, out, concurrency=4, base=0.01))
+
+    assert counts == {"ok": len(ROWS), "failed": 0, "skipped": 0}
+    results = read(out)
+    assert sorted(int(r["id"]) for r in results) == list(range(len(ROWS)))
+    assert all(r["text"] == f"Echo: question {r['id']}" for r in results)
+    # Every injected 500 and 529 was one more attempt for some row
+    failures = fake.statuses.get(500, 0) + fake.statuses.get(529, 0)
+    assert failures > 0
+    assert sum(r["attempts"] - 1 for r in results) == failures
+
+
+def test_429_pauses_for_retry_after(serve):
+    fake = FakeAnthropic(rpm=2)
+    client = client_for(serve(fake))
+    # A full window that ends in half a second, the 429 says retry-after: 1
+    fake.recent.extend([time.monotonic() - 59.5] * 2)
+    limiter = RateLimiter()
+    params = {"model": "fake", "max_tokens": 16, "messages": [{"role": "user", "content": "hi"}]}
+
+    started = time.monotonic()
+    message, attempts = asyncio.run(send(client, limiter, params, base=0.01))
+
+    assert attempts == 2 and fake.statuses == {429: 1, 200: 1}
+    assert time.monotonic() - started >= 1
+    assert limiter.paused_until >= started + 1
+    assert message.content[0].text == "Echo: hi"
+
+
+def test_resumes_from_a_partial_output(serve, tmp_path):
+    fake = FakeAnthropic()
+    out = tmp_path / "results.jsonl"
+    # Two finished rows, one that failed last time and one line cut short by a crash
+    out.write_text('{"id": "0", "text": "done"}\n{"id": "1", "text": "done"}\n'
+                   '{"id": "2", "error": "InternalServerError: Fake failure"}\n{"id": "3", "te')
+
+    counts = asyncio.run(run(client_for(serve(fake)), ROWS[:6], out, concurrency=2))
+
+    assert counts == {"ok": 4, "failed": 0, "skipped": 2}
+    assert fake.statuses == {200: 4}
+    assert load_done(out) == {str(i) for i in range(6)}
+
+
+def test_rejects_no_workers(tmp_path):
+    with pytest.raises(ValueError):
+        asyncio.run(run(None, ROWS, tmp_path / "results.jsonl", concurrency=0))
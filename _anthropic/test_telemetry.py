@@ -0,0 +1,64 @@
+"""
+StreamingClient against fake_server.py served on a local port, so the deltas really arrive token_delay apart.
+
+    python -m pytest _anthropic
+"""
+import time
+
+import anthropic
+import pytest
+
+from _anthropic.fake_server import FakeAnthropic
+from _anthropic.telemetry import StreamingClient, load_log
+
+TOKEN_DELAY = 0.02
+
+
+@pytest.fixture
+def server(serve):
+    fake = FakeAnthropic(token_delay=TOKEN_DELAY)
+    return fake, serve(fake)
+
+
+@pytest.fixture
+def client(server, tmp_path):
+    return StreamingClient(anthropic.Anthropic(base_url=server[1], api_key="fake", max_retries=0),
+                           str(tmp_path / "calls.jsonl"), label="test")
+
+
+def test_logs_latency_and_usage(client):
+    texts = []
+    message = client.create(model="fake", max_tokens=64, on_text=texts.append,
+                            messages=[{"role": "user", "content": "hello there friend"}])
+
+    assert message.content[0].text == "".join(texts) == "Echo: hello there friend"
+    [record] = load_log(client.log_path)
+    assert "error" not in record
+    assert record["label"] == "test" and record["messages"] == 1
+    # The fake server waits token_delay before every word
+    assert record["ttft_s"] >= TOKEN_DELAY
+    assert record["deltas"] == len(texts) == 4
+    assert record["itl_p50_s"] >= TOKEN_DELAY / 2
+    assert record["total_s"] > record["ttft_s"]
+    assert record["input_tokens"] == len("hello there friend") // 4
+    assert record["output_tokens"] == 4
+    assert record["stop_reason"] == "end_turn"
+
+
+def test_failed_callback_is_logged_and_closes_the_stream(client, server):
+    def on_text(text):
+        raise ValueError("stop")
+
+    with pytest.raises(ValueError):
+        client.create(model="fake", max_tokens=64, on_text=on_text,
+                      messages=[{"role": "user", "content": "one two three four five six"}])
+
+    [record] = load_log(client.log_path)
+    assert record["error"] == "ValueError: stop"
+    assert record["deltas"] == 1
+    # The server's event generator only finishes once the client has dropped the connection
+    for _ in range(100):
+        if server[0].active == 0:
+            break
+        time.sleep(0.01)
+    assert server[0].active == 0
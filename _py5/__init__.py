@@ -1,17 +1,7 @@
-from py5 import Sketch
+"""
+Playing with py5, Processing from Python.
 
-
-class TestSketch(Sketch):
-
-    def settings(self):
-        self.size(300, 200)
-
-    def setup(self):
-        self.rect_mode(self.CENTER)
-
-    def draw(self):
-        self.rect(self.mouse_x, self.mouse_y, 10, 10)
-
-
-test = TestSketch()
-test.run_sketch()
\ No newline at end of file
+    python -m _py5                                       # the mouse-following test sketch
+    python -m _py5.bulk --counts 1000,10000,100000       # NumPy-backed bulk drawing and its FPS benchmark
+    xvfb-run -a python -m _py5.offscreen out.mp4         # headless rendering to video or image sequences
+"""
@@ -0,0 +1,189 @@
+"""
+Many moving primitives per frame without one Python to Java call per shape.
+
+BulkSketch keeps positions, velocities and colors in NumPy arrays, moves them with array arithmetic and draws
+them in a handful of calls: points() and lines() take whole coordinate arrays, rectangles go out as one QUADS
+shape through vertices(), and "shape" keeps a retained Py5Shape whose vertices are replaced in one call. Colors
+come from a small palette with the primitives sorted by color, so a color costs one stroke() and one array call
+rather than one per primitive.
+
+    python -m _py5.bulk --mode points --counts 1000,10000,100000,300000
+"""
+import argparse
+import time
+
+import numpy as np
+from py5 import Sketch
+
+MODES = ("points", "lines", "rects", "shape", "naive")
+COUNTS = (1_000, 10_000, 100_000)
+# The per-call mode would take minutes a frame at the larger counts
+NAIVE_MAX = 20_000
+PALETTE = ("#e63946", "#f1faee", "#a8dadc", "#457b9d", "#ffb703", "#8ecae6")
+
+
+class BulkSketch(Sketch):
+    """
+    count primitives bouncing around the window, drawn by mode.
+
+    Subclasses can override step() to move them differently, draw() calls step() then draw_bulk().
+    """
+
+    def __init__(self, count=10_000, mode="points", width=800, height=600, renderer=None, seed=0):
+        super().__init__()
+        self.count = count
+        self.mode = mode
+        self.dimensions = (width, height)
+        self.renderer_name = renderer
+        self.rng = np.random.default_rng(seed)
+        self.bulk = None
+
+    def settings(self):
+        # P2D batches geometry on the GPU, the default renderer draws every vertex on the CPU
+        self.size(*self.dimensions, self.renderer_name or self.P2D)
+
+    def setup(self):
+        self.frame_rate(1000)
+        self.spawn(self.count)
+
+    def spawn(self, count):
+        self.count = count
+        width, height = self.dimensions
+        self.positions = self.rng.random((count, 2), dtype=np.float32) * np.array([width, height], np.float32)
+        self.previous = self.positions.copy()
+        self.velocities = self.rng.normal(0, 1.5, (count, 2)).astype(np.float32)
+        self.sizes = self.rng.uniform(2, 6, count).astype(np.float32)
+        # Primitives with the same color are contiguous, group i is bounds[i]:bounds[i + 1]
+        self.palette = [self.color(c) for c in PALETTE]
+        self.bounds = np.linspace(0, count, len(self.palette) + 1).astype(int)
+        self.corners = np.empty((count, 4, 2), np.float32)
+        self.bulk = None
+
+    def step(self):
+        width, height = self.dimensions
+        self.previous[:] = self.positions
+        self.positions += self.velocities
+        for axis, limit in enumerate((width, height)):
+            outside = (self.positions[:, axis] < 0) | (self.positions[:, axis] > limit)
+            self.velocities[outside, axis] *= -1
+            np.clip(self.positions[:, axis], 0, limit, out=self.positions[:, axis])
+
+    def groups(self):
+        for color, start, stop in zip(self.palette, self.bounds, self.bounds[1:]):
+            yield color, slice(start, stop)
+
+    def draw_bulk(self):
+        getattr(self, f"draw_{self.mode}")()
+
+    def draw_points(self):
+        self.stroke_weight(2)
+        for color, group in self.groups():
+            self.stroke(color)
+            self.points(self.positions[group])
+
+    def draw_lines(self):
+        # Each primitive as the segment it moved along this frame
+        self.stroke_weight(1)
+        segments = np.hstack((self.previous, self.positions))
+        for color, group in self.groups():
+            self.stroke(color)
+            self.lines(segments[group])
+
+    def draw_rects(self):
+        # Corners computed for all rectangles at once into a preallocated array, one QUADS shape per color
+        half = self.sizes / 2
+        x, y = self.positions[:, 0], self.positions[:, 1]
+        for corner, (dx, dy) in enumerate(((-1, -1), (1, -1), (1, 1), (-1, 1))):
+            self.corners[:, corner, 0] = x + dx * half
+            self.corners[:, corner, 1] = y + dy * half
+        self.no_stroke()
+        for color, group in self.groups():
+            self.fill(color)
+            self.begin_shape(self.QUADS)
+            self.vertices(self.corners[group].reshape(-1, 2))
+            self.end_shape()
+
+    def draw_shape(self):
+        # Built once, afterwards only the vertex coordinates are replaced
+        if self.bulk is None:
+            self.bulk = []
+            for color, group in self.groups():
+                shape = self.create_shape()
+                shape.begin_shape(self.POINTS)
+                shape.stroke(color)
+                shape.stroke_weight(2)
+                shape.vertices(self.positions[group])
+                shape.end_shape()
+                self.bulk.append((shape, np.arange(group.stop - group.start), group))
+        for shape, indices, group in self.bulk:
+            shape.set_vertices(indices, self.positions[group])
+            self.shape(shape)
+
+    def draw_naive(self):
+        # One call per primitive, as TestSketch draws, for comparison
+        self.no_stroke()
+        for color, group in self.groups():
+            self.fill(color)
+            for x, y in self.positions[group]:
+                self.rect(x, y, 3, 3)
+
+    def draw(self):
+        self.background(16)
+        self.step()
+        self.draw_bulk()
+
+
+class Benchmark(BulkSketch):
+    """Frames per second for each (mode, count) in runs, warmup frames first, printed as they finish."""
+
+    def __init__(self, runs, frames=120, warmup=20, **kwargs):
+        super().__init__(runs[0][1], runs[0][0], **kwargs)
+        self.runs = list(runs)
+        self.frames = frames
+        self.warmup = warmup
+        self.results = []
+
+    def setup(self):
+        super().setup()
+        self.frame = 0
+
+    def draw(self):
+        super().draw()
+        self.frame += 1
+        if self.frame == self.warmup:
+            self.started = time.perf_counter()
+        elif self.frame == self.warmup + self.frames:
+            fps = self.frames / (time.perf_counter() - self.started)
+            self.results.append((self.mode, self.count, fps))
+            print(f"{self.mode:>6} {self.count:>9,} primitives {fps:8.1f} fps "
+                  f"{self.count * fps / 1e6:8.2f} M primitives/s", flush=True)
+            self.runs.pop(0)
+            if not self.runs:
+                self.exit_sketch()
+                return
+            self.mode = self.runs[0][0]
+            self.spawn(self.runs[0][1])
+            self.frame = 0
+
+
+def parse_counts(text):
+    return tuple(int(count) for count in text.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPS of bulk py5 drawing for increasing primitive counts")
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=["points", "lines", "rects", "shape"])
+    parser.add_argument("--counts", type=parse_counts, default=COUNTS, help="e.g. 1000,10000,100000")
+    parser.add_argument("--frames", type=int, default=120, help="frames timed per count")
+    parser.add_argument("--size", type=int, nargs=2, default=(800, 600))
+    args = parser.parse_args()
+
+    runs = [(mode, count) for mode in args.mode for count in args.counts if mode != "naive" or count <= NAIVE_MAX]
+    if not runs:
+        parser.error(f"nothing to run, naive mode only goes up to {NAIVE_MAX:,} primitives")
+    # One sketch for every run, py5 starts a single JVM per process
+    Benchmark(runs, args.frames, width=args.size[0], height=args.size[1]).run_sketch()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Headless rendering of py5 animations to video or image files, faster than real time.
+
+The animation is drawn into a Py5Graphics buffer at the output resolution, frame after frame with no frame rate
+cap, and time comes from the frame number rather than the clock, so a 10 s clip renders as fast as the machine
+draws it. Each frame's pixels are copied into one of a few preallocated arrays and handed to a writer thread,
+which feeds ffmpeg or writes numbered images while the next frame is drawn. When the writer falls behind, the
+sketch waits for a free array instead of allocating more.
+
+Processing still opens a (tiny) window, on a box without a display run it under a virtual one:
+
+    xvfb-run -a python -m _py5.offscreen out.mp4 --seconds 10 --fps 60 --size 1920 1080
+    xvfb-run -a python -m _py5.offscreen frames/%05d.png --seconds 2
+"""
+import argparse
+import contextlib
+import math
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+from py5 import Sketch
+
+VIDEO_SUFFIXES = {".mp4", ".mkv", ".mov", ".webm", ".gif"}
+
+
+class FfmpegWriter:
+    """Raw RGB frames piped into ffmpeg, which encodes them to path."""
+
+    def __init__(self, path, width, height, fps, crf=20):
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg not found on PATH, write an image sequence like frames/%05d.png instead")
+        self.process = subprocess.Popen(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+             "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", "-crf", str(crf), path],
+            stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait():
+            raise RuntimeError(f"ffmpeg exited with {self.process.returncode}")
+
+
+class ImageSequenceWriter:
+    """Numbered images, pattern like frames/%05d.png. .ppm is written directly, anything else through Pillow."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.index = 0
+        os.makedirs(os.path.dirname(pattern) or ".", exist_ok=True)
+
+    def write(self, frame):
+        path = self.pattern % self.index
+        self.index += 1
+        if path.endswith(".ppm"):
+            # Uncompressed, the fastest to write and readable by ffmpeg and most viewers
+            with open(path, "wb") as f:
+                f.write(b"P6 %d %d 255\n" % (frame.shape[1], frame.shape[0]))
+                f.write(frame.data)
+        else:
+            from PIL import Image
+
+            Image.fromarray(frame).save(path)
+
+    def close(self):
+        pass
+
+
+def writer_for(path, width, height, fps):
+    if os.path.splitext(path)[1].lower() in VIDEO_SUFFIXES:
+        return FfmpegWriter(path, width, height, fps)
+    return ImageSequenceWriter(path)
+
+
+class FramePipe:
+    """
+    slots preallocated RGB frames passed to writer on a background thread.
+
+    acquire() blocks until a frame array is free, submit() queues it for writing, close() waits for the writer
+    and re-raises anything it failed with.
+    """
+
+    def __init__(self, writer, width, height, slots=8):
+        self.writer = writer
+        self.frames = np.empty((slots, height, width, 3), np.uint8)
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.ready = queue.Queue()
+        self.error = None
+        self.written = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while (slot := self.ready.get()) is not None:
+            try:
+                if self.error is None:
+                    self.writer.write(self.frames[slot])
+                    self.written += 1
+            except Exception as e:
+                # Kept for close(), the slots still go back so the sketch does not block
+                self.error = e
+            self.free.put(slot)
+
+    def acquire(self):
+        if self.error is not None:
+            raise self.error
+        return self.free.get()
+
+    def submit(self, slot):
+        self.ready.put(slot)
+
+    def close(self):
+        self.ready.put(None)
+        self.thread.join()
+        self.writer.close()
+        if self.error is not None:
+            raise self.error
+
+
+class OffscreenSketch(Sketch):
+    """
+    Renders frames frames of render() into a width x height buffer and writes them to path.
+
+    Override render(g, t) to draw an animation, g is the Py5Graphics buffer, already inside begin_draw(),
+    and t the time in seconds of the frame.
+    """
+
+    def __init__(self, path, frames, fps=60, width=1280, height=720, slots=8):
+        super().__init__()
+        self.path = path
+        self.frames = frames
+        self.fps = fps
+        self.dimensions = (width, height)
+        self.slots = slots
+
+    def settings(self):
+        # The window is only there because Processing needs one, the frames come from the buffer
+        self.size(64, 64, self.P2D)
+
+    def setup(self):
+        self.frame_rate(1000)
+        width, height = self.dimensions
+        self.buffer = self.create_graphics(width, height, self.P2D)
+        self.pipe = FramePipe(writer_for(self.path, width, height, self.fps), width, height, self.slots)
+        self.rendered = 0
+        self.started = time.perf_counter()
+
+    def render(self, g, t):
+        # The test sketch's square, following a Lissajous curve instead of the mouse
+        g.background(204)
+        g.rect_mode(self.CENTER)
+        g.rect(g.width / 2 * (1 + 0.8 * math.sin(3 * t)), g.height / 2 * (1 + 0.8 * math.sin(2 * t)), 40, 40)
+
+    def draw(self):
+        try:
+            self.buffer.begin_draw()
+            self.render(self.buffer, self.rendered / self.fps)
+            self.buffer.end_draw()
+
+            # np_pixels is py5's own array, refreshed in place, ARGB so RGB is the last three bands
+            self.buffer.load_np_pixels()
+            slot = self.pipe.acquire()
+            np.copyto(self.pipe.frames[slot], self.buffer.np_pixels[:, :, 1:])
+            self.pipe.submit(slot)
+        except Exception:
+            # Stop the writer thread (and ffmpeg) and the sketch, close() raising the writer's error again is no news
+            with contextlib.suppress(Exception):
+                self.pipe.close()
+            self.exit_sketch()
+            raise
+        self.rendered += 1
+
+        if self.rendered == self.frames:
+            try:
+                # Raises when ffmpeg exits with an error, the sketch has to stop all the same
+                self.pipe.close()
+            finally:
+                self.exit_sketch()
+            elapsed = time.perf_counter() - self.started
+            print(f"{self.rendered} frames in {elapsed:.1f} s, {self.rendered / elapsed:.1f} fps, "
+                  f"{self.rendered / self.fps / elapsed:.1f}x real time", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the py5 animation headless to a video or image sequence")
+    parser.add_argument("out", help="video (.mp4, .webm, ... through ffmpeg) or image pattern like frames/%%05d.png")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--size", type=int, nargs=2, default=(1280, 720))
+    parser.add_argument("--slots", type=int, default=8, help="frames buffered for the writer")
+    args = parser.parse_args()
+    frames = round(args.seconds * args.fps)
+    if args.fps < 1 or frames < 1:
+        # draw() stops at exactly frames rendered, 0 would never come
+        parser.error(f"--seconds {args.seconds:g} at --fps {args.fps} renders 0 frames, need at least 1")
+    if os.path.splitext(args.out)[1].lower() not in VIDEO_SUFFIXES:
+        # Otherwise the writer thread fails on the first frame, or every frame overwrites the last
+        try:
+            numbered = args.out % 0 != args.out % 1
+        except (TypeError, ValueError):
+            numbered = False
+        if not numbered:
+            parser.error(f"{args.out} is neither a video nor a numbered image pattern like frames/%05d.png")
+    OffscreenSketch(args.out, frames, args.fps, *args.size, args.slots).run_sketch()
+
+
+if __name__ == "__main__":
+    main()
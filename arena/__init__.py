@@ -0,0 +1,4 @@
+"""
+Harness for running the model-generated tetranoid games side by side, headless and faster than real time.
+"""
+from arena.env import ACTIONS, DROP, LEFT, NOOP, RIGHT, ROTATE, ENVS, TetranoidEnv, make
@@ -0,0 +1,256 @@
+"""
+Gym-style reset()/step()/render() wrappers around every tetranoid implementation.
+
+Each game keeps its own rules; the env only feeds it synthetic input, advances exactly one
+frame per step() and never sleeps, so headless runs are bounded by CPU rather than a 60 Hz clock.
+
+    env = make("grok_3")
+    obs = env.reset(seed=1)
+    while not done:
+        obs, reward, done, info = env.step(LEFT)
+"""
+import importlib
+import os
+import random
+
+import pygame
+
+# Discrete actions shared by all games, each game maps them onto its own controls
+NOOP, LEFT, RIGHT, ROTATE, DROP = range(5)
+ACTIONS = (NOOP, LEFT, RIGHT, ROTATE, DROP)
+
+# Frame length the games were tuned for, used where a game reads wall-clock ticks
+FRAME_MS = 1000 / 60
+
+
+class Keys:
+    """Stand-in for pygame.key.get_pressed() built from the set of held keys."""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class TetranoidEnv:
+    module_name = None
+
+    def __init__(self, headless=True, fps=None):
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.init()
+        self.headless = headless
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.game = importlib.import_module(self.module_name)
+        self.screen = None
+        self.frame = 0
+        self.score = 0
+        self.done = True
+
+    def reset(self, seed=None):
+        if seed is not None:
+            random.seed(seed)
+        self.frame = 0
+        self.done = False
+        self._reset()
+        self.score = self._score()
+        return self.observe()
+
+    def step(self, action=NOOP):
+        if self.done:
+            raise RuntimeError("step() called on a finished episode, call reset() first")
+        self.done = bool(self._step(action))
+        self.frame += 1
+        score = self._score()
+        reward, self.score = score - self.score, score
+        return self.observe(), reward, self.done, {"frame": self.frame}
+
+    def render(self):
+        if self.screen is None:
+            self.screen = self.game.init_screen(self.headless)
+        self._draw(self.screen)
+        if not self.headless:
+            pygame.display.flip()
+            if self.fps:
+                self.clock.tick(self.fps)
+        return self.screen
+
+    def close(self):
+        if not self.headless:
+            pygame.display.quit()
+        self.screen = None
+
+    def observe(self):
+        ball, paddle = self._positions()
+        return {"frame": self.frame, "score": self.score, "lines": self._lines(), "ball": ball, "paddle": paddle}
+
+    def _lines(self):
+        return 0
+
+    def _positions(self):
+        # Ball centre and paddle centre x, None where a game has no paddle
+        raise NotImplementedError
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _step(self, action):
+        raise NotImplementedError
+
+    def _score(self):
+        raise NotImplementedError
+
+    def _draw(self, screen):
+        raise NotImplementedError
+
+
+class Grok3Env(TetranoidEnv):
+    module_name = "grok_3.tetranoid"
+    key_map = {
+        LEFT: (pygame.K_LEFT,),
+        RIGHT: (pygame.K_RIGHT,),
+        ROTATE: (pygame.K_SPACE,),
+        DROP: (pygame.K_UP,),
+    }
+
+    def _reset(self):
+        self.state = self.game.Game(headless=self.headless)
+
+    def _step(self, action):
+        keys = Keys(self.key_map.get(action, ()))
+        self.state.handle_input([], keys, int(self.frame * FRAME_MS))
+        self.state.update(keys, None)
+        return self.state.game_over
+
+    def _score(self):
+        return self.state.score
+
+    def _lines(self):
+        return self.state.lines
+
+    def _positions(self):
+        return self.state.ball.rect.center, self.state.paddle.rect.centerx
+
+    def _draw(self, screen):
+        self.state.draw(screen)
+
+
+class GeminiEnv(TetranoidEnv):
+    """
+    autoplay hands the pieces to the placement-search bot, as the game's --bot flag does; the keys only turn
+    pieces and move the paddle, so actions cannot place a piece in a column.
+    """
+    module_name = "gemini.2_0_flash_thinking.tetranoid"
+    key_map = {
+        LEFT: pygame.K_LEFT,
+        RIGHT: pygame.K_RIGHT,
+        ROTATE: pygame.K_UP,
+        DROP: pygame.K_DOWN,
+    }
+
+    def __init__(self, headless=True, fps=None, autoplay=False):
+        super().__init__(headless, fps)
+        self.bot = importlib.import_module("gemini.2_0_flash_thinking.bot") if autoplay else None
+
+    def _reset(self):
+        self.game.reset_game()
+
+    def _step(self, action):
+        if self.bot:
+            self.bot.drive(self.game)
+        events = []
+        if action in self.key_map:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=self.key_map[action]))
+        return self.game.update_game(events)
+
+    def _score(self):
+        return self.game.score
+
+    def _lines(self):
+        return self.game.lines_cleared_total
+
+    def _positions(self):
+        return (self.game.ball_x, self.game.ball_y), self.game.paddle_x + self.game.paddle_width // 2
+
+    def _draw(self, screen):
+        self.game.draw_game(screen)
+
+    def observe(self):
+        g = self.game
+        return dict(
+            super().observe(),
+            grid=g.grid,
+            rows=g.grid_rows,
+            tetromino=g.current_tetromino_type,
+            pos=tuple(g.current_tetromino_pos),
+            rotation=g.current_tetromino_rotation,
+            next_tetromino=g.next_tetromino_type,
+            level=g.level,
+        )
+
+
+class DeepseekEnv(TetranoidEnv):
+    module_name = "deepseek_r1_32b.tetranoid"
+    key_map = {
+        LEFT: (pygame.K_LEFT,),
+        RIGHT: (pygame.K_RIGHT,),
+    }
+
+    def _reset(self):
+        self.game.reset_game()
+
+    def _step(self, action):
+        return self.game.update_game(Keys(self.key_map.get(action, ())))
+
+    def _score(self):
+        return self.game.score
+
+    def _positions(self):
+        paddle = self.game.paddle
+        return (self.game.ball.x, self.game.ball.y), paddle.x + paddle.width // 2
+
+    def _draw(self, screen):
+        self.game.draw_game(screen)
+
+
+class OllamaEnv(TetranoidEnv):
+    """
+    The llama game has no controls, every action is a no-op.
+
+    The score is the frames survived: the blocks spawn above the screen and the ball bounces off the top, so
+    it practically never touches one and block hits would be 0 in every game. update() returns True once the
+    ball touches the bottom, or a side while blocks remain, which is its game over, and that ends the episode.
+    """
+    module_name = "ollama.llama_3_1_8b_instruct_q4.tetranoid"
+
+    def _reset(self):
+        self.state = self.game.Game()
+
+    def _step(self, action):
+        self.state.spawn_blocks()
+        return self.state.update()
+
+    def _score(self):
+        return self.frame
+
+    def _positions(self):
+        return self.state.ball.rect.center, None
+
+    def _draw(self, screen):
+        screen.fill(self.game.BLACK)
+        self.state.draw(screen)
+
+
+ENVS = {
+    "grok_3": Grok3Env,
+    "gemini": GeminiEnv,
+    "deepseek": DeepseekEnv,
+    "ollama": OllamaEnv,
+}
+
+
+def make(name, **kwargs):
+    return ENVS[name](**kwargs)
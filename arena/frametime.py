@@ -0,0 +1,127 @@
+"""
+Opt-in per-phase frame timing for the tetranoid game loops.
+
+A game loop calls start() at the top of each frame and mark(phase) after each phase; the time since the
+previous mark is added to that phase, so a phase can be marked several times per frame. Games keep the
+timer in a variable that is None unless profiling was asked for and guard every call with `if timer:`,
+so a disabled timer costs one truth test per mark.
+
+    timer = FrameTimer()
+    while running:
+        timer.start()
+        handle_events(); timer.mark("events")
+        ...
+        timer.draw(screen)  # p50/p99 overlay, its own cost is not counted
+        pygame.display.flip(); timer.mark("flip")
+    timer.dump("frames.json")  # Chrome trace (chrome://tracing, Perfetto), any other suffix writes CSV
+"""
+import csv
+import json
+import time
+
+import pygame
+
+PHASES = ("events", "physics", "collision", "lines", "draw", "flip")
+BUDGET_MS = 1000 / 60
+
+
+class FrameTimer:
+    def __init__(self, capacity=600, phases=PHASES, refresh=30):
+        self.phases = phases
+        self.capacity = capacity
+        self.refresh = refresh
+        # Column 0 is the frame start, column i + 1 the seconds spent in phases[i]
+        self.column = {phase: i + 1 for i, phase in enumerate(phases)}
+        self.rows = [[0.0] * (len(phases) + 1) for _ in range(capacity)]
+        self.row = self.rows[0]
+        self.frames = 0
+        self.last = time.perf_counter()
+        self.font = None
+        self.labels = []
+
+    def start(self):
+        now = time.perf_counter()
+        row = self.rows[self.frames % self.capacity]
+        row[0] = now
+        for i in range(1, len(row)):
+            row[i] = 0.0
+        self.row = row
+        self.frames += 1
+        self.last = now
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.row[self.column[phase]] += now - self.last
+        self.last = now
+
+    def history(self):
+        """Recorded rows, oldest first."""
+        if self.frames <= self.capacity:
+            return self.rows[:self.frames]
+        split = self.frames % self.capacity
+        return self.rows[split:] + self.rows[:split]
+
+    def percentiles(self, quantiles=(0.5, 0.99)):
+        """{phase: [milliseconds per quantile]}, plus "total" for the sum of all phases."""
+        rows = self.history()
+        columns = {phase: [row[i] for row in rows] for phase, i in self.column.items()}
+        columns["total"] = [sum(row[1:]) for row in rows]
+        result = {}
+        for phase, values in columns.items():
+            values.sort()
+            result[phase] = [values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0 for q in quantiles]
+        return result
+
+    def draw(self, surface, pos=(10, 40)):
+        """Blit the p50/p99 table on an opaque box and return its rect, re-rendered every `refresh` frames."""
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        if not self.labels or self.frames % self.refresh == 0:
+            lines = [f"{'phase':10}  p50 ms  p99 ms"]
+            for phase, (p50, p99) in self.percentiles().items():
+                lines.append(f"{phase:10} {p50:7.2f} {p99:7.2f}")
+            over = self.percentiles((0.99,))["total"][0] > BUDGET_MS
+            self.labels = [self.font.render(line, True, (255, 80, 80) if over and i == len(lines) - 1 else (255, 255, 255))
+                           for i, line in enumerate(lines)]
+        height = self.labels[0].get_height()
+        rect = pygame.Rect(pos, (max(label.get_width() for label in self.labels) + 8, height * len(self.labels) + 8))
+        surface.fill((0, 0, 0), rect)
+        for i, label in enumerate(self.labels):
+            surface.blit(label, (rect.x + 4, rect.y + 4 + i * height))
+        # Leave the overlay out of whichever phase is marked next
+        self.last = time.perf_counter()
+        return rect
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_ms", *self.phases, "total"])
+            rows = self.history()
+            first = self.frames - len(rows)
+            origin = rows[0][0] if rows else 0.0
+            for n, row in enumerate(rows):
+                ms = [t * 1000 for t in row[1:]]
+                writer.writerow([first + n, round((row[0] - origin) * 1000, 4), *(round(t, 4) for t in ms), round(sum(ms), 4)])
+
+    def write_trace(self, path):
+        """Chrome trace event JSON, one "frame" slice per frame with its phases laid end to end in PHASES order."""
+        events = []
+        rows = self.history()
+        first = self.frames - len(rows)
+        origin = rows[0][0] if rows else 0.0
+        for n, row in enumerate(rows):
+            ts = (row[0] - origin) * 1e6
+            events.append({"name": "frame", "ph": "X", "ts": ts, "dur": sum(row[1:]) * 1e6, "pid": 0, "tid": 0,
+                           "args": {"frame": first + n}})
+            for phase, i in self.column.items():
+                if row[i]:
+                    events.append({"name": phase, "ph": "X", "ts": ts, "dur": row[i] * 1e6, "pid": 0, "tid": 0})
+                    ts += row[i] * 1e6
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def dump(self, path):
+        if path.endswith(".json"):
+            self.write_trace(path)
+        else:
+            self.write_csv(path)
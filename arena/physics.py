@@ -0,0 +1,124 @@
+"""
+Continuous ball collision and fixed-timestep stepping shared by the tetranoid games.
+
+The games move the ball by its whole speed each frame, so one overlap test per frame lets a fast ball skip
+over a brick or the paddle. sweep() instead finds the moment in the move at which the circle first touches
+a box: a circle moving against a box is a point moving against the box grown by the radius, with rounded
+corners, which is two grown boxes plus four corner circles.
+
+FixedStep decouples the simulation rate from the render rate:
+
+    ticks = FixedStep(60)
+    while running:
+        for _ in range(ticks.steps(clock.tick(60) / 1000)):
+            update_game()  # always advances exactly 1/60 s, moving the ball in smaller swept substeps
+        draw_game()
+"""
+import math
+
+
+def _enter_box(x, y, dx, dy, left, top, right, bottom):
+    # Slab test of the ray (x, y) + t * (dx, dy) against the box, (t, nx, ny) of the entry or None
+    t_enter, t_exit = -math.inf, math.inf
+    nx = ny = 0
+    if dx:
+        t0, t1 = (left - x) / dx, (right - x) / dx
+        n = -1 if dx > 0 else 1
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_enter:
+            t_enter, nx, ny = t0, n, 0
+        t_exit = min(t_exit, t1)
+    elif not left <= x <= right:
+        return None
+    if dy:
+        t0, t1 = (top - y) / dy, (bottom - y) / dy
+        n = -1 if dy > 0 else 1
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_enter:
+            t_enter, nx, ny = t0, 0, n
+        t_exit = min(t_exit, t1)
+    elif not top <= y <= bottom:
+        return None
+    if 0 <= t_enter <= 1 and t_enter <= t_exit:
+        return t_enter, nx, ny
+    return None
+
+
+def _enter_circle(x, y, dx, dy, cx, cy, radius):
+    mx, my = x - cx, y - cy
+    b = mx * dx + my * dy
+    c = mx * mx + my * my - radius * radius
+    if c < 0 or b >= 0:
+        # Inside already, or moving away
+        return None
+    a = dx * dx + dy * dy
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    if t > 1:
+        return None
+    return t, (mx + t * dx) / radius, (my + t * dy) / radius
+
+
+def sweep(x, y, radius, dx, dy, left, top, right, bottom):
+    """
+    First contact of a circle centred at (x, y) moving by (dx, dy) with the box, as (t, nx, ny).
+
+    t is the fraction of the move at which they touch, (nx, ny) the unit contact normal pointing out of the box.
+    None if the move misses, or if the circle already overlaps the box so that a ball pushed inside can leave.
+    """
+    # Swept bounds first, nearly every box in a level fails this
+    if (min(x, x + dx) - radius > right or max(x, x + dx) + radius < left
+            or min(y, y + dy) - radius > bottom or max(y, y + dy) + radius < top):
+        return None
+    nearest_x = min(max(x, left), right)
+    nearest_y = min(max(y, top), bottom)
+    if (x - nearest_x) ** 2 + (y - nearest_y) ** 2 < radius * radius:
+        return None
+    hits = [
+        _enter_box(x, y, dx, dy, left - radius, top, right + radius, bottom),
+        _enter_box(x, y, dx, dy, left, top - radius, right, bottom + radius),
+        _enter_circle(x, y, dx, dy, left, top, radius),
+        _enter_circle(x, y, dx, dy, right, top, radius),
+        _enter_circle(x, y, dx, dy, left, bottom, radius),
+        _enter_circle(x, y, dx, dy, right, bottom, radius),
+    ]
+    hits = [hit for hit in hits if hit is not None]
+    return min(hits) if hits else None
+
+
+def first_hit(x, y, radius, dx, dy, boxes):
+    """Earliest sweep() over boxes of (left, top, right, bottom), as (t, nx, ny, index) or None."""
+    best = None
+    for i, (left, top, right, bottom) in enumerate(boxes):
+        hit = sweep(x, y, radius, dx, dy, left, top, right, bottom)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = (*hit, i)
+    return best
+
+
+def reflect(vx, vy, nx, ny):
+    """Velocity bounced off a surface with unit normal (nx, ny), unchanged if already moving away from it."""
+    dot = vx * nx + vy * ny
+    if dot >= 0:
+        return vx, vy
+    return vx - 2 * dot * nx, vy - 2 * dot * ny
+
+
+class FixedStep:
+    """Fixed-timestep accumulator, feed it each frame's real duration and run the returned number of steps."""
+
+    def __init__(self, hz, max_steps=8):
+        self.dt = 1 / hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def steps(self, seconds):
+        # Clamped so a stall (window drag, breakpoint, intro screen) does not snowball into catch-up steps
+        self.accumulator = min(self.accumulator + seconds, self.max_steps * self.dt)
+        n = int(self.accumulator / self.dt + 1e-9)
+        self.accumulator = max(0.0, self.accumulator - n * self.dt)
+        return n
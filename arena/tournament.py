@@ -0,0 +1,161 @@
+"""
+Batch runner that plays many seeded headless games of every tetranoid implementation across a process pool.
+
+    python -m arena.tournament --games 1000 --controller track --out reports/track
+
+writes one CSV row per game and a JSON summary per implementation.
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+from arena.env import ENVS, LEFT, NOOP, RIGHT, ACTIONS, make
+
+
+# --- Controllers: callables (obs, rng) -> action ---
+def idle(obs, rng):
+    return NOOP
+
+
+def random_keys(obs, rng):
+    return rng.choice(ACTIONS)
+
+
+def track(obs, rng):
+    # Keep the paddle under the ball
+    if obs["paddle"] is None:
+        return NOOP
+    dx = obs["ball"][0] - obs["paddle"]
+    if dx < -5:
+        return LEFT
+    if dx > 5:
+        return RIGHT
+    return NOOP
+
+
+CONTROLLERS = {
+    "idle": idle,
+    "random": random_keys,
+    "track": track,
+    # track for the paddle, with the placement-search bot on the pieces where the game has one
+    "bot": track,
+}
+# Implementations whose env takes autoplay=True under the bot controller
+BOT_IMPLS = {"gemini"}
+
+# One env per implementation per worker process, reused across games
+_envs = {}
+
+
+def _init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    # SDL otherwise traps SIGTERM, and Pool.terminate() could never stop the workers
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+    # The games log per frame, which would dominate headless runs
+    logging.disable(logging.CRITICAL)
+
+
+def play(impl, seed, controller="track", max_frames=20_000):
+    """Play one game to the end (or max_frames) and return its result row."""
+    autoplay = controller == "bot" and impl in BOT_IMPLS
+    if (impl, autoplay) not in _envs:
+        _envs[impl, autoplay] = make(impl, autoplay=True) if autoplay else make(impl)
+    env = _envs[impl, autoplay]
+    policy = CONTROLLERS[controller]
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    obs = env.reset(seed=seed)
+    done = False
+    while not done and env.frame < max_frames:
+        obs, _, done, _ = env.step(policy(obs, rng))
+    seconds = time.perf_counter() - start
+    return {
+        "impl": impl,
+        "seed": seed,
+        "controller": controller,
+        "score": obs["score"],
+        "frames": obs["frame"],
+        "lines": obs["lines"],
+        "finished": done,
+        "seconds": seconds,
+    }
+
+
+def _play(job):
+    return play(*job)
+
+
+def run(impls=tuple(ENVS), games=100, controller="track", max_frames=20_000, seed=0, processes=None):
+    """Play games seeded seed..seed+games-1 of every implementation, yielding rows as they finish."""
+    jobs = [(impl, seed + i, controller, max_frames) for i in range(games) for impl in impls]
+    processes = processes or os.cpu_count()
+    # Enough jobs per task to amortise IPC, small enough that no core idles at the end
+    chunksize = max(1, len(jobs) // (processes * 8))
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_play, jobs, chunksize)
+
+
+def summarize(rows):
+    by_impl = {}
+    for row in rows:
+        by_impl.setdefault(row["impl"], []).append(row)
+    summary = {}
+    for impl, impl_rows in sorted(by_impl.items()):
+        scores = [r["score"] for r in impl_rows]
+        frames = [r["frames"] for r in impl_rows]
+        seconds = sum(r["seconds"] for r in impl_rows)
+        summary[impl] = {
+            "games": len(impl_rows),
+            "score_mean": statistics.fmean(scores),
+            "score_median": statistics.median(scores),
+            "score_max": max(scores),
+            "frames_mean": statistics.fmean(frames),
+            "frames_median": statistics.median(frames),
+            "lines_total": sum(r["lines"] for r in impl_rows),
+            "unfinished": sum(not r["finished"] for r in impl_rows),
+            "fps": sum(frames) / seconds if seconds else 0.0,
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--impl", action="append", choices=sorted(ENVS), help="implementation to run, repeatable (default: all)")
+    parser.add_argument("--games", type=int, default=100, help="games per implementation")
+    parser.add_argument("--controller", choices=sorted(CONTROLLERS), default="track")
+    parser.add_argument("--max-frames", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default="tournament", help="writes OUT.csv and OUT.json")
+    args = parser.parse_args(argv)
+
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    start = time.perf_counter()
+    rows = []
+    with open(args.out + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["impl", "seed", "controller", "score", "frames", "lines", "finished", "seconds"])
+        writer.writeheader()
+        for row in run(args.impl or tuple(ENVS), args.games, args.controller, args.max_frames, args.seed, args.processes):
+            writer.writerow(row)
+            rows.append(row)
+    wall = time.perf_counter() - start
+
+    summary = summarize(rows)
+    with open(args.out + ".json", "w") as f:
+        json.dump({"controller": args.controller, "games": len(rows), "wall_seconds": wall, "implementations": summary}, f, indent=2)
+    for impl, stats in summary.items():
+        print(f"{impl:10} games {stats['games']:6}  score {stats['score_mean']:9.1f}  frames {stats['frames_mean']:8.0f}  "
+              f"lines {stats['lines_total']:6}  {stats['fps']:9.0f} fps")
+    print(f"{len(rows)} games in {wall:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
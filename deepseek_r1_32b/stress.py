@@ -0,0 +1,312 @@
+"""
+Stress mode for the deepseek game: the same paddle, ball and falling blocks, with tens of thousands of them.
+
+Blocks and bricks live in fixed-capacity NumPy struct-of-arrays pools (x, y, color, alive) with a free list,
+so memory is bounded by the capacity and spawning or culling never reallocates. Falling, catching and culling
+are array operations over every block at once, and the ball is swept only against the few bricks the
+vectorised broad phase returns.
+
+    python -m deepseek_r1_32b.stress --spawn 100
+    python -m deepseek_r1_32b.stress --headless --frames 600   # prints ms per frame for update and draw
+"""
+import argparse
+import collections
+import time
+
+import numpy as np
+import pygame
+
+from arena.physics import FixedStep, first_hit, reflect
+from deepseek_r1_32b.tetranoid import (
+    BALL_RADIUS, BLACK, BLOCK_SIZE, BLUE, FPS, PHYSICS_HZ, RED, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE,
+    Ball, Paddle, draw_text,
+)
+
+COLORS = (RED, BLUE)
+
+
+class EntityPool:
+    """Fixed-capacity struct-of-arrays storage for same-sized boxes, dead slots are reused from a free stack."""
+
+    def __init__(self, capacity, width, height):
+        self.capacity = capacity
+        self.width = width
+        self.height = height
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.color = np.zeros(capacity, np.uint8)
+        self.alive = np.zeros(capacity, bool)
+        # free[:free_count] are the dead slots, the last one is handed out first
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.intp)
+        self.free_count = capacity
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def spawn(self, x, y, color):
+        """Add one entity per element of the arrays and return their slots, what does not fit is dropped."""
+        n = min(len(x), self.free_count)
+        slots = self.free[self.free_count - n:self.free_count].copy()
+        self.free_count -= n
+        self.x[slots] = x[:n]
+        self.y[slots] = y[:n]
+        self.color[slots] = color[:n]
+        self.alive[slots] = True
+        return slots
+
+    def kill(self, slots):
+        self.alive[slots] = False
+        self.free[self.free_count:self.free_count + len(slots)] = slots
+        self.free_count += len(slots)
+        return slots
+
+    def overlapping(self, left, top, right, bottom):
+        """Slots of live entities whose box overlaps the given one."""
+        return np.flatnonzero(self.alive & (self.x < right) & (self.x + self.width > left)
+                              & (self.y < bottom) & (self.y + self.height > top))
+
+
+# Game objects, set up by reset_game
+blocks = None
+bricks = None
+paddle = None
+ball = None
+score = 0
+caught = 0
+missed = 0
+spawn_per_frame = 100
+rng = np.random.default_rng()
+screen = None
+clock = pygame.time.Clock()
+
+# Bricks only change when one breaks, so they are drawn once and erased from this layer as they go
+brick_layer = None
+broken_bricks = []
+# 8-bit canvas for the falling blocks, palette index 0 is the transparent background
+block_canvas = None
+
+
+def init_screen(headless=False):
+    global screen
+    if headless:
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    else:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Tetris-Arkanoid stress")
+    return screen
+
+
+def reset_game(spawn=100, capacity=50_000, brick_size=(8, 4), brick_rows=60, seed=None):
+    global blocks, bricks, paddle, ball, score, caught, missed, spawn_per_frame, rng, brick_layer
+    rng = np.random.default_rng(seed)
+    spawn_per_frame = spawn
+    blocks = EntityPool(capacity, BLOCK_SIZE, BLOCK_SIZE)
+    width, height = brick_size
+    cols = SCREEN_WIDTH // (width + 1)
+    bricks = EntityPool(cols * brick_rows, width, height)
+    col, row = np.meshgrid(np.arange(cols), np.arange(brick_rows))
+    bricks.spawn(col.ravel() * (width + 1), row.ravel() * (height + 1), rng.integers(0, len(COLORS), bricks.capacity))
+    paddle = Paddle()
+    ball = Ball()
+    ball.y = brick_rows * (height + 1) + 100
+    score = caught = missed = 0
+    brick_layer = None
+    broken_bricks.clear()
+
+
+def move_ball():
+    # Same swept substeps as tetranoid.move_ball, with the broad phase over every brick done in one array pass
+    global score
+    substeps = PHYSICS_HZ // FPS
+    reach = BALL_RADIUS + abs(ball.speed_x) + abs(ball.speed_y)
+    paddle_box = (paddle.x, paddle.y, paddle.x + paddle.width, paddle.y + paddle.height)
+    paddle_near = paddle.x - reach < ball.x < paddle_box[2] + reach and paddle.y - reach < ball.y < paddle_box[3] + reach
+    near = bricks.overlapping(ball.x - reach, ball.y - reach, ball.x + reach, ball.y + reach)
+    # Plain floats for the sweep, NumPy scalars would leak into the ball position
+    near_boxes = list(zip(bricks.x[near].tolist(), bricks.y[near].tolist(),
+                          (bricks.x[near] + bricks.width).tolist(), (bricks.y[near] + bricks.height).tolist()))
+    near = near.tolist()
+    for _ in range(substeps):
+        remaining = 1 / substeps
+        for _ in range(4):
+            dx, dy = ball.speed_x * remaining, ball.speed_y * remaining
+            boxes = near_boxes + [paddle_box] if paddle_near else near_boxes
+            hit = first_hit(ball.x, ball.y, BALL_RADIUS, dx, dy, boxes)
+            if hit is None:
+                ball.x += dx
+                ball.y += dy
+                break
+            t, nx, ny, i = hit
+            ball.x += dx * t
+            ball.y += dy * t
+            remaining *= 1 - t
+            if i == len(near):
+                if ny < 0:
+                    ball.speed_y = -5
+                else:
+                    ball.speed_x, ball.speed_y = reflect(ball.speed_x, ball.speed_y, nx, ny)
+            else:
+                slot = near.pop(i)
+                near_boxes.pop(i)
+                bricks.kill([slot])
+                broken_bricks.append(slot)
+                score += 10
+                ball.speed_x, ball.speed_y = reflect(ball.speed_x, ball.speed_y, nx, ny)
+
+        if ball.x + BALL_RADIUS >= SCREEN_WIDTH:
+            ball.speed_x = -abs(ball.speed_x)
+        if ball.x - BALL_RADIUS <= 0:
+            ball.speed_x = abs(ball.speed_x)
+        # No bottom wall in the original, here the ball comes back so the run keeps going
+        if ball.y - BALL_RADIUS <= 0:
+            ball.speed_y = abs(ball.speed_y)
+        if ball.y - BALL_RADIUS > SCREEN_HEIGHT:
+            ball.y = SCREEN_HEIGHT // 2
+            ball.speed_y = -5
+
+
+def update_game(keys):
+    global caught, missed
+
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        paddle.x -= 5
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        paddle.x += 5
+    paddle.x = max(0, min(paddle.x, SCREEN_WIDTH - paddle.width))
+
+    n = spawn_per_frame
+    blocks.spawn(rng.integers(0, SCREEN_WIDTH - BLOCK_SIZE, n), np.zeros(n), rng.integers(0, len(COLORS), n))
+
+    # Dead slots fall too, cheaper than masking them out and they get overwritten on reuse
+    blocks.y += 2
+    bottom = blocks.y + BLOCK_SIZE
+    on_paddle = np.flatnonzero(blocks.alive & (blocks.x < paddle.x + paddle.width) & (blocks.x + BLOCK_SIZE > paddle.x)
+                               & (bottom > paddle.y) & (bottom < paddle.y + paddle.height))
+    caught += len(blocks.kill(on_paddle))
+    # Off-screen blocks are culled instead of ending the game
+    missed += len(blocks.kill(np.flatnonzero(blocks.alive & (blocks.y > SCREEN_HEIGHT))))
+
+    move_ball()
+    if (ball.y + BALL_RADIUS > paddle.y and
+            ball.x < paddle.x + paddle.width and
+            ball.x > paddle.x):
+        ball.speed_y = -5
+
+    return len(bricks) == 0
+
+
+def pool_blits(pool, sprites, slots):
+    # (sprite, position) pairs for Surface.blits, which loops in C
+    xs = pool.x[slots].astype(np.intp).tolist()
+    ys = pool.y[slots].astype(np.intp).tolist()
+    return [(sprites[c], pos) for c, pos in zip(pool.color[slots].tolist(), zip(xs, ys))]
+
+
+def grow(index, size, axis):
+    # In place index[p] = max(index[p - size + 1 .. p]) along axis, in log2(size) shifted maxima
+    span = 1
+    while span < size:
+        step = min(span, size - span)
+        head = [slice(None)] * 2
+        tail = [slice(None)] * 2
+        head[axis], tail[axis] = slice(step, None), slice(None, -step)
+        np.maximum(index[tuple(head)], index[tuple(tail)], out=index[tuple(head)])
+        span += step
+
+
+def draw_blocks(surface):
+    # One blit per block costs about a microsecond each, so instead the top-left corners are stamped into a palette
+    # index image and grown to BLOCK_SIZE squares, which costs the same for any number of blocks
+    global block_canvas
+    size = surface.get_size()
+    if block_canvas is None or block_canvas.get_size() != size:
+        block_canvas = pygame.Surface(size, depth=8)
+        block_canvas.set_palette([BLACK, *COLORS])
+        block_canvas.set_colorkey(0)
+    index = np.zeros(size, np.uint8)
+    slots = np.flatnonzero(blocks.alive)
+    x = blocks.x[slots].astype(np.intp)
+    y = blocks.y[slots].astype(np.intp)
+    visible = (x >= 0) & (x < size[0]) & (y >= 0) & (y < size[1])
+    index[x[visible], y[visible]] = blocks.color[slots][visible] + 1
+    grow(index, BLOCK_SIZE, 0)
+    grow(index, BLOCK_SIZE, 1)
+    pygame.surfarray.blit_array(block_canvas, index)
+    surface.blit(block_canvas, (0, 0))
+
+
+def draw_game(surface):
+    global brick_layer
+    if brick_layer is None or brick_layer.get_size() != surface.get_size():
+        brick_layer = pygame.Surface(surface.get_size())
+        brick_layer.fill(BLACK)
+        sprites = [pygame.Surface((bricks.width, bricks.height)) for _ in COLORS]
+        for sprite, color in zip(sprites, COLORS):
+            sprite.fill(color)
+        brick_layer.blits(pool_blits(bricks, sprites, np.flatnonzero(bricks.alive)), doreturn=False)
+        broken_bricks.clear()
+    for slot in broken_bricks:
+        brick_layer.fill(BLACK, (int(bricks.x[slot]), int(bricks.y[slot]), bricks.width, bricks.height))
+    broken_bricks.clear()
+    surface.blit(brick_layer, (0, 0))
+
+    draw_blocks(surface)
+
+    pygame.draw.rect(surface, WHITE, (paddle.x, paddle.y, paddle.width, paddle.height))
+    pygame.draw.circle(surface, WHITE, (ball.x, ball.y), BALL_RADIUS)
+    draw_text(surface, f"Score: {score}  blocks {len(blocks)}  bricks {len(bricks)}  caught {caught}  missed {missed}",
+              24, WHITE, 10, SCREEN_HEIGHT - 24)
+    if len(bricks) == 0:
+        draw_text(surface, "Game Over!", 48, RED, SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2)
+
+
+def bench(frames):
+    """Run frames updates and draws off-screen, returning the mean ms of each."""
+    init_screen(headless=True)
+    keys = collections.defaultdict(bool)
+    update_s = draw_s = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        update_game(keys)
+        middle = time.perf_counter()
+        draw_game(screen)
+        update_s += middle - start
+        draw_s += time.perf_counter() - middle
+    return update_s * 1000 / frames, draw_s * 1000 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deepseek tetranoid with NumPy entity pools")
+    parser.add_argument("--spawn", type=int, default=100, help="blocks spawned per frame")
+    parser.add_argument("--capacity", type=int, default=50_000, help="most blocks alive at once")
+    parser.add_argument("--brick-size", type=int, nargs=2, default=(8, 4), metavar=("W", "H"))
+    parser.add_argument("--brick-rows", type=int, default=60)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--headless", action="store_true", help="benchmark off-screen instead of playing")
+    parser.add_argument("--frames", type=int, default=600, help="frames to benchmark with --headless")
+    args = parser.parse_args()
+    reset_game(args.spawn, args.capacity, tuple(args.brick_size), args.brick_rows, args.seed)
+
+    if args.headless:
+        update_ms, draw_ms = bench(args.frames)
+        print(f"{len(blocks)} blocks, {len(bricks)} bricks: update {update_ms:.2f} ms, draw {draw_ms:.2f} ms per frame")
+        return
+
+    init_screen()
+    ticks = FixedStep(FPS)
+    frame_seconds = 1 / FPS
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        for _ in range(ticks.steps(frame_seconds)):
+            update_game(pygame.key.get_pressed())
+        draw_game(screen)
+        pygame.display.flip()
+        frame_seconds = clock.tick(FPS) / 1000
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 """
 Create a game using pygame, it should combine elements of Tetris and Arkanoid.
 """
+import sys
+
 import pygame
 import random
 import math
+from pathlib import Path
+
+# arena/ lives at the repo root, so the game also runs as python deepseek_r1_32b/tetranoid.py
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from arena.physics import FixedStep, first_hit, reflect
 
 # Initialize Pygame
 pygame.init()
@@ -17,6 +24,8 @@ PADDLE_HEIGHT = 20
 BALL_RADIUS = 15
 BRICK_WIDTH = 75
 BRICK_HEIGHT = 20
+FPS = 60
+PHYSICS_HZ = 240  # Ball substeps per second, a multiple of FPS
 
 # Colors
 WHITE = (255, 255, 255)
@@ -62,44 +71,89 @@ class Brick:
 
 # Create game objects
 blocks = []
-paddle = Paddle()
-ball = Ball()
-
-bricks = [Brick(x * (BRICK_WIDTH + 5), y * (BRICK_HEIGHT + 5)) for x in range(10) for y in range(3)]
+paddle = None
+ball = None
+bricks = []
 score = 0
 game_over = False
-
-# Initialize screen and clock
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Tetris-Arkanoid")
+screen = None
 clock = pygame.time.Clock()
+timer = None  # arena.frametime.FrameTimer when profiling
 
 
-def draw_text(text, size, color, x, y):
-    font = pygame.font.Font(None, size)
-    text_surface = font.render(text, True, color)
-    screen.blit(text_surface, (x, y))
-
+def init_screen(headless=False):
+    global screen
+    if headless:
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    else:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Tetris-Arkanoid")
+    return screen
 
-def check_collision(ball, brick):
-    return (ball.x + BALL_RADIUS > brick.x and
-            ball.x - BALL_RADIUS < brick.x + brick.width and
-            ball.y + BALL_RADIUS > brick.y and
-            ball.y - BALL_RADIUS < brick.y + brick.height)
 
+def reset_game():
+    global blocks, paddle, ball, bricks, score, game_over
+    blocks = []
+    paddle = Paddle()
+    ball = Ball()
+    bricks = [Brick(x * (BRICK_WIDTH + 5), y * (BRICK_HEIGHT + 5)) for x in range(10) for y in range(3)]
+    score = 0
+    game_over = False
 
-# Main game loop
-running = True
-while running:
-    screen.fill(BLACK)
 
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def draw_text(surface, text, size, color, x, y):
+    font = pygame.font.Font(None, size)
+    text_surface = font.render(text, True, color)
+    surface.blit(text_surface, (x, y))
+
+
+def move_ball():
+    # One frame of ball movement in PHYSICS_HZ / FPS swept substeps, so it stops at the first brick or paddle in its path
+    global score
+    substeps = PHYSICS_HZ // FPS
+    paddle_box = (paddle.x, paddle.y, paddle.x + paddle.width, paddle.y + paddle.height)
+    # Only bricks and paddle within reach this frame are swept against
+    reach = BALL_RADIUS + abs(ball.speed_x) + abs(ball.speed_y)
+    paddle_near = paddle.x - reach < ball.x < paddle_box[2] + reach and paddle.y - reach < ball.y < paddle_box[3] + reach
+    near = [brick for brick in bricks
+            if brick.x - reach < ball.x < brick.x + brick.width + reach and brick.y - reach < ball.y < brick.y + brick.height + reach]
+    for _ in range(substeps):
+        remaining = 1 / substeps
+        for _ in range(4):
+            dx, dy = ball.speed_x * remaining, ball.speed_y * remaining
+            boxes = [(b.x, b.y, b.x + b.width, b.y + b.height) for b in near]
+            if paddle_near:
+                boxes.append(paddle_box)
+            hit = first_hit(ball.x, ball.y, BALL_RADIUS, dx, dy, boxes)
+            if hit is None:
+                ball.x += dx
+                ball.y += dy
+                break
+            t, nx, ny, i = hit
+            ball.x += dx * t
+            ball.y += dy * t
+            remaining *= 1 - t
+            if i == len(near):
+                if ny < 0:
+                    ball.speed_y = -5
+                else:
+                    ball.speed_x, ball.speed_y = reflect(ball.speed_x, ball.speed_y, nx, ny)
+            else:
+                bricks.remove(near.pop(i))
+                score += 10
+                ball.speed_x, ball.speed_y = reflect(ball.speed_x, ball.speed_y, nx, ny)
+
+        # Ball collision with walls
+        if ball.x + BALL_RADIUS >= SCREEN_WIDTH:
+            ball.speed_x = -abs(ball.speed_x)
+        if ball.x - BALL_RADIUS <= 0:
+            ball.speed_x = abs(ball.speed_x)
+
+
+def update_game(keys):
+    global score, game_over
 
     # Move paddle with arrow keys or WASD
-    keys = pygame.key.get_pressed()
     if keys[pygame.K_LEFT] or keys[pygame.K_a]:
         paddle.x -= 5
     if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
@@ -107,6 +161,8 @@ while running:
 
     # Keep paddle within screen bounds
     paddle.x = max(0, min(paddle.x, SCREEN_WIDTH - paddle.width))
+    if timer:
+        timer.mark("events")
 
     # Spawn new blocks
     if random.randint(1, 30) == 1:
@@ -129,52 +185,88 @@ while running:
         if block.y > SCREEN_HEIGHT:
             game_over = True
 
-    # Update ball position
-    ball.x += ball.speed_x
-    ball.y += ball.speed_y
+    if timer:
+        timer.mark("physics")
 
-    # Ball collision with walls
-    if ball.x + BALL_RADIUS >= SCREEN_WIDTH or ball.x - BALL_RADIUS <= 0:
-        ball.speed_x *= -1
+    # Update ball position, bouncing off walls, paddle and bricks
+    move_ball()
 
-    # Ball collision with paddle
+    # A ball below the paddle top but over the paddle (it moved under the ball) still goes back up
     if (ball.y + BALL_RADIUS > paddle.y and
             ball.x < paddle.x + paddle.width and
             ball.x > paddle.x):
         ball.speed_y = -5
+    if timer:
+        timer.mark("collision")
+
+    return len(bricks) == 0 or game_over
 
-    # Ball collision with bricks
-    for i in reversed(range(len(bricks))):
-        brick = bricks[i]
-        if check_collision(ball, brick):
-            del bricks[i]
-            score += 10
-            ball.speed_y *= -1
-            break
+
+def draw_game(surface):
+    surface.fill(BLACK)
 
     # Draw objects
-    draw_text(f"Score: {score}", 24, WHITE, 10, 10)
+    draw_text(surface, f"Score: {score}", 24, WHITE, 10, 10)
 
     # Draw paddle
-    pygame.draw.rect(screen, WHITE, (paddle.x, paddle.y, paddle.width, paddle.height))
+    pygame.draw.rect(surface, WHITE, (paddle.x, paddle.y, paddle.width, paddle.height))
 
     # Draw blocks
     for block in blocks:
-        pygame.draw.rect(screen, block.color, (block.x, block.y, BLOCK_SIZE, BLOCK_SIZE))
+        pygame.draw.rect(surface, block.color, (block.x, block.y, BLOCK_SIZE, BLOCK_SIZE))
 
     # Draw ball
-    pygame.draw.circle(screen, WHITE, (ball.x, ball.y), BALL_RADIUS)
+    pygame.draw.circle(surface, WHITE, (ball.x, ball.y), BALL_RADIUS)
 
     # Draw bricks
     for brick in bricks:
-        pygame.draw.rect(screen, brick.color, (brick.x, brick.y, brick.width, brick.height))
+        pygame.draw.rect(surface, brick.color, (brick.x, brick.y, brick.width, brick.height))
 
     # Check game over conditions
     if len(bricks) == 0 or game_over:
-        draw_text("Game Over!", 48, RED, SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2)
-        draw_text(f"Final Score: {score}", 36, WHITE, SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 50)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
+        draw_text(surface, "Game Over!", 48, RED, SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2)
+        draw_text(surface, f"Final Score: {score}", 36, WHITE, SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 50)
+
+
+def main(profile_path=None):
+    global timer
+    init_screen()
+    reset_game()
+    if profile_path:
+        from arena.frametime import FrameTimer
+        timer = FrameTimer()
+
+    # Game logic runs in fixed 1 / FPS ticks however long frames actually take
+    ticks = FixedStep(FPS)
+    frame_seconds = 1 / FPS
+
+    # Main game loop
+    running = True
+    while running:
+        if timer:
+            timer.start()
+        # Handle events
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        for _ in range(ticks.steps(frame_seconds)):
+            update_game(pygame.key.get_pressed())
+        draw_game(screen)
+        if timer:
+            timer.mark("draw")
+            timer.draw(screen)
+
+        pygame.display.flip()
+        if timer:
+            timer.mark("flip")
+        frame_seconds = clock.tick(FPS) / 1000
+
+    if timer:
+        timer.dump(profile_path)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    # --profile FILE: frame phase timings overlay, written to FILE at exit (.json Chrome trace, else CSV), run as python -m
+    main(sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None)
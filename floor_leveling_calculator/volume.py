@@ -0,0 +1,239 @@
+"""
+Area, self-leveling compound volume and per-cell depth of a floor leveling calculator state file.
+
+Same answers as calculateArea() and calculateVolume() in gemini_pro_2.5_09_default_state_with_sample_data.html,
+to the last bit, without its per-cell work: the outline is rasterized once for the whole grid, one edge at a
+time across all cells, and the heights of the cells inside come from one broadcast of cells against measurement
+points, IDW or nearest neighbour as the state says. Sums run in the HTML's order (cumsum is sequential), since
+floating point addition is not associative.
+
+    python floor_leveling_calculator/volume.py floor_leveling_calculator/state_08_real_cabin.json
+    python floor_leveling_calculator/volume.py state_07.json --method nearestNeighbor --subdivide 4 --depth depth.npy
+    python floor_leveling_calculator/volume.py state_08_real_cabin.json --bench 1,2,4,8,16
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+IDW_POWER = 2
+EPSILON = 1e-6
+# Cells per batch of the cells x points broadcast, bounds the temporaries to a few MB each
+BATCH = 1 << 16
+
+
+def load_state(path):
+    with open(path) as f:
+        state = json.load(f)
+    if not isinstance(state.get("gridScale"), (int, float)) or not isinstance(state.get("outlinePoints"), list) \
+            or not isinstance(state.get("measurementPoints"), list):
+        raise ValueError(f"{path}: missing gridScale, outlinePoints or measurementPoints")
+    return state
+
+
+def area(state):
+    """Square meters inside the outline, the shoelace formula summed in outline order as the HTML does."""
+    points = state["outlinePoints"]
+    if not state.get("isOutlineClosed") or len(points) < 3:
+        return 0
+    total = 0
+    for p1, p2 in zip(points, points[1:] + points[:1]):
+        total += p1["x"] * p2["y"] - p2["x"] * p1["y"]
+    return abs(total) / 2 * (state["gridScale"] / 1000) * (state["gridScale"] / 1000)
+
+
+def grid(state, subdivide=1):
+    """Cell center x and y coordinates over the outline's bounding box plus a margin of 2, in grid units."""
+    xs = [p["x"] for p in state["outlinePoints"]]
+    ys = [p["y"] for p in state["outlinePoints"]]
+    x0, x1 = math.floor(min(xs) - 2), math.ceil(max(xs) + 2)
+    y0, y1 = math.floor(min(ys) - 2), math.ceil(max(ys) + 2)
+    # With subdivide 1, x0 + (i + 0.5) is exactly the HTML's gx + 0.5
+    cx = x0 + (np.arange((x1 - x0) * subdivide) + 0.5) / subdivide
+    cy = y0 + (np.arange((y1 - y0) * subdivide) + 0.5) / subdivide
+    return cx, cy
+
+
+def inside(polygon, cx, cy):
+    """Even-odd point in polygon for every (cy, cx) cell, the HTML's isPointInPolygon an edge at a time."""
+    mask = np.zeros((len(cy), len(cx)), bool)
+    for (xi, yi), (xj, yj) in zip(polygon, np.roll(polygon, 1, axis=0)):
+        crosses = (yi > cy) != (yj > cy)
+        if not crosses.any():
+            continue
+        # Where the edge crosses each row, evaluated in the HTML's order of operations
+        with np.errstate(divide="ignore", invalid="ignore"):
+            at = (xj - xi) * (cy[crosses] - yi) / (yj - yi) + xi
+        mask[crosses] ^= cx[None, :] < at[:, None]
+    return mask
+
+
+def heights(px, py, ph, x, y, method="idw"):
+    """Interpolated height at each (x, y), measurement points at px, py with heights ph."""
+    result = np.empty(len(x))
+    for start in range(0, len(x), BATCH):
+        dx = px[None, :] - x[start:start + BATCH, None]
+        dy = py[None, :] - y[start:start + BATCH, None]
+        distance_sq = dx * dx + dy * dy
+        if method != "idw":
+            # argmin takes the first of equal distances, as the strict < in the HTML does
+            result[start:start + BATCH] = ph[np.argmin(distance_sq, axis=1)]
+            continue
+        distance = np.sqrt(distance_sq)
+        with np.errstate(divide="ignore"):
+            weight = 1.0 / distance ** IDW_POWER
+        # Points on top of a cell are skipped in the sums, the first of them is the cell's height
+        exact = distance_sq < EPSILON
+        weight[exact | (distance <= EPSILON) | ~np.isfinite(weight)] = 0.0
+        weighted = np.cumsum(weight * ph, axis=1)[:, -1]
+        total = np.cumsum(weight, axis=1)[:, -1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(total < EPSILON, np.nan, weighted / total)
+        hit = exact.any(axis=1)
+        value[hit] = ph[np.argmax(exact[hit], axis=1)]
+        result[start:start + BATCH] = value
+    return result
+
+
+def compute(state, method=None, subdivide=1):
+    """
+    {"area_m2", "volume_l", "max_height", "cell_mm", "x", "y", "mask", "heights", "depth"} for a state.
+
+    heights and depth are (rows, columns) arrays over the grid of cell centers x, y, NaN outside the outline;
+    depth is how far each cell is below the highest measurement, in the height unit (mm). subdivide splits each
+    grid square into subdivide x subdivide cells, 1 is the HTML's grid.
+    """
+    method = method or state.get("interpolationMethod") or "nearestNeighbor"
+    points = [p for p in state["measurementPoints"] if p.get("height") is not None]
+    result = {"area_m2": area(state), "volume_l": 0, "max_height": None, "cell_mm": state["gridScale"] / subdivide,
+              "x": None, "y": None, "mask": None, "heights": None, "depth": None}
+    if not state.get("isOutlineClosed") or not points or not state["outlinePoints"]:
+        return result
+
+    cx, cy = grid(state, subdivide)
+    polygon = np.array([(p["x"], p["y"]) for p in state["outlinePoints"]], float)
+    mask = inside(polygon, cx, cy)
+    rows, columns = np.nonzero(mask)
+    px, py, ph = (np.array([p[key] for p in points], float) for key in ("x", "y", "height"))
+    max_height = ph.max()
+
+    cells = np.full(mask.shape, np.nan)
+    cells[rows, columns] = heights(px, py, ph, cx[columns], cy[rows], method)
+    # No height at all fills the cell to the top, like the HTML's null branch
+    depth = np.where(np.isnan(cells), max_height, np.maximum(max_height - cells, 0.0))
+    depth[~mask] = np.nan
+
+    cell_area = result["cell_mm"] * result["cell_mm"]
+    # Row by row, cell by cell, as the HTML's nested loops add them up
+    volume = np.cumsum(depth[mask] * cell_area)[-1] if len(rows) else 0.0
+    result.update(volume_l=float(volume) / 1000000, max_height=float(max_height), x=cx, y=cy, mask=mask,
+                  heights=cells, depth=depth)
+    return result
+
+
+def reference(state, method=None, subdivide=1):
+    """Straight port of the HTML's calculateVolume() loops, for checking compute() and the benchmark."""
+    method = method or state.get("interpolationMethod") or "nearestNeighbor"
+    points = [p for p in state["measurementPoints"] if p.get("height") is not None]
+    outline = state["outlinePoints"]
+    if not state.get("isOutlineClosed") or not points or not outline:
+        return 0
+
+    def point_in_polygon(x, y):
+        is_inside = False
+        j = len(outline) - 1
+        for i in range(len(outline)):
+            xi, yi, xj, yj = outline[i]["x"], outline[i]["y"], outline[j]["x"], outline[j]["y"]
+            if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                is_inside = not is_inside
+            j = i
+        return is_inside
+
+    def height(x, y):
+        if method != "idw":
+            best, nearest = math.inf, None
+            for p in points:
+                d = (p["x"] - x) ** 2 + (p["y"] - y) ** 2
+                if d < best:
+                    best, nearest = d, p["height"]
+            return nearest
+        weighted = total = 0
+        for p in points:
+            dx, dy = p["x"] - x, p["y"] - y
+            d = dx * dx + dy * dy
+            if d < EPSILON:
+                return p["height"]
+            w = 1.0 / math.sqrt(d) ** IDW_POWER
+            weighted += w * p["height"]
+            total += w
+        return None if total < EPSILON else weighted / total
+
+    max_height = max(p["height"] for p in points)
+    cell_area = (state["gridScale"] / subdivide) ** 2
+    cx, cy = grid(state, subdivide)
+    volume = 0
+    for y in cy.tolist():
+        for x in cx.tolist():
+            if point_in_polygon(x, y):
+                h = height(x, y)
+                if h is None:
+                    volume += max_height * cell_area
+                elif max_height - h > 0:
+                    volume += (max_height - h) * cell_area
+    return volume / 1000000
+
+
+def bench(state, subdivisions, method=None, reference_cells=50_000):
+    """Seconds for compute() at each subdivision, and for the loop port where the grid is small enough."""
+    rows = []
+    for k in subdivisions:
+        started = time.perf_counter()
+        result = compute(state, method, k)
+        fast = time.perf_counter() - started
+        cells = result["mask"].size if result["mask"] is not None else 0
+        slow = None
+        if cells <= reference_cells:
+            started = time.perf_counter()
+            reference(state, method, k)
+            slow = time.perf_counter() - started
+        rows.append({"subdivide": k, "cells": cells, "inside": int(result["mask"].sum()) if cells else 0,
+                     "volume_l": result["volume_l"], "seconds": fast, "reference_seconds": slow})
+    return rows
+
+
+def parse_subdivisions(text):
+    return tuple(int(k) for k in text.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Area and self-leveling compound volume of a floor state file")
+    parser.add_argument("state", help="JSON exported from the floor leveling calculator")
+    parser.add_argument("--method", choices=("idw", "nearestNeighbor"), help="default: the state's own")
+    parser.add_argument("--subdivide", type=int, default=1, help="cells per grid square side, 1 matches the HTML")
+    parser.add_argument("--depth", help="save the per-cell depth array (mm, NaN outside) to this .npy")
+    parser.add_argument("--bench", type=parse_subdivisions, help="time increasing subdivisions, e.g. 1,2,4,8")
+    args = parser.parse_args()
+    state = load_state(args.state)
+
+    if args.bench:
+        for row in bench(state, args.bench, args.method):
+            slow = f", loop port {row['reference_seconds'] * 1000:.0f} ms" if row["reference_seconds"] else ""
+            print(f"subdivide {row['subdivide']:>3}: {row['cells']:>10,} cells, {row['inside']:>10,} inside, "
+                  f"{row['volume_l']:.2f} L in {row['seconds'] * 1000:.1f} ms{slow}")
+        return
+
+    result = compute(state, args.method, args.subdivide)
+    # toFixed(2), like the calculator's display
+    print(f"Area: {result['area_m2']:.2f} m²")
+    print(f"Volume: {result['volume_l']:.2f} L ({result['volume_l']!r})")
+    if result["depth"] is not None:
+        print(f"Grid: {result['mask'].shape[1]} x {result['mask'].shape[0]} cells of {result['cell_mm']:g} mm, "
+              f"{int(result['mask'].sum())} inside, deepest {np.nanmax(result['depth']):g} mm")
+        if args.depth:
+            np.save(args.depth, result["depth"])
+
+
+if __name__ == "__main__":
+    main()
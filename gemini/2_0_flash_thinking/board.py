@@ -0,0 +1,79 @@
+"""
+The Tetris rules of the gemini game: grid size, tetromino shapes and the row bitboard operations.
+
+No pygame and no game state, so bot.py can search placements without importing (and starting) the game.
+"""
+grid_width = 10 # Tetris grid width in blocks
+grid_height = 20 # Tetris grid height in blocks
+full_row = (1 << grid_width) - 1
+tetromino_shapes = [
+    [[1, 1, 1, 1]],  # I
+    [[1, 1, 1], [1, 0, 0]],  # L
+    [[1, 1, 1], [0, 0, 1]],  # J
+    [[1, 1], [1, 1]],      # O
+    [[0, 1, 1], [1, 1, 0]],  # S
+    [[1, 1, 0], [0, 1, 1]],  # Z
+    [[1, 1, 1], [0, 1, 0]]   # T
+]
+
+
+def rotate_tetromino(tetromino):
+    rotated_tetromino = [[0] * len(tetromino) for _ in range(len(tetromino[0]))]
+    for y in range(len(tetromino)):
+        for x in range(len(tetromino[0])):
+            rotated_tetromino[x][len(tetromino) - 1 - y] = tetromino[y][x]
+    return rotated_tetromino
+
+def shape_masks(shape):
+    # Row bitmasks of a shape for every column it can sit at, bit x is grid column x
+    row_masks = [sum(1 << x for x, cell in enumerate(row) if cell) for row in shape]
+    return [tuple(mask << col for mask in row_masks) for col in range(grid_width - len(shape[0]) + 1)]
+
+
+# Every shape in all 4 rotations, precomputed once: rotated cell lists for drawing and
+# row bitmasks per column for collision checks, indexed [tetromino_type - 1][rotation]
+def all_rotations(shape):
+    rotations = [shape]
+    for _ in range(3):
+        rotations.append(rotate_tetromino(rotations[-1]))
+    return rotations
+
+
+tetromino_rotations = [all_rotations(shape) for shape in tetromino_shapes]
+tetromino_masks = [[shape_masks(rotated) for rotated in rotations] for rotations in tetromino_rotations]
+
+
+# --- Bitboard operations, they work on any list of row masks so search can use copies ---
+def fits(rows, tetromino_type, rotation, row, col):
+    placements = tetromino_masks[tetromino_type - 1][rotation]
+    if not 0 <= col < len(placements):
+        return False # Out of bounds sideways
+    masks = placements[col]
+    if row + len(masks) > grid_height:
+        return False # Out of bounds at the bottom
+    for dy, mask in enumerate(masks):
+        if row + dy >= 0 and rows[row + dy] & mask: # Rows above the screen are always free
+            return False
+    return True
+
+
+def landing_row(rows, tetromino_type, rotation, col, row=0):
+    # Lowest row a piece dropped straight down from row comes to rest on, None if it does not fit there
+    if not fits(rows, tetromino_type, rotation, row, col):
+        return None
+    while fits(rows, tetromino_type, rotation, row + 1, col):
+        row += 1
+    return row
+
+
+def lock_rows(rows, tetromino_type, rotation, row, col):
+    rows = rows[:]
+    for dy, mask in enumerate(tetromino_masks[tetromino_type - 1][rotation][col]):
+        rows[row + dy] |= mask
+    return rows
+
+
+def clear_full_rows(rows):
+    kept = [r for r in rows if r != full_row]
+    cleared = len(rows) - len(kept)
+    return [0] * cleared + kept, cleared
@@ -0,0 +1,165 @@
+"""
+Placement-search auto-player for the Tetris half of the gemini game.
+
+Every rotation and column a straight drop can reach is locked into a copy of the row bitboard, full rows are
+cleared and the board is scored on aggregate height, holes, bumpiness and lines. With depth > 1 the search
+goes on through the preview pieces, keeping the best `beam` boards per level.
+
+    python -m gemini.2_0_flash_thinking.bot --games 20 --depth 2 --beam 8
+    python -m gemini.2_0_flash_thinking.tetranoid --bot            # let it place the pieces in the real game
+"""
+import argparse
+import random
+import time
+
+# The rules only, importing the game would start it, and a second copy of it when it runs as __main__
+try:
+    from . import board
+except ImportError:
+    # Imported by the game run as a script, outside the package
+    import board
+
+# Yiyuan Lee's genetically tuned weights for these four features
+HEIGHT_WEIGHT = -0.510066
+LINES_WEIGHT = 0.760666
+HOLES_WEIGHT = -0.35663
+BUMPINESS_WEIGHT = -0.184483
+
+# Rotations with a distinct footprint per tetromino type, O has 1, I, S and Z have 2
+distinct_rotations = []
+for rotations in board.tetromino_masks:
+    unique = {}
+    for rotation, masks in enumerate(rotations):
+        unique.setdefault(tuple(masks), rotation)
+    distinct_rotations.append(sorted(unique.values()))
+
+
+def features(rows):
+    """(aggregate height, holes, bumpiness) of a row bitboard, one pass from the top with bit tricks."""
+    seen = 0 # Columns that already have a block at or above this row
+    aggregate = holes = 0
+    heights = [0] * board.grid_width
+    for r, row in enumerate(rows):
+        if seen:
+            holes += (seen & ~row).bit_count()
+        new = row & ~seen
+        if new:
+            height = board.grid_height - r
+            aggregate += new.bit_count() * height
+            seen |= new
+            while new:
+                low = new & -new
+                heights[low.bit_length() - 1] = height
+                new ^= low
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return aggregate, holes, bumpiness
+
+
+def evaluate(rows, lines):
+    aggregate, holes, bumpiness = features(rows)
+    return HEIGHT_WEIGHT * aggregate + LINES_WEIGHT * lines + HOLES_WEIGHT * holes + BUMPINESS_WEIGHT * bumpiness
+
+
+def placements(rows, tetromino_type):
+    """(rotation, col, board after the drop with full rows cleared, lines cleared) for every reachable drop."""
+    # Rows above the highest block are empty, so drops can start just above it instead of at row 0
+    top = next((r for r, row in enumerate(rows) if row), board.grid_height)
+    for rotation in distinct_rotations[tetromino_type - 1]:
+        masks = board.tetromino_masks[tetromino_type - 1][rotation]
+        start = max(0, top - len(masks[0]))
+        for col in range(len(masks)):
+            row = board.landing_row(rows, tetromino_type, rotation, col, start)
+            if row is not None:
+                after, lines = board.clear_full_rows(board.lock_rows(rows, tetromino_type, rotation, row, col))
+                yield rotation, col, after, lines
+
+
+def search(rows, pieces, beam=8):
+    """
+    Best (rotation, col) for pieces[0], looking ahead through the rest of pieces, and how many placements were scored.
+
+    The move is None when pieces[0] fits nowhere. Lookahead boards that run out of room drop out of the beam,
+    if they all do the best board of the last level that had any decides.
+    """
+    frontier = [(0.0, rows, 0, None)]
+    evaluated = 0
+    for piece in pieces:
+        children = []
+        for _, before, lines, first in frontier:
+            for rotation, col, after, cleared in placements(before, piece):
+                total = lines + cleared
+                children.append((evaluate(after, total), after, total, first or (rotation, col)))
+        evaluated += len(children)
+        if not children:
+            break
+        children.sort(key=lambda child: child[0], reverse=True)
+        frontier = children[:beam]
+    return frontier[0][3], evaluated
+
+
+def play(depth=2, beam=8, max_pieces=1000, seed=None):
+    """One board-only game with depth - 1 preview pieces, as a result dict."""
+    rng = random.Random(seed)
+    new_piece = lambda: rng.randint(1, len(board.tetromino_shapes))
+    queue = [new_piece() for _ in range(depth)]
+    rows = [0] * board.grid_height
+    pieces = lines = evaluated = 0
+    start = time.perf_counter()
+    while pieces < max_pieces:
+        move, scored = search(rows, queue, beam)
+        evaluated += scored
+        if move is None:
+            break
+        rotation, col = move
+        row = board.landing_row(rows, queue[0], rotation, col)
+        rows, cleared = board.clear_full_rows(board.lock_rows(rows, queue[0], rotation, row, col))
+        lines += cleared
+        pieces += 1
+        queue = queue[1:] + [new_piece()]
+    seconds = time.perf_counter() - start
+    return {"pieces": pieces, "lines": lines, "evaluated": evaluated, "seconds": seconds, "topped_out": pieces < max_pieces}
+
+
+driven_piece = None
+
+
+def drive(live, depth=2, beam=8):
+    """
+    Turn and shift the live game's new falling piece to the searched placement, called once per tick.
+
+    live is the running game module, everything about the current board is read from it.
+    """
+    global driven_piece
+    # spawn_tetromino makes a new position list for every piece
+    if live.current_tetromino is None or live.current_tetromino_pos is driven_piece:
+        return
+    driven_piece = live.current_tetromino_pos
+    pieces = [live.current_tetromino_type, live.next_tetromino_type][:depth]
+    move, _ = search(live.grid_rows, pieces, beam)
+    if move is not None and live.is_valid_position(live.current_tetromino_type, [live.current_tetromino_pos[0], move[1]], move[0]):
+        live.current_tetromino_rotation, live.current_tetromino_pos[1] = move
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placement-search Tetris bot on the gemini bitboard")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=2, help="pieces searched, the current one plus depth - 1 previews")
+    parser.add_argument("--beam", type=int, default=8, help="boards kept per search level")
+    parser.add_argument("--max-pieces", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for i in range(args.games):
+        result = play(args.depth, args.beam, args.max_pieces, args.seed + i)
+        results.append(result)
+        print(f"seed {args.seed + i}: {result['pieces']} pieces, {result['lines']} lines"
+              f"{', topped out' if result['topped_out'] else ''}")
+    evaluated = sum(r["evaluated"] for r in results)
+    seconds = sum(r["seconds"] for r in results)
+    print(f"{sum(r['lines'] for r in results) / len(results):.1f} lines per game, "
+          f"{evaluated / seconds:,.0f} placements/s, {sum(r['pieces'] for r in results) / seconds:,.0f} pieces/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,21 @@
 """
 Create a game using pygame, it should combine elements of Tetris and Arkanoid.
 """
+import sys
+
 import pygame
 import random
+from pathlib import Path
+
+# arena/ lives at the repo root, so the game also runs as python gemini/2_0_flash_thinking/tetranoid.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from arena.physics import FixedStep, first_hit, reflect
+
+try:
+    from .board import clear_full_rows, fits, grid_height, grid_width, lock_rows, tetromino_rotations, tetromino_shapes
+except ImportError:
+    # Run as a script, outside the package
+    from board import clear_full_rows, fits, grid_height, grid_width, lock_rows, tetromino_rotations, tetromino_shapes
 
 # Initialize Pygame
 pygame.init()
@@ -10,8 +23,17 @@ pygame.init()
 # Screen dimensions
 screen_width = 600
 screen_height = 800
-screen = pygame.display.set_mode((screen_width, screen_height))
-pygame.display.set_caption("Blockanoid Tris")
+screen = None
+
+
+def init_screen(headless=False):
+    global screen
+    if headless:
+        screen = pygame.Surface((screen_width, screen_height))
+    else:
+        screen = pygame.display.set_mode((screen_width, screen_height))
+        pygame.display.set_caption("Blockanoid Tris")
+    return screen
 
 # Colors
 white = (255, 255, 255)
@@ -40,6 +62,8 @@ ball_x = screen_width // 2
 ball_y = screen_height // 2
 ball_speed_x = 5 * random.choice([-1, 1])
 ball_speed_y = -5
+fps = 60
+physics_hz = 240 # Ball substeps per second, a multiple of fps
 
 # Brick properties (for Arkanoid part - initially Tetris blocks will act as bricks)
 brick_width = 60
@@ -51,18 +75,9 @@ bricks = [] # Initially bricks will be Tetris blocks
 
 # Tetris block properties
 block_size = brick_width # Use brick width for tetris block size
-grid_width = 10 # Tetris grid width in blocks
-grid_height = 20 # Tetris grid height in blocks
 grid = [[0] * grid_width for _ in range(grid_height)] # 0 means empty, 1-7 represent different tetris colors/types
-tetromino_shapes = [
-    [[1, 1, 1, 1]],  # I
-    [[1, 1, 1], [1, 0, 0]],  # L
-    [[1, 1, 1], [0, 0, 1]],  # J
-    [[1, 1], [1, 1]],      # O
-    [[0, 1, 1], [1, 1, 0]],  # S
-    [[1, 1, 0], [0, 1, 1]],  # Z
-    [[1, 1, 1], [0, 1, 0]]   # T
-]
+grid_rows = [0] * grid_height # Same occupancy as grid, one bitmask per row, bit x set for column x
+grid_version = 0 # Bumped on every grid change so cached renders know when to redraw it
 
 current_tetromino = None
 current_tetromino_pos = None
@@ -81,50 +96,26 @@ def spawn_tetromino():
     current_tetromino_rotation = 0
     return tetromino_type, next_tetromino
 
-def rotate_tetromino(tetromino):
-    rotated_tetromino = [[0] * len(tetromino) for _ in range(len(tetromino[0]))]
-    for y in range(len(tetromino)):
-        for x in range(len(tetromino[0])):
-            rotated_tetromino[x][len(tetromino) - 1 - y] = tetromino[y][x]
-    return rotated_tetromino
-
-def is_valid_position(tetromino, pos, rotation):
-    rotated_tetromino = tetromino
-    for _ in range(rotation):
-        rotated_tetromino = rotate_tetromino(rotated_tetromino)
-
-    for y in range(len(rotated_tetromino)):
-        for x in range(len(rotated_tetromino[0])):
-            if rotated_tetromino[y][x]:
-                block_x = pos[1] + x
-                block_y = pos[0] + y
-
-                if block_x < 0 or block_x >= grid_width or block_y >= grid_height:
-                    return False # Out of bounds
-                if block_y >= 0 and grid[block_y][block_x] != 0: # Check grid only if y is not negative (above screen)
-                    return False # Collision with existing block
-    return True
+def is_valid_position(tetromino_type, pos, rotation):
+    return fits(grid_rows, tetromino_type, rotation, pos[0], pos[1])
 
 
-def place_tetromino_on_grid(tetromino, pos, rotation, tetromino_type):
-    rotated_tetromino = tetromino
-    for _ in range(rotation):
-        rotated_tetromino = rotate_tetromino(rotated_tetromino)
+def place_tetromino_on_grid(tetromino_type, pos, rotation):
+    global grid_rows, grid_version
+    grid_version += 1
+    grid_rows = lock_rows(grid_rows, tetromino_type, rotation, pos[0], pos[1])
+    rotated_tetromino = tetromino_rotations[tetromino_type - 1][rotation]
     for y in range(len(rotated_tetromino)):
         for x in range(len(rotated_tetromino[0])):
             if rotated_tetromino[y][x]:
                 grid[pos[0] + y][pos[1] + x] = tetromino_type # Place block on grid with its color index
 
 def clear_lines():
-    lines_cleared = 0
-    y = grid_height - 1
-    while y >= 0:
-        if all(grid[y]): # If row is full
-            lines_cleared += 1
-            del grid[y] # Remove the full row
-            grid.insert(0, [0] * grid_width) # Insert new empty row at the top
-        else:
-            y -= 1
+    global grid_rows, grid_version
+    grid_rows, lines_cleared = clear_full_rows(grid_rows)
+    if lines_cleared:
+        grid_version += 1
+        grid[:] = [[0] * grid_width for _ in range(lines_cleared)] + [row for row in grid if not all(row)]
     return lines_cleared
 
 
@@ -137,6 +128,7 @@ fall_counter = 0
 level = 1
 lines_to_level_up = 10
 lines_cleared_total = 0
+timer = None # arena.frametime.FrameTimer when profiling
 
 current_tetromino_type, next_tetromino_type = spawn_tetromino()
 
@@ -202,7 +194,7 @@ def game_over_screen():
 
 
 def reset_game():
-    global game_over, score, grid, ball_x, ball_y, ball_speed_x, ball_speed_y, paddle_x, bricks, fall_counter, level, lines_to_level_up, lines_cleared_total, current_tetromino_type, next_tetromino_type, current_tetromino, current_tetromino_pos, current_tetromino_rotation, next_tetromino
+    global game_over, score, grid, grid_rows, grid_version, ball_x, ball_y, ball_speed_x, ball_speed_y, paddle_x, bricks, fall_counter, fall_speed, level, lines_to_level_up, lines_cleared_total, current_tetromino_type, next_tetromino_type, current_tetromino, current_tetromino_pos, current_tetromino_rotation, next_tetromino
 
     game_over = False
     score = 0
@@ -210,8 +202,11 @@ def reset_game():
     lines_to_level_up = 10
     lines_cleared_total = 0
     fall_speed = 60
+    fall_counter = 0
 
     grid = [[0] * grid_width for _ in range(grid_height)]
+    grid_rows = [0] * grid_height
+    grid_version += 1
     ball_x = screen_width // 2
     ball_y = screen_height // 2
     ball_speed_x = 5 * random.choice([-1, 1])
@@ -228,31 +223,59 @@ def reset_game():
 
 # --- Game loop ---
 
-show_intro = True
-running = True
-while running:
-
-    if show_intro:
-        if game_intro():
-            show_intro = False
-            reset_game()
-        else:
-            running = False
-            continue # Skip game loop if intro cancelled
-
-
-    if game_over:
-        if game_over_screen():
-            reset_game()
-            game_over = False # Reset game_over flag to start new game directly
-        else:
-            running = False
-            continue # Skip game loop if game over screen cancelled
-
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def move_ball():
+    # One frame of ball movement in physics_hz / fps swept substeps, so a fast ball still stops at the first block or the paddle
+    global grid_version, ball_x, ball_y, ball_speed_x, ball_speed_y, score
+    substeps = physics_hz // fps
+    reach = ball_radius + abs(ball_speed_x) + abs(ball_speed_y)
+    # Occupied grid cells within reach this frame, as (row, col)
+    cells = []
+    for y in range(max(0, int((ball_y - reach) // block_size)), min(grid_height, int((ball_y + reach) // block_size) + 1)):
+        row_bits = grid_rows[y]
+        if row_bits:
+            for x in range(max(0, int((ball_x - reach) // block_size)), min(grid_width, int((ball_x + reach) // block_size) + 1)):
+                if row_bits >> x & 1:
+                    cells.append((y, x))
+    paddle_box = (paddle_x, paddle_y, paddle_x + paddle_width, paddle_y + paddle_height)
+    paddle_near = paddle_x - reach < ball_x < paddle_box[2] + reach and paddle_y - reach < ball_y < paddle_box[3] + reach
+
+    for _ in range(substeps):
+        remaining = 1 / substeps
+        for _ in range(4):
+            dx, dy = ball_speed_x * remaining, ball_speed_y * remaining
+            boxes = [(x * block_size, y * block_size, (x + 1) * block_size, (y + 1) * block_size) for y, x in cells]
+            if paddle_near:
+                boxes.append(paddle_box)
+            hit = first_hit(ball_x, ball_y, ball_radius, dx, dy, boxes)
+            if hit is None:
+                ball_x += dx
+                ball_y += dy
+                break
+            t, nx, ny, i = hit
+            ball_x += dx * t
+            ball_y += dy * t
+            remaining *= 1 - t
+            ball_speed_x, ball_speed_y = reflect(ball_speed_x, ball_speed_y, nx, ny)
+            if i < len(cells): # Hit a block
+                y, x = cells.pop(i)
+                grid[y][x] = 0 # Remove the block
+                grid_rows[y] &= ~(1 << x)
+                grid_version += 1
+                score += 10 # Score for breaking block
+
+        # Ball collisions with walls
+        if ball_x - ball_radius < 0:
+            ball_speed_x = abs(ball_speed_x)
+        if ball_x + ball_radius > screen_width:
+            ball_speed_x = -abs(ball_speed_x)
+        if ball_y - ball_radius < 0:
+            ball_speed_y = abs(ball_speed_y)
+
+
+def update_game(events):
+    global grid_version, paddle_x, ball_x, ball_y, ball_speed_x, ball_speed_y, fall_counter, fall_speed, score, level, lines_to_level_up, lines_cleared_total, current_tetromino_type, next_tetromino_type, current_tetromino_rotation, game_over
+
+    for event in events:
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_LEFT:
                 paddle_x -= paddle_speed
@@ -261,11 +284,12 @@ while running:
             if event.key == pygame.K_UP:
                 if current_tetromino:
                     test_rotation = (current_tetromino_rotation + 1) % 4
-                    if is_valid_position(current_tetromino, current_tetromino_pos, test_rotation):
+                    if is_valid_position(current_tetromino_type, current_tetromino_pos, test_rotation):
                         current_tetromino_rotation = test_rotation
             if event.key == pygame.K_DOWN:
                 fall_counter = fall_speed # Speed up falling
-
+    if timer:
+        timer.mark("events")
 
     # Paddle movement boundaries
     if paddle_x < 0:
@@ -273,22 +297,16 @@ while running:
     if paddle_x > screen_width - paddle_width:
         paddle_x = screen_width - paddle_width
 
-    # Ball movement
-    ball_x += ball_speed_x
-    ball_y += ball_speed_y
-
-    # Ball collisions with walls
-    if ball_x - ball_radius < 0 or ball_x + ball_radius > screen_width:
-        ball_speed_x *= -1
-    if ball_y - ball_radius < 0:
-        ball_speed_y *= -1
+    # Ball movement, bouncing off walls, paddle and Tetris blocks (grid)
+    move_ball()
 
-    # Ball collision with paddle
+    # Paddle moved into the ball
     if ball_y + ball_radius > paddle_y and ball_y - ball_radius < paddle_y + paddle_height:
         if ball_x > paddle_x and ball_x < paddle_x + paddle_width:
-            ball_speed_y *= -1
+            ball_speed_y = -abs(ball_speed_y)
             ball_y = paddle_y - ball_radius # Prevent ball from going inside paddle
-
+    if timer:
+        timer.mark("collision")
 
     # Tetromino falling logic
     fall_counter += 1
@@ -296,11 +314,15 @@ while running:
         if fall_counter >= fall_speed:
             fall_counter = 0
             test_pos = [current_tetromino_pos[0] + 1, current_tetromino_pos[1]]
-            if is_valid_position(current_tetromino, test_pos, current_tetromino_rotation):
+            if is_valid_position(current_tetromino_type, test_pos, current_tetromino_rotation):
                 current_tetromino_pos[0] += 1
             else: # Hit bottom or other blocks
-                place_tetromino_on_grid(current_tetromino, current_tetromino_pos, current_tetromino_rotation, current_tetromino_type)
+                place_tetromino_on_grid(current_tetromino_type, current_tetromino_pos, current_tetromino_rotation)
+                if timer:
+                    timer.mark("physics")
                 lines = clear_lines()
+                if timer:
+                    timer.mark("lines")
                 score += lines * lines * 100 * level # Score based on lines cleared and level
                 lines_cleared_total += lines
                 if lines_cleared_total >= lines_to_level_up:
@@ -308,70 +330,62 @@ while running:
                     lines_to_level_up += 10 # Increase lines needed to level up
                     fall_speed = max(1, fall_speed - 5) # Increase fall speed, but not below 1
                 current_tetromino_type, next_tetromino_type = spawn_tetromino()
-                if not is_valid_position(current_tetromino, current_tetromino_pos, current_tetromino_rotation): # Game over check
+                if not is_valid_position(current_tetromino_type, current_tetromino_pos, current_tetromino_rotation): # Game over check
                     game_over = True
-
-
-    # Ball collision with Tetris blocks (grid)
-    grid_y_block = (ball_y - ball_radius) // block_size
-    grid_x_block = (ball_x - ball_radius) // block_size
-
-    if 0 <= grid_y_block < grid_height and 0 <= grid_x_block < grid_width:
-        if grid[grid_y_block][grid_x_block] != 0: # Hit a block
-            grid[grid_y_block][grid_x_block] = 0 # Remove the block
-            ball_speed_y *= -1 # Bounce back
-            score += 10 # Score for breaking block
-
+    if timer:
+        timer.mark("physics")
 
     # Game Over condition (ball misses paddle)
     if ball_y + ball_radius > screen_height:
         game_over = True
 
+    return game_over
 
-    # --- Drawing ---
-    screen.fill(black)
 
-    # Draw grid blocks
+def draw_cell(surface, color, x, y, size):
+    pygame.draw.rect(surface, color, (x, y, size, size), 0)
+    pygame.draw.rect(surface, gray, (x, y, size, size), 1) # Grid lines
+
+
+def draw_grid(surface):
     for y in range(grid_height):
+        if not grid_rows[y]:
+            continue
         for x in range(grid_width):
             if grid[y][x] != 0:
-                pygame.draw.rect(screen, tetris_colors[grid[y][x]], (x * block_size, y * block_size, block_size, block_size), 0)
-                pygame.draw.rect(screen, gray, (x * block_size, y * block_size, block_size, block_size), 1) # Grid lines
+                draw_cell(surface, tetris_colors[grid[y][x]], x * block_size, y * block_size, block_size)
 
 
-    # Draw falling tetromino
-    if current_tetromino:
-        rotated_tetromino = current_tetromino
-        for _ in range(current_tetromino_rotation):
-            rotated_tetromino = rotate_tetromino(rotated_tetromino)
-        for y in range(len(rotated_tetromino)):
-            for x in range(len(rotated_tetromino[0])):
-                if rotated_tetromino[y][x]:
-                    block_draw_x = (current_tetromino_pos[1] + x) * block_size
-                    block_draw_y = (current_tetromino_pos[0] + y) * block_size
-                    if block_draw_y >= 0: # Only draw if it's on screen
-                        pygame.draw.rect(screen, tetris_colors[current_tetromino_type], (block_draw_x, block_draw_y, block_size, block_size), 0)
-                        pygame.draw.rect(screen, gray, (block_draw_x, block_draw_y, block_size, block_size), 1) # Grid lines
+def falling_tetromino_cells():
+    # Screen positions of the falling tetromino blocks that are on screen
+    if not current_tetromino:
+        return []
+    rotated_tetromino = tetromino_rotations[current_tetromino_type - 1][current_tetromino_rotation]
+    cells = []
+    for y in range(len(rotated_tetromino)):
+        for x in range(len(rotated_tetromino[0])):
+            if rotated_tetromino[y][x]:
+                block_draw_x = (current_tetromino_pos[1] + x) * block_size
+                block_draw_y = (current_tetromino_pos[0] + y) * block_size
+                if block_draw_y >= 0: # Only draw if it's on screen
+                    cells.append((block_draw_x, block_draw_y))
+    return cells
 
 
-    # Draw paddle
-    pygame.draw.rect(screen, white, (paddle_x, paddle_y, paddle_width, paddle_height))
+def draw_falling_tetromino(surface):
+    for block_draw_x, block_draw_y in falling_tetromino_cells():
+        draw_cell(surface, tetris_colors[current_tetromino_type], block_draw_x, block_draw_y, block_size)
 
-    # Draw ball
-    pygame.draw.circle(screen, white, (int(ball_x), int(ball_y)), ball_radius)
 
-    # Display score and level
-    font = pygame.font.Font(None, 30)
-    score_text = font.render(f"Score: {score}", True, white)
-    level_text = font.render(f"Level: {level}", True, white)
-    next_tetromino_label = font.render("Next:", True, white)
+def draw_paddle(surface):
+    pygame.draw.rect(surface, white, (paddle_x, paddle_y, paddle_width, paddle_height))
 
-    screen.blit(score_text, (10, 10))
-    screen.blit(level_text, (10, 40))
-    screen.blit(next_tetromino_label, (screen_width - 100, 10))
 
+def draw_ball(surface):
+    pygame.draw.circle(surface, white, (int(ball_x), int(ball_y)), ball_radius)
 
-    # Draw next tetromino preview
+
+def draw_next_tetromino(surface):
     if next_tetromino_type is not None:
         next_shape = tetromino_shapes[next_tetromino_type-1]
         start_x = screen_width - 90
@@ -379,11 +393,195 @@ while running:
         for y in range(len(next_shape)):
             for x in range(len(next_shape[0])):
                 if next_shape[y][x]:
-                    pygame.draw.rect(screen, tetris_colors[next_tetromino_type], (start_x + x * block_size * 0.5, start_y + y * block_size * 0.5, block_size * 0.5, block_size * 0.5), 0)
-                    pygame.draw.rect(screen, gray, (start_x + x * block_size * 0.5, start_y + y * block_size * 0.5, block_size * 0.5, block_size * 0.5), 1) # Grid lines
+                    draw_cell(surface, tetris_colors[next_tetromino_type], start_x + x * block_size * 0.5, start_y + y * block_size * 0.5, block_size * 0.5)
 
 
-    pygame.display.flip()
-    clock.tick(60)
+# --- Text cache, a label is only rendered again when its text changes ---
+hud_font = None
+label_cache = {}
+
+def render_label(slot, text):
+    global hud_font
+    if hud_font is None:
+        hud_font = pygame.font.Font(None, 30)
+    cached = label_cache.get(slot)
+    if cached is None or cached[0] != text:
+        cached = label_cache[slot] = (text, hud_font.render(text, True, white))
+    return cached[1]
+
+
+def hud_labels():
+    return [
+        ("score", render_label("score", f"Score: {score}"), (10, 10)),
+        ("level", render_label("level", f"Level: {level}"), (10, 40)),
+        ("next", render_label("next", "Next:"), (screen_width - 100, 10)),
+    ]
+
+
+def draw_game(surface):
+    surface.fill(black)
+
+    # Draw grid blocks
+    draw_grid(surface)
+
+    # Draw falling tetromino
+    draw_falling_tetromino(surface)
+
+    # Draw paddle
+    draw_paddle(surface)
+
+    # Draw ball
+    draw_ball(surface)
+
+    # Display score and level
+    for _, label, label_pos in hud_labels():
+        surface.blit(label, label_pos)
+
+    # Draw next tetromino preview
+    draw_next_tetromino(surface)
+
+
+# --- Cached rendering ---
+# The settled grid lives on static_layer, rebuilt only when grid_version moves. Everything drawn on
+# top of it is a sprite with a state and a bounding rect; only sprites whose state changed, plus
+# whatever overlaps them, get repainted, and only those rects need pushing to the display.
+static_layer = None
+static_version = None
+last_sprites = {}
+
+def game_sprites():
+    # name -> (state, rect, draw function), in the same stacking order as draw_game
+    sprites = {}
+    cells = falling_tetromino_cells()
+    piece_rect = pygame.Rect(cells[0], (block_size, block_size)).unionall([pygame.Rect(c, (block_size, block_size)) for c in cells[1:]]) if cells else pygame.Rect(0, 0, 0, 0)
+    sprites["tetromino"] = ((current_tetromino_type, tuple(cells)), piece_rect, draw_falling_tetromino)
+    sprites["paddle"] = (paddle_x, pygame.Rect(paddle_x, paddle_y, paddle_width, paddle_height), draw_paddle)
+    ball_pos = (int(ball_x), int(ball_y))
+    ball_rect = pygame.Rect(0, 0, 2 * ball_radius + 2, 2 * ball_radius + 2)
+    ball_rect.center = ball_pos
+    sprites["ball"] = (ball_pos, ball_rect, draw_ball)
+    for slot, label, label_pos in hud_labels():
+        sprites[slot] = (label, label.get_rect(topleft=label_pos), lambda surface, label=label, label_pos=label_pos: surface.blit(label, label_pos))
+    preview_rect = pygame.Rect(screen_width - 90, 40, 4 * block_size // 2, 2 * block_size // 2)
+    sprites["preview"] = (next_tetromino_type, preview_rect, draw_next_tetromino)
+    return sprites
+
+
+def draw_game_cached(surface):
+    # Same picture as draw_game, but redraws only what changed and returns the dirty rects
+    global static_layer, static_version, last_sprites
+    sprites = game_sprites()
+    if static_layer is None or static_version != grid_version or static_layer.get_size() != surface.get_size():
+        static_layer = pygame.Surface(surface.get_size())
+        static_layer.fill(black)
+        draw_grid(static_layer)
+        static_version = grid_version
+        dirty = [surface.get_rect()]
+    else:
+        dirty = []
+        repainted = set()
+        for name, (state, rect, _) in sprites.items():
+            last = last_sprites.get(name)
+            if last is None or last[0] != state:
+                repainted.add(name)
+                dirty.append(rect)
+                if last is not None:
+                    dirty.append(last[1])
+        # Sprites touching a repainted area are repainted whole, so keep growing until nothing new overlaps
+        grown = True
+        while grown:
+            grown = False
+            for name, (_, rect, _) in sprites.items():
+                if name not in repainted and rect.collidelist(dirty) != -1:
+                    repainted.add(name)
+                    dirty.append(rect)
+                    grown = True
+
+    for rect in dirty:
+        surface.blit(static_layer, rect, rect)
+    for _, rect, draw in sprites.values():
+        if rect.collidelist(dirty) != -1:
+            draw(surface)
+    last_sprites = sprites
+    return dirty
+
+
+def main(render_mode="cached", profile_path=None, autoplay=False):
+    # render_mode "cached" pushes only dirty rects, "full" redraws and flips the whole screen every frame
+    # autoplay lets the placement-search bot pick each piece's rotation and column
+    global game_over, timer
+    init_screen()
+    if autoplay:
+        try:
+            from . import bot
+        except ImportError:
+            # Run as a script, outside the package
+            import bot
+    # Game logic runs in fixed 1 / fps ticks however long frames actually take, input waits for the next tick
+    ticks = FixedStep(fps)
+    frame_seconds = 1 / fps
+    pending_events = []
+    if profile_path:
+        from arena.frametime import FrameTimer
+        timer = FrameTimer()
+
+    show_intro = True
+    running = True
+    while running:
+
+        if show_intro:
+            if game_intro():
+                show_intro = False
+                reset_game()
+            else:
+                running = False
+                continue # Skip game loop if intro cancelled
+
+
+        if game_over:
+            if game_over_screen():
+                reset_game()
+                game_over = False # Reset game_over flag to start new game directly
+            else:
+                running = False
+                continue # Skip game loop if game over screen cancelled
+
+
+        if timer:
+            timer.start()
+        events = pygame.event.get()
+        if any(event.type == pygame.QUIT for event in events):
+            running = False
+
+        pending_events += events
+        for _ in range(ticks.steps(frame_seconds)):
+            if autoplay:
+                bot.drive(sys.modules[__name__])
+            update_game(pending_events)
+            pending_events = []
+        if render_mode == "cached":
+            dirty = draw_game_cached(screen)
+            if timer:
+                timer.mark("draw")
+                dirty.append(timer.draw(screen))
+            pygame.display.update(dirty)
+        else:
+            draw_game(screen)
+            if timer:
+                timer.mark("draw")
+                timer.draw(screen)
+            pygame.display.flip()
+        if timer:
+            timer.mark("flip")
+
+        frame_seconds = clock.tick(fps) / 1000
+
+    if timer:
+        timer.dump(profile_path)
+    pygame.quit()
+
 
-pygame.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    # --profile FILE: frame phase timings overlay, written to FILE at exit (.json Chrome trace, else CSV), run as python -m
+    profile_path = sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None
+    main("full" if "--full-redraw" in sys.argv else "cached", profile_path, "--bot" in sys.argv)
@@ -1,6 +1,9 @@
 """
 Create a game using pygame, it should combine elements of Tetris and Arkanoid.
 """
+import argparse
+import hashlib
+import json
 import pygame
 import random
 import logging
@@ -15,8 +18,22 @@ RED = (255, 0, 0)
 
 # Screen setup
 SIZE = (400, 600)
-screen = pygame.display.set_mode(SIZE)
-pygame.display.set_caption("Tetris Breaker v9")
+SCREEN_RECT = pygame.Rect((0, 0), SIZE)
+screen = None
+
+
+def init_screen(headless=False):
+    global screen
+    if headless:
+        screen = pygame.Surface(SIZE)
+    else:
+        screen = pygame.display.set_mode(SIZE)
+        pygame.display.set_caption("Tetris Breaker v9")
+    return screen
+
+# Tetromino cell size and how many cells make a full row
+CELL = 25
+ROW_CELLS = SIZE[0] // CELL
 
 # Tetris tetrominoes
 TETROMINOES = {
@@ -36,20 +53,18 @@ class Tetromino:
         self.speed = -0.5
         self.settled = False
 
-    def update(self, settled_tetrominoes):
+    def update(self, board):
         if not self.settled:
             for rect in self.rects:
                 rect.y += self.speed
             # Check current and future collisions
-            for tet in settled_tetrominoes:
-                for s_rect in tet.rects:
-                    for rect in self.rects:
-                        if rect.colliderect(s_rect) or rect.move(0, self.speed).colliderect(s_rect):
-                            self.settled = True
-                            for r in self.rects:
-                                r.bottom = s_rect.top
-                            logging.debug(f"Settled due to collision at {s_rect.top}")
-                            return
+            s_rect = board.collision(self.rects, self.speed)
+            if s_rect is not None:
+                self.settled = True
+                for r in self.rects:
+                    r.bottom = s_rect.top
+                logging.debug(f"Settled due to collision at {s_rect.top}")
+                return
             if any(rect.top <= 0 for rect in self.rects):
                 self.settled = True
                 for rect in self.rects:
@@ -66,7 +81,7 @@ class Tetromino:
             move_x = target_x - self_center
             for rect in self.rects:
                 rect.x += move_x
-                rect.clamp_ip(screen.get_rect())
+                rect.clamp_ip(SCREEN_RECT)
 
     def rotate(self):
         if self.settled:
@@ -81,14 +96,14 @@ class Tetromino:
             new_dy = dx
             new_rect = pygame.Rect(0, 0, 25, 25)
             new_rect.center = (cx + new_dx, cy + new_dy)
-            new_rect.clamp_ip(screen.get_rect())
+            new_rect.clamp_ip(SCREEN_RECT)
             new_rects.append(new_rect)
         self.rects = new_rects
 
-    def drop(self, settled_tetrominoes):
+    def drop(self, board):
         if not self.settled:
             for _ in range(1000):
-                self.update(settled_tetrominoes)
+                self.update(board)
                 if self.settled:
                     break
             else:
@@ -99,14 +114,104 @@ class Tetromino:
         for rect in self.rects:
             pygame.draw.rect(screen, WHITE, rect)
 
+class Board:
+    """
+    Cell-indexed occupancy of the settled tetrominoes.
+
+    Settled rects never move, so each one is bucketed by the cell of its top-left corner and
+    every row keeps the rects lying on it. Collision queries only look at the few buckets a rect
+    can overlap and full rows are noticed when a piece settles, instead of rescanning the board.
+    """
+
+    def __init__(self, row_cells=ROW_CELLS):
+        self.row_cells = row_cells
+        self.cells = {}  # (col, row) -> [(tet, rect), ...]
+        self.rows = {}  # rect.y -> [(tet, rect), ...]
+        self.order = {}  # tet -> settle order, the order the old per-frame scans visited them in
+        self.settled = 0
+        self.full = set()
+
+    def add(self, tet):
+        self.order[tet] = self.settled
+        self.settled += 1
+        for rect in tet.rects:
+            entry = (tet, rect)
+            self.cells.setdefault((rect.x // CELL, rect.y // CELL), []).append(entry)
+            row = self.rows.setdefault(rect.y, [])
+            row.append(entry)
+            if len(row) >= self.row_cells:
+                self.full.add(rect.y)
+
+    def remove(self, tet, rect):
+        """Take one rect off the board and out of its tetromino, True if the tetromino is now empty."""
+        self._discard(self.cells, (rect.x // CELL, rect.y // CELL), rect)
+        self._discard(self.rows, rect.y, rect)
+        if len(self.rows.get(rect.y, ())) < self.row_cells:
+            self.full.discard(rect.y)
+        del tet.rects[self._index(tet, rect)]
+        if not tet.rects:
+            del self.order[tet]
+            return True
+        return False
+
+    def occupied(self, col, row):
+        return (col, row) in self.cells
+
+    def owner(self, col, row):
+        entries = self.cells.get((col, row))
+        return entries[0][0] if entries else None
+
+    def row_count(self, y):
+        return len(self.rows.get(y, ()))
+
+    def lowest(self):
+        """Bottom edge of the lowest settled rect, or None on an empty board."""
+        return max(self.rows) + CELL if self.rows else None
+
+    def near(self, rect, margin=1):
+        """Settled (tet, rect) pairs in the buckets that a rect, grown by margin pixels, can overlap."""
+        for col in range((rect.left - margin - CELL + 1) // CELL, (rect.right + margin) // CELL + 1):
+            for row in range((rect.top - margin - CELL + 1) // CELL, (rect.bottom + margin) // CELL + 1):
+                yield from self.cells.get((col, row), ())
+
+    def collision(self, rects, speed):
+        """First settled rect that any of rects overlaps now or after moving by speed."""
+        if not self.cells:
+            return None
+        area = rects[0].unionall(rects[1:])
+        hits = [
+            (tet, s_rect)
+            for tet, s_rect in self.near(area, abs(int(speed)) + 1)
+            if any(rect.colliderect(s_rect) or rect.move(0, speed).colliderect(s_rect) for rect in rects)
+        ]
+        if not hits:
+            return None
+        return min(hits, key=lambda hit: (self.order[hit[0]], self._index(*hit)))[1]
+
     def hit(self, ball_rect):
-        if not self.settled:
-            return False
-        for i, rect in enumerate(self.rects[:]):
+        """Per tetromino, the first of its rects the ball overlaps, in settle order."""
+        first = {}
+        for tet, rect in self.near(ball_rect):
             if ball_rect.colliderect(rect):
-                del self.rects[i]
-                return True
-        return False
+                i = self._index(tet, rect)
+                if tet not in first or i < first[tet][0]:
+                    first[tet] = (i, rect)
+        return [(tet, first[tet][1]) for tet in sorted(first, key=self.order.get)]
+
+    def clear_row(self, y):
+        """Remove every rect on row y, returning the tetrominoes left empty."""
+        return [tet for tet, rect in list(self.rows.get(y, ())) if self.remove(tet, rect)]
+
+    @staticmethod
+    def _index(tet, rect):
+        return next(i for i, r in enumerate(tet.rects) if r is rect)
+
+    @staticmethod
+    def _discard(index, key, rect):
+        entries = index[key]
+        entries[:] = [e for e in entries if e[1] is not rect]
+        if not entries:
+            del index[key]
 
 class Ball:
     def __init__(self):
@@ -140,106 +245,150 @@ class Paddle:
             self.rect.x -= self.speed
         if keys[pygame.K_RIGHT]:
             self.rect.x += self.speed
-        mouse_dx = mouse_pos[0] - self.rect.centerx
-        if abs(mouse_dx) > 5:
-            self.rect.centerx = mouse_pos[0]
-        self.rect.clamp_ip(screen.get_rect())
+        if mouse_pos is not None:
+            mouse_dx = mouse_pos[0] - self.rect.centerx
+            if abs(mouse_dx) > 5:
+                self.rect.centerx = mouse_pos[0]
+        self.rect.clamp_ip(SCREEN_RECT)
 
     def draw(self, screen):
         pygame.draw.rect(screen, WHITE, self.rect)
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False):
         pygame.init()
-        pygame.mixer.init()
+        self.headless = headless
         self.clock = pygame.time.Clock()
         self.tetrominoes = [Tetromino(175, 525, random.choice(list(TETROMINOES.keys())))]
+        self.board = Board()
         self.ball = Ball()
         self.paddle = Paddle()
         self.score = 0
+        self.lines = 0
         self.font = pygame.font.Font(None, 36)
         self.game_over = False
         self.last_click = 0
-        self.bounce_sound = pygame.mixer.Sound(pygame.mixer.Sound(buffer=b'\x00\x00\x80\x00\x00\x00\x80\x00' * 10))
-        self.break_sound = pygame.mixer.Sound(pygame.mixer.Sound(buffer=b'\x00\xFF\x00\x80' * 5))
-        self.bounce_sound.set_volume(0.5)
-        self.break_sound.set_volume(0.5)
+        # arena.frametime.FrameTimer when profiling, None otherwise
+        self.timer = None
+        # No audio device in headless runs, so sounds are skipped there
+        self.bounce_sound = self.break_sound = None
+        if not headless:
+            pygame.mixer.init()
+            self.bounce_sound = pygame.mixer.Sound(pygame.mixer.Sound(buffer=b'\x00\x00\x80\x00\x00\x00\x80\x00' * 10))
+            self.break_sound = pygame.mixer.Sound(pygame.mixer.Sound(buffer=b'\x00\xFF\x00\x80' * 5))
+            self.bounce_sound.set_volume(0.5)
+            self.break_sound.set_volume(0.5)
+
+    def play(self, sound):
+        if sound is not None:
+            pygame.mixer.Sound.play(sound)
 
     def handle_events(self):
-        current_time = pygame.time.get_ticks()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
+        events = pygame.event.get()
+        if any(event.type == pygame.QUIT for event in events):
+            return False
+        # Keep this frame's input around for update() and the session log
+        self.keys = pygame.key.get_pressed()
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.current_time = pygame.time.get_ticks()
+        self.clicks = [event.button for event in events if event.type == pygame.MOUSEBUTTONDOWN]
+        self.handle_input(events, self.keys, self.current_time)
+        return True
+
+    def handle_input(self, events, keys, current_time):
+        for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN and current_time - self.last_click > 200:
                 if event.button == 1:
-                    self.tetrominoes[-1].drop([t for t in self.tetrominoes if t.settled])
+                    self.drop()
                     self.last_click = current_time
                 elif event.button == 3:
                     self.tetrominoes[-1].rotate()
                     self.last_click = current_time
-        keys = pygame.key.get_pressed()
         if keys[pygame.K_SPACE]:
             self.tetrominoes[-1].rotate()
         if keys[pygame.K_UP]:
-            self.tetrominoes[-1].drop([t for t in self.tetrominoes if t.settled])
-        return True
+            self.drop()
 
-    def update(self):
+    def drop(self):
+        tet = self.tetrominoes[-1]
+        if not tet.settled:
+            tet.drop(self.board)
+            self.board.add(tet)
+
+    def update(self, keys=None, mouse_pos=None):
         if self.game_over:
             return False
 
-        keys = pygame.key.get_pressed()
-        mouse_pos = pygame.mouse.get_pos()
+        if keys is None:
+            keys = pygame.key.get_pressed()
+            mouse_pos = pygame.mouse.get_pos()
+        timer = self.timer
         self.paddle.update(keys, mouse_pos)
         self.ball.update()
+        if timer:
+            timer.mark("physics")
 
         if self.ball.rect.colliderect(self.paddle.rect) and self.ball.speed_y > 0:
             self.ball.speed_y = -abs(self.ball.speed_y)
             hit_pos = (self.ball.rect.centerx - self.paddle.rect.centerx) / 50
             self.ball.speed_x = hit_pos * 3
-            pygame.mixer.Sound.play(self.bounce_sound)
+            self.play(self.bounce_sound)
+        if timer:
+            timer.mark("collision")
 
         if self.ball.rect.top > SIZE[1]:
             self.game_over = True
             return False
 
         # Update tetrominoes
-        settled_tets = [t for t in self.tetrominoes if t.settled]
         active_tet = self.tetrominoes[-1]
+        was_settled = active_tet.settled
         active_tet.align_to_paddle(self.paddle.rect.x)  # Align x first
-        active_tet.update(settled_tets)  # Then move y
+        active_tet.update(self.board)  # Then move y
         if active_tet.settled:
             self.tetrominoes.append(Tetromino(175, 525, random.choice(list(TETROMINOES.keys()))))
+        if timer:
+            timer.mark("physics")
 
         # Ball hits settled tetrominoes
-        for tet in settled_tets:
-            if tet.hit(self.ball.rect):
-                self.score += 10
-                self.ball.speed_y *= -1
-                pygame.mixer.Sound.play(self.break_sound)
-                if not tet.rects:
-                    self.tetrominoes.remove(tet)
+        for tet, rect in self.board.hit(self.ball.rect):
+            self.score += 10
+            self.ball.speed_y *= -1
+            self.play(self.break_sound)
+            if self.board.remove(tet, rect):
+                self.tetrominoes.remove(tet)
+        if timer:
+            timer.mark("collision")
 
         # Line clearing
-        y_levels = {}
-        for tet in settled_tets:
-            for rect in tet.rects:
-                y = rect.y
-                y_levels[y] = y_levels.get(y, 0) + 1
-        for y, count in y_levels.items():
-            if count >= 16:
-                self.score += 100
-                for tet in settled_tets[:]:
-                    tet.rects = [r for r in tet.rects if r.y != y]
-                    if not tet.rects:
-                        self.tetrominoes.remove(tet)
-
-        if any(any(r.bottom >= 550 for r in tet.rects) for tet in settled_tets):
+        for y in list(self.board.full):
+            self.score += 100
+            self.lines += 1
+            for tet in self.board.clear_row(y):
+                self.tetrominoes.remove(tet)
+        if timer:
+            timer.mark("lines")
+
+        lowest = self.board.lowest()
+        if lowest is not None and lowest >= 550:
             self.game_over = True
             return False
 
+        # A piece that settled this frame joins the board from the next frame on
+        if active_tet.settled and not was_settled:
+            self.board.add(active_tet)
+
         return True
 
+    def state_hash(self):
+        state = (
+            self.score, self.game_over, self.last_click,
+            [[tuple(r) for r in tet.rects] for tet in self.tetrominoes],
+            tuple(self.ball.rect), self.ball.speed_x, self.ball.speed_y,
+            tuple(self.paddle.rect),
+        )
+        return hashlib.sha1(repr(state).encode()).hexdigest()
+
     def draw(self, screen):
         screen.fill(BLACK)
         for tet in self.tetrominoes:
@@ -252,17 +401,153 @@ class Game:
             game_over_text = self.font.render(f"Game Over! Score: {self.score}", True, WHITE)
             screen.blit(game_over_text, (SIZE[0]//2 - 100, SIZE[1]//2))
 
-def main():
+# Keys the game reads, a frame stores the held ones as a bitmask over this tuple
+RECORDED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_UP)
+
+class ReplayMismatch(Exception):
+    pass
+
+class HeldKeys:
+    def __init__(self, bits):
+        self.pressed = {key for i, key in enumerate(RECORDED_KEYS) if bits >> i & 1}
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class SessionLog:
+    """
+    Append-only JSON lines session log, written as the game runs.
+
+    A session is a header line with the RNG seed, one line per frame with
+    [ticks, held key bits, mouse position or null if unchanged, clicked buttons, last_click]
+    and a footer with the final score and state hash. Several sessions can follow each other in one file.
+    """
+
+    def __init__(self, path, seed):
+        self.file = open(path, "a")
+        self.mouse_pos = None
+        self.frames = 0
+        self.write({"seed": seed})
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def frame(self, game):
+        key_bits = sum(1 << i for i, key in enumerate(RECORDED_KEYS) if game.keys[key])
+        mouse = list(game.mouse_pos) if game.mouse_pos != self.mouse_pos else None
+        self.mouse_pos = game.mouse_pos
+        self.write([game.current_time, key_bits, mouse, game.clicks, game.last_click])
+        self.frames += 1
+
+    def close(self, game):
+        self.write({"frames": self.frames, "score": game.score, "hash": game.state_hash()})
+        self.file.close()
+
+def read_session(path, session=0):
+    """Header, a lazy iterator over frame records and then the footer (None if the session was cut short)."""
+    with open(path) as f:
+        lines = (json.loads(line) for line in f if line.strip())
+        for record in lines:
+            if isinstance(record, dict) and "seed" in record:
+                if session == 0:
+                    yield record
+                    break
+                session -= 1
+        else:
+            raise ValueError(f"{path} has no such session")
+        for record in lines:
+            if isinstance(record, dict):
+                yield record if "score" in record else None
+                return
+            yield record
+        yield None
+
+def replay(path, session=0, fast=True, verify=True):
+    """Re-run a recorded session, uncapped without drawing when fast, else on screen at 60 fps."""
+    records = read_session(path, session)
+    random.seed(next(records)["seed"])
+    game = Game(headless=fast)
+    if not fast:
+        init_screen()
+    mouse_pos = None
+    footer = None
+    played = 0
+    for frame, record in enumerate(records):
+        if not isinstance(record, list):
+            footer = record
+            break
+        played += 1
+        current_time, key_bits, mouse, clicks, last_click = record
+        if mouse is not None:
+            mouse_pos = tuple(mouse)
+        keys = HeldKeys(key_bits)
+        events = [pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button) for button in clicks]
+        game.handle_input(events, keys, current_time)
+        game.update(keys, mouse_pos)
+        if verify and game.last_click != last_click:
+            raise ReplayMismatch(f"Frame {frame}: last_click {game.last_click} != recorded {last_click}")
+        if not fast:
+            pygame.event.pump()
+            game.draw(screen)
+            pygame.display.flip()
+            game.clock.tick(60)
+    if verify and footer is not None:
+        if played != footer["frames"]:
+            raise ReplayMismatch(f"Replayed {played} frames, the session recorded {footer['frames']}")
+        if (game.score, game.state_hash()) != (footer["score"], footer["hash"]):
+            raise ReplayMismatch(f"Final state differs: score {game.score} != recorded {footer['score']}")
+    return game
+
+def main(record_path=None, seed=None, profile_path=None):
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    random.seed(seed)
     game = Game()
+    init_screen()
+    log = SessionLog(record_path, seed) if record_path else None
+    if profile_path:
+        from arena.frametime import FrameTimer
+        game.timer = FrameTimer()
+    timer = game.timer
     running = True
-    while running:
-        running = game.handle_events()
-        if not game.update():
-            running = False if game.game_over else True
-        game.draw(screen)
-        pygame.display.flip()
-        game.clock.tick(60)
-    pygame.quit()
+    try:
+        while running:
+            if timer:
+                timer.start()
+            if not game.handle_events():
+                break
+            if timer:
+                timer.mark("events")
+            running = game.update(game.keys, game.mouse_pos)
+            if log is not None:
+                log.frame(game)
+            game.draw(screen)
+            if timer:
+                timer.mark("draw")
+                timer.draw(screen)
+            pygame.display.flip()
+            if timer:
+                timer.mark("flip")
+            game.clock.tick(60)
+    finally:
+        # Also on Ctrl-C or a crash, so the log keeps its footer and the timings get written
+        if log is not None:
+            log.close(game)
+        if timer:
+            timer.dump(profile_path)
+        pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tetris Breaker")
+    parser.add_argument("--record", metavar="LOG", help="append this session to a JSON lines log")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--replay", metavar="LOG", help="replay a recorded session instead of playing")
+    parser.add_argument("--session", type=int, default=0, help="which session in the log to replay")
+    parser.add_argument("--realtime", action="store_true", help="show the replay at 60 fps instead of fast-forwarding")
+    parser.add_argument("--profile", metavar="FILE", help="show frame phase timings and write them to FILE at exit (.json Chrome trace, else CSV), run as python -m grok_3.tetranoid")
+    args = parser.parse_args()
+    if args.replay:
+        game = replay(args.replay, args.session, fast=not args.realtime)
+        print(f"Replay OK, score {game.score}, state {game.state_hash()}")
+    else:
+        main(args.record, args.seed, args.profile)
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Content-addressed on-disk cache of LLM completions shared by the playground scripts.
+
+Re-running a notebook or benchmark with the same prompts replays the stored answers, streamed ones chunk by
+chunk, without spending tokens or model time. LLM_CACHE moves the SQLite file, LLM_CACHE_BYPASS=1 skips
+lookups (fresh answers are still stored).
+
+    cache = ResponseCache()
+    response = await ollama_chat(cache, client, "llama3.1:8b", messages, digest=digest, options={"temperature": 0})
+"""
+from llm_cache.clients import anthropic_message, ollama_chat
+from llm_cache.store import DEFAULT_MAX_BYTES, DEFAULT_PATH, ResponseCache
@@ -0,0 +1,77 @@
+"""
+Cached drop-ins for the provider calls the playground makes, returning the providers' own response types.
+
+Streams are stored only once they finish, an abandoned or failed stream leaves nothing behind.
+"""
+
+
+async def ollama_chat(cache, client, model, messages, digest=None, stream=False, **kwargs):
+    """
+    client.chat(model=model, messages=messages, stream=stream, **kwargs) through the cache.
+
+    Pass the model's digest when it is known, so that pulling new weights under the same name misses.
+    Like the client, with stream=True the awaited result is an async iterator of ChatResponse chunks.
+    """
+    from ollama import ChatResponse
+
+    # A stream is stored as its chunks, a plain response as one, so the two are cached apart
+    key = cache.key("ollama", model, messages, digest=digest, stream=stream or None, **kwargs)
+    chunks = cache.get(key)
+    if stream:
+        if chunks is not None:
+            return _replay(ChatResponse, chunks)
+        return _record_ollama(cache, key, model, await client.chat(model=model, messages=messages, stream=True, **kwargs))
+    if chunks is not None:
+        return ChatResponse(**chunks[0])
+    response = await client.chat(model=model, messages=messages, **kwargs)
+    cache.put(key, [response], "ollama", model)
+    return response
+
+
+async def _replay(cls, chunks):
+    for chunk in chunks:
+        yield cls(**chunk)
+
+
+async def _record_ollama(cache, key, model, stream):
+    chunks = []
+    try:
+        async for part in stream:
+            chunks.append(part)
+            yield part
+    finally:
+        await stream.aclose()
+    if chunks and chunks[-1].done:
+        cache.put(key, chunks, "ollama", model)
+
+
+def anthropic_message(cache, client, **params):
+    """
+    client.messages.create(**params) through the cache, a Message, or with stream=True an iterator of stream events.
+    """
+    import pydantic
+    from anthropic.types import Message, RawMessageStreamEvent
+
+    options = {k: v for k, v in params.items() if k not in ("model", "messages")}
+    key = cache.key("anthropic", params["model"], params["messages"], **options)
+    chunks = cache.get(key)
+    if params.get("stream"):
+        if chunks is not None:
+            event = pydantic.TypeAdapter(RawMessageStreamEvent)
+            return (event.validate_python(chunk) for chunk in chunks)
+        return _record_anthropic(cache, key, params["model"], client.messages.create(**params))
+    if chunks is not None:
+        return Message.model_validate(chunks[0])
+    message = client.messages.create(**params)
+    cache.put(key, [message], "anthropic", params["model"])
+    return message
+
+
+def _record_anthropic(cache, key, model, stream):
+    events = []
+    with stream:
+        for event in stream:
+            events.append(event)
+            yield event
+    if events and events[-1].type == "message_stop":
+        cache.put(key, events, "anthropic", model)
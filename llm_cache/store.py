@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH = Path(os.environ.get("LLM_CACHE", Path.home() / ".cache" / "play-with-ai" / "llm.sqlite3"))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _jsonable(value):
+    # Pydantic messages (ollama.Message, anthropic params) hash like the dicts they stand for
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+class ResponseCache:
+    """
+    Completions stored in SQLite under a hash of everything that decides them.
+
+    An entry is the list of chunks the provider sent, one for a plain response, every event for a streamed one,
+    so a hit replays the stream chunk by chunk. Least recently used entries are evicted past max_bytes.
+    bypass skips lookups but still stores fresh answers, to refresh the cache.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, bypass=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.bypass = os.environ.get("LLM_CACHE_BYPASS", "") not in ("", "0") if bypass is None else bypass
+        self.hits = self.misses = self.stores = self.evictions = 0
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the event loop and worker threads, the lock keeps one statement at a time
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, provider TEXT, model TEXT, created REAL, used REAL, size INTEGER, chunks BLOB)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key(provider, model, messages, digest=None, **options):
+        """Hash of the provider, model name and digest, messages and every generation option."""
+        request = {"provider": provider, "model": model, "digest": digest, "messages": messages,
+                   "options": {k: v for k, v in options.items() if v is not None}}
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=_jsonable)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key):
+        """The stored chunks, or None on a miss or when bypassing."""
+        if self.bypass:
+            self.misses += 1
+            return None
+        with self.lock:
+            row = self.db.execute("SELECT chunks FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.db.execute("UPDATE responses SET used = ? WHERE key = ?", (time.time(), key))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, chunks, provider=None, model=None):
+        blob = json.dumps(chunks, separators=(",", ":"), default=_jsonable).encode()
+        now = time.time()
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (key, provider, model, now, now, len(blob), blob))
+            self.size += len(blob) - (old[0] if old else 0)
+            self.stores += 1
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Oldest first until under the bound, in one pass over the used index
+        freed = []
+        excess = self.size - self.max_bytes
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY used").fetchall():
+            if excess <= 0:
+                break
+            freed.append((key,))
+            excess -= size
+            self.size -= size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", freed)
+        self.evictions += len(freed)
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"entries": entries, "bytes": self.size, "hits": self.hits, "misses": self.misses,
+                "stores": self.stores, "evictions": self.evictions, "bypass": self.bypass}
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,15 @@
+"""
+Section-level BM25 retrieval over the context dumps in llm_ctx/, so prompts carry the relevant sections of
+llm_ctx/fasthtml.md instead of all 134 KB of it.
+
+The index is stored as JSON (LLM_INDEX moves it) and a file is re-chunked only when its hash changes, new files
+dropped into llm_ctx/ are indexed on the next call.
+
+    index = ContextIndex()
+    context, report = pack(index, "how do I stream server-sent events?", budget=3000)
+    print(describe(report))   # 5 chunks, 2224 of 33400 tokens, saved 31176 (93%)
+
+    python -m llm_index "server-sent events" --budget 3000
+"""
+from llm_index.index import DEFAULT_DIR, DEFAULT_PATH, ContextIndex, chunk, estimate_tokens
+from llm_index.pack import describe, pack
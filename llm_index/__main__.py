@@ -0,0 +1,31 @@
+import argparse
+import json
+import sys
+
+from llm_index import DEFAULT_DIR, DEFAULT_PATH, ContextIndex, describe, pack
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the llm_ctx sections most relevant to a query")
+    parser.add_argument("query", nargs="?", help="omit to only refresh the index")
+    parser.add_argument("--budget", type=int, default=4000, help="tokens of context at most")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="directory of context files")
+    parser.add_argument("--index", default=DEFAULT_PATH, help="JSON file the index is kept in")
+    parser.add_argument("--report", action="store_true", help="print the report as JSON instead of the context")
+    args = parser.parse_args()
+
+    index = ContextIndex(args.dir, args.index)
+    changes = index.refresh()
+    for kind, names in changes.items():
+        for name in names:
+            print(f"{kind} {name}", file=sys.stderr)
+    if not args.query:
+        return
+    context, report = pack(index, args.query, args.budget)
+    print(json.dumps(report, indent=1) if args.report else context)
+    # On stderr, so the context can be piped into a prompt
+    print(describe(report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
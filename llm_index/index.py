@@ -0,0 +1,190 @@
+import hashlib
+import html
+import json
+import math
+import os
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DIR = ROOT / "llm_ctx"
+DEFAULT_PATH = Path(os.environ.get("LLM_INDEX", Path.home() / ".cache" / "play-with-ai" / "llm_ctx_index.json"))
+# Bump when chunking or tokenizing changes, an index built differently is rebuilt
+VERSION = 1
+SUFFIXES = {".md", ".txt", ".rst"}
+MAX_CHUNK_TOKENS = 600
+
+DOC_TAG = re.compile(r"""(<doc\b[^>]*>|</doc>)""")
+TITLE = re.compile(r"""\btitle=(["'])(.*?)\1""")
+WRAPPER_TAG = re.compile(r"</?(?:project|docs|api|examples|optional)\b[^>]*>")
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = set("a an and are as at be by for from has have how i if in into is it its of on or that the their "
+                "then there these this to was what when where which while with you your".split())
+
+
+def estimate_tokens(text):
+    # About 4 characters a token, the same rule of thumb _anthropic.batch paces by
+    return len(text) // 4 + 1
+
+
+def terms(text):
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _sections(text):
+    """(doc title, text) pieces, split at the <doc title=...> tags the llms.txt style dumps use."""
+    doc = None
+    for part in DOC_TAG.split(text):
+        if part.startswith("<doc"):
+            match = TITLE.search(part)
+            doc = html.unescape(match.group(2)) if match else None
+        elif part == "</doc>":
+            doc = None
+        else:
+            part = WRAPPER_TAG.sub("", part)
+            if part.strip():
+                yield doc, part
+
+
+def _split(lines, max_tokens):
+    # At blank lines outside code blocks, a single longer paragraph at line ends
+    pieces, piece, fenced = [], [], False
+    for line in lines:
+        if line.lstrip().startswith("```"):
+            fenced = not fenced
+        piece.append(line)
+        size = estimate_tokens("\n".join(piece))
+        if size >= max_tokens and (not line.strip() and not fenced or size >= 2 * max_tokens):
+            pieces.append(piece)
+            piece = []
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def chunk(text, max_tokens=MAX_CHUNK_TOKENS):
+    """[{"title", "text"}], one per markdown section, sections longer than max_tokens split at paragraphs."""
+    chunks = []
+    for doc, section in _sections(text):
+        heading, lines, fenced = None, [], False
+
+        def close():
+            body = "\n".join(lines).strip()
+            if body:
+                title = " > ".join(part for part in (doc, heading) if part) or "(untitled)"
+                pieces = _split(body.splitlines(), max_tokens)
+                for i, piece in enumerate(pieces):
+                    suffix = f" ({i + 1}/{len(pieces)})" if len(pieces) > 1 else ""
+                    chunks.append({"title": title + suffix, "text": "\n".join(piece).strip()})
+
+        for line in section.splitlines():
+            if line.lstrip().startswith("```"):
+                fenced = not fenced
+            match = None if fenced else HEADING.match(line)
+            if match:
+                close()
+                heading, lines = match.group(2), []
+            lines.append(line)
+        close()
+    return chunks
+
+
+def file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class ContextIndex:
+    """
+    BM25 over the sections of every text file in a directory, persisted as JSON.
+
+    refresh() hashes each file and re-chunks only new or changed ones, dropping deleted ones, so files added to
+    llm_ctx/ are picked up on the next search without touching the rest.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, path=DEFAULT_PATH, k1=1.5, b=0.75, max_tokens=MAX_CHUNK_TOKENS):
+        self.directory = Path(directory)
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.max_tokens = max_tokens
+        self.files = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                stored = json.load(f)
+            if stored.get("version") == VERSION and stored.get("max_tokens") == max_tokens:
+                self.files = stored["files"]
+        self.postings = None
+
+    def sources(self):
+        return sorted(p for p in self.directory.rglob("*") if p.is_file() and p.suffix in SUFFIXES)
+
+    def refresh(self):
+        """Bring the index in line with the directory. Returns the names added, changed and removed."""
+        found = {str(p.relative_to(self.directory)): p for p in self.sources()}
+        changes = {"added": [], "changed": [], "removed": sorted(set(self.files) - set(found))}
+        for name in changes["removed"]:
+            del self.files[name]
+        for name, path in found.items():
+            digest = file_hash(path)
+            entry = self.files.get(name)
+            if entry and entry["sha256"] == digest:
+                continue
+            changes["changed" if entry else "added"].append(name)
+            text = path.read_text(encoding="utf-8", errors="replace")
+            chunks = chunk(text, self.max_tokens)
+            for piece in chunks:
+                piece["tokens"] = estimate_tokens(piece["text"])
+                counts = {}
+                for term in terms(piece["title"] + "\n" + piece["text"]):
+                    counts[term] = counts.get(term, 0) + 1
+                piece["terms"] = counts
+            self.files[name] = {"sha256": digest, "tokens": estimate_tokens(text), "chunks": chunks}
+        if any(changes.values()) or not self.path.exists():
+            self.save()
+            self.postings = None
+        return changes
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, a crash mid-write leaves the old index
+        temporary = self.path.with_suffix(".tmp")
+        with open(temporary, "w") as f:
+            json.dump({"version": VERSION, "max_tokens": self.max_tokens, "files": self.files}, f)
+        os.replace(temporary, self.path)
+
+    def chunks(self):
+        """Every chunk in file and position order, with its "file" and "position"."""
+        for name in sorted(self.files):
+            for position, piece in enumerate(self.files[name]["chunks"]):
+                yield {"file": name, "position": position, **piece}
+
+    def total_tokens(self):
+        return sum(entry["tokens"] for entry in self.files.values())
+
+    def _build(self):
+        # Inverted lists are cheap to rebuild from the stored term counts, so they are not persisted
+        self.all = list(self.chunks())
+        self.postings = {}
+        for i, piece in enumerate(self.all):
+            for term, count in piece["terms"].items():
+                self.postings.setdefault(term, []).append((i, count))
+        self.lengths = [sum(piece["terms"].values()) for piece in self.all]
+        self.average = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def search(self, query, limit=None):
+        """[(score, chunk)] best first, only chunks sharing a term with the query."""
+        if self.postings is None:
+            self._build()
+        scores = {}
+        total = len(self.all)
+        for term in set(terms(query)):
+            postings = self.postings.get(term, ())
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, count in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average)
+                scores[i] = scores.get(i, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [(score, self.all[i]) for i, score in ranked]
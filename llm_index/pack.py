@@ -0,0 +1,44 @@
+from llm_index.index import estimate_tokens
+
+
+def header(piece):
+    return f"## {piece['file']}: {piece['title']}\n\n"
+
+
+def pack(index, query, budget=4000, min_ratio=0.25):
+    """
+    The best matching chunks for query that fit in budget tokens, as (context, report).
+
+    Chunks are taken best first while they fit and then put back in file order, so neighbouring sections read
+    as they do in the source. Chunks scoring under min_ratio of the best one are left out even with budget to
+    spare, they would only pad the prompt. The report compares the packed tokens with pasting every indexed file
+    whole.
+    """
+    index.refresh()
+    chosen, used = [], 0
+    ranked = index.search(query)
+    for score, piece in ranked:
+        if score < min_ratio * ranked[0][0]:
+            break
+        cost = estimate_tokens(header(piece) + piece["text"])
+        if used + cost > budget:
+            continue
+        chosen.append((score, piece))
+        used += cost
+    chosen.sort(key=lambda item: (item[1]["file"], item[1]["position"]))
+    context = "\n\n".join(header(piece) + piece["text"] for _, piece in chosen)
+
+    full = index.total_tokens()
+    used = estimate_tokens(context) if context else 0
+    report = {
+        "query": query, "budget": budget, "tokens": used, "full_tokens": full, "saved_tokens": full - used,
+        "saved_ratio": (full - used) / full if full else 0.0,
+        "chunks": [{"file": piece["file"], "title": piece["title"], "score": round(score, 3),
+                    "tokens": piece["tokens"]} for score, piece in chosen],
+    }
+    return context, report
+
+
+def describe(report):
+    return (f"{len(report['chunks'])} chunks, {report['tokens']} of {report['full_tokens']} tokens, "
+            f"saved {report['saved_tokens']} ({report['saved_ratio']:.0%})")
@@ -1,10 +1,110 @@
+import asyncio
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
 from urllib import parse
 
+import httpx
 import ollama
 from fasthtml.common import *
 from ollama import ShowResponse
+from starlette.middleware import Middleware
 
-app, rt = fast_app(live=True, debug=True)
+import bench
+from metrics import Counter, Gauge, Histogram, MetricsMiddleware, render
+from model_cache import ModelCache, http_date, not_modified
+
+# llm_cache lives at the repo root, appended so that pip's ollama still wins over the ollama/ folder there
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from llm_cache import ResponseCache, ollama_chat
+from scheduler import ModelScheduler
+
+request_seconds = Histogram("http_request_duration_seconds", "Request latency by route", ("route", "method", "status"))
+requests_in_flight = Gauge("http_requests_in_flight", "Requests being handled by route", ("route",))
+ollama_seconds = Histogram("ollama_request_duration_seconds",
+                           "Time until the daemon's response headers, the whole call unless streamed", ("operation",))
+ttft_seconds = Histogram("generation_time_to_first_token_seconds", "Time to the first generated token", ("model",))
+tokens_per_second = Histogram("generation_tokens_per_second", "Generation speed", ("model",),
+                              buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300))
+generations = Counter("generations_total", "Chat generations by outcome", ("model", "outcome"))
+
+OPERATIONS = {"/api/tags": "list", "/api/show": "show", "/api/chat": "chat", "/api/generate": "generate", "/api/ps": "ps"}
+
+async def ollama_sent(request):
+    request.extensions["sent_at"] = time.perf_counter()
+
+async def ollama_answered(response):
+    request = response.request
+    ollama_seconds.observe(time.perf_counter() - request.extensions["sent_at"], OPERATIONS.get(request.url.path, "other"))
+
+# One client for every handler, so keep-alive connections to the daemon are pooled and reused.
+# OLLAMA_HOST picks the daemon, e.g. fake_ollama.py for tests.
+client = ollama.AsyncClient(
+    timeout=httpx.Timeout(120.0, connect=5.0),
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0),
+    event_hooks={"request": [ollama_sent], "response": [ollama_answered]},
+)
+models = ModelCache(client)
+responses = ResponseCache()
+# Generation goes through per-model queues so interleaved requests do not make the daemon swap weights.
+# Match OLLAMA_MAX_LOADED_MODELS to the daemon's, OLLAMA_HOT_MODELS are loaded at startup.
+scheduler = ModelScheduler(
+    client,
+    per_model=int(os.environ.get("OLLAMA_PER_MODEL", 4)),
+    max_loaded=int(os.environ.get("OLLAMA_MAX_LOADED_MODELS", 1)),
+    keep_alive=os.environ.get("OLLAMA_KEEP_ALIVE", "30m"),
+)
+hot_models = [name for name in os.environ.get("OLLAMA_HOT_MODELS", "").split(",") if name]
+
+# Read at scrape time from the objects that already count them
+ratio = lambda hits, misses: hits / (hits + misses) if hits + misses else 0.0
+Counter("model_cache_requests_total", "Model metadata lookups", ("result",),
+        collect=lambda: {("hit",): models.hits, ("miss",): models.misses})
+Gauge("model_cache_hit_ratio", "Share of model metadata lookups answered from memory",
+      collect=lambda: {(): ratio(models.hits, models.misses)})
+Counter("response_cache_requests_total", "Completion cache lookups", ("result",),
+        collect=lambda: {("hit",): responses.hits, ("miss",): responses.misses})
+Gauge("response_cache_hit_ratio", "Share of completions replayed from the cache",
+      collect=lambda: {(): ratio(responses.hits, responses.misses)})
+Gauge("scheduler_queue_depth", "Requests waiting for their model's turn", ("model",),
+      collect=lambda: {(model,): depth for model, depth in scheduler.queue_depths().items()})
+Gauge("scheduler_running", "Requests running per model", ("model",),
+      collect=lambda: {(model,): n for model, n in scheduler.running.items()})
+Counter("scheduler_model_switches_total", "Times a model was loaded in place of another",
+        collect=lambda: {(): scheduler.switches})
+
+
+def timed_out(request, exc):
+    return Response("The ollama daemon did not answer in time", status_code=504)
+
+
+# fasthtml only bundles the htmx 4 sse extension, the pages run htmx 2
+sse_ext = Script(src="https://cdn.jsdelivr.net/npm/htmx-ext-sse@2.2.2/sse.js")
+
+
+async def warm_up():
+    try:
+        await scheduler.sync()
+        await scheduler.warm(hot_models)
+    except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+        print(f"Could not preload {hot_models}: {e!r}")
+
+warming = None
+
+async def start_warm_up():
+    # In the background, the pages that only read metadata need not wait for weights to load
+    global warming
+    warming = asyncio.ensure_future(warm_up())
+
+
+app, rt = fast_app(live=True, debug=True, hdrs=(sse_ext,), on_startup=start_warm_up, on_shutdown=models.close,
+                   exception_handlers={TimeoutError: timed_out},
+                   middleware=[Middleware(MetricsMiddleware, latency=request_seconds, in_flight=requests_in_flight)])
+
+# Time to first token and generation speed of the latest chat requests, newest last
+chat_stats = deque(maxlen=100)
 
 
 def layout(title, *args, **kwargs):
@@ -16,15 +116,44 @@ def layout(title, *args, **kwargs):
 
 
 def fh_li_model(model):
-    return Div(
-        H3(model.model),
-        A(Span(model.digest), href=f"/model/{model.model}"),
-        Div(model)
+    # Compact row, the details are fetched when it is opened
+    details = model.details
+    summary = [details.family, details.parameter_size, details.quantization_level] if details else []
+    return Details(
+        Summary(Strong(model.model), " ", Small(", ".join(filter(None, summary)), f" {(model.size or 0) / 1e9:.1f} GB")),
+        Div(A(Span((model.digest or "")[:12]), href=f"/model/{model.model}"), cls="model-detail"),
+        hx_get=f"/model/{model.model}/summary", hx_trigger="toggle once", hx_target="find .model-detail"
     )
 
-def fh_detail_model(model: ShowResponse):
+PAGE_SIZE = 50
+
+def model_page(model_list, after=None):
+    # Cursor is the last name on the previous page, by name so it survives models being added or removed
+    ordered = sorted(model_list, key=lambda m: m.model)
+    page = [m for m in ordered if after is None or m.model > after][:PAGE_SIZE + 1]
+    items = [Li(fh_li_model(m)) for m in page[:PAGE_SIZE]]
+    if len(page) > PAGE_SIZE:
+        # Replaced by the next page once scrolled into view
+        cursor = parse.urlencode({"after": page[PAGE_SIZE - 1].model})
+        items.append(Li(Small("Loading more..."), hx_get=f"/models/page?{cursor}", hx_trigger="revealed", hx_swap="outerHTML"))
+    return items
+
+def conditional(request, etag, modified, *content):
+    # Validators on every response, no-cache so browsers and htmx revalidate and get a bodyless 304 when unchanged
+    # FastHTML's own vary value, under its lowercase key so the 200 replaces it instead of adding a second header
+    headers = {"Cache-Control": "no-cache", "vary": "HX-Request, HX-History-Restore-Request"}
+    if etag:
+        headers["ETag"] = etag
+    if modified:
+        headers["Last-Modified"] = http_date(modified)
+    if not_modified(request.headers, etag, modified):
+        return Response(status_code=304, headers=headers)
+    return *content, *[HttpHeader(k, v) for k, v in headers.items()]
+
+def fh_detail_model(name, model: ShowResponse):
+    # ShowResponse does not carry the model name
     return Div(
-        H3(model.model),
+        H3(name),
         Div(model.model_fields),
         Div(model.template)
     )
@@ -39,18 +168,205 @@ def get(): return P('Nice to be here!')
 
 
 @rt("/model/{name}")
-def get_model(name:str):
-    res = ollama.show(name)
+async def get_model(name:str, request:Request):
+    res = await models.show(name)
     # assert False
-    return Titled(name, fh_detail_model(res))
+    return conditional(request, *await models.validators(name), Titled(name, fh_detail_model(name, res)))
 
 @rt('/models/')
-def get_models():
-    return layout(
+async def get_models(request:Request):
+    model_list = await models.models()
+    return conditional(request, *await models.validators(), layout(
         "Available Ollama Models",
-        Ul(*[Li(fh_li_model(m)) for m in (ollama.list().models)])
+        P(f"{len(model_list)} models"),
+        Ul(*model_page(model_list))
+    ))
+
+@rt('/models/page')
+async def get_models_page(request:Request, after:str):
+    model_list = await models.models()
+    return conditional(request, *await models.validators(), *model_page(model_list, after))
+
+@rt("/model/{name}/summary")
+async def get_model_summary(name:str, request:Request):
+    res = await models.show(name)
+    return conditional(request, *await models.validators(name), fh_detail_model(name, res))
+
+@rt('/models/details')
+async def get_models_details(request:Request):
+    # Every model's details, requested from the daemon concurrently rather than one after another
+    model_list = await models.models()
+    names = [m.model for m in model_list]
+    details = await models.show_many(names)
+    return conditional(request, *await models.validators(), layout(
+        "Ollama Model Details",
+        *[fh_detail_model(name, res) for name, res in zip(names, details)]
+    ))
+
+def fh_chat_stats(stats):
+    if stats.get("error"):
+        return Small(f"Error: {stats['error']}")
+    ttft = f"{stats['ttft'] * 1000:.0f} ms" if stats["ttft"] is not None else "-"
+    rate = f"{stats['tokens_per_s']:.1f} tokens/s" if stats["tokens_per_s"] else "-"
+    cancelled = ", cancelled" if stats["cancelled"] else ", cached" if stats.get("cached") else ""
+    return Small(f"{stats['tokens']} tokens, first after {ttft}, {rate}, {stats['seconds']:.2f} s{cancelled}")
+
+@rt("/model/{name}/chat")
+def get(name:str):
+    recent = [Li(fh_chat_stats(stats)) for stats in chat_stats if stats["model"] == name][-10:]
+    return Titled(f"Chat with {name}",
+        Form(
+            Textarea(name="prompt", placeholder="Prompt", required=True),
+            Button("Send"),
+            hx_post=f"/model/{name}/chat", hx_target="#replies", hx_swap="afterbegin"
+        ),
+        Div(id="replies"),
+        H3("Recent requests"),
+        Ul(*reversed(recent))
+    )
+
+@rt("/model/{name}/chat")
+def post(name:str, prompt:str):
+    # The reply element opens the event stream, tokens are appended as they arrive and the stats replace the footer
+    url = f"/model/{name}/chat/stream?{parse.urlencode({'prompt': prompt})}"
+    return Article(
+        Header(prompt),
+        Div(sse_swap="token", hx_swap="beforeend", style="white-space: pre-wrap"),
+        Footer(Small("Waiting for the first token..."), sse_swap="done"),
+        hx_ext="sse", sse_connect=url, sse_close="done"
+    )
+
+async def chat_events(name, prompt):
+    stats = {"model": name, "ttft": None, "tokens": 0, "tokens_per_s": None, "cancelled": False, "error": None,
+             "cached": False}
+    chat_stats.append(stats)
+    started = time.perf_counter()
+    stream = None
+    try:
+        # Keyed on the digest too, so re-pulled weights under the same name are asked again
+        await models.models()
+        messages = [{"role": "user", "content": prompt}]
+        hits = responses.hits
+        stream = await ollama_chat(responses, scheduler, name, messages, digest=models.digests.get(name), stream=True)
+        # Nothing is awaited between the lookup and the return, so no other request can have hit meanwhile
+        stats["cached"] = responses.hits > hits
+        async for part in stream:
+            if part.message.content:
+                if stats["ttft"] is None:
+                    stats["ttft"] = time.perf_counter() - started
+                stats["tokens"] += 1
+                yield sse_message(Span(part.message.content), event="token")
+            if part.done and part.eval_count and part.eval_duration:
+                # The daemon's own count and timing, without prompt processing and network
+                stats["tokens_per_s"] = part.eval_count / part.eval_duration * 1e9
+    except (asyncio.CancelledError, GeneratorExit):
+        # The browser went away, closing the stream below drops the connection so the daemon stops generating
+        stats["cancelled"] = True
+        raise
+    except ollama.ResponseError as e:
+        stats["error"] = e.error
+    except ConnectionError as e:
+        stats["error"] = str(e)
+    except TimeoutError:
+        stats["error"] = "The ollama daemon did not answer in time"
+    finally:
+        if stream is not None:
+            await stream.aclose()
+        stats["seconds"] = time.perf_counter() - started
+        if stats["tokens_per_s"] is None and stats["ttft"] is not None and stats["tokens"] > 1:
+            # Chunks after the first, over the time they took
+            stats["tokens_per_s"] = (stats["tokens"] - 1) / max(stats["seconds"] - stats["ttft"], 1e-9)
+        outcome = "cancelled" if stats["cancelled"] else "error" if stats["error"] else "cached" if stats["cached"] else "completed"
+        generations.inc(name, outcome)
+        # Replays would flatter the model
+        if not stats["cached"] and stats["ttft"] is not None:
+            ttft_seconds.observe(stats["ttft"], name)
+            if stats["tokens_per_s"]:
+                tokens_per_second.observe(stats["tokens_per_s"], name)
+    yield sse_message(fh_chat_stats(stats), event="done")
+
+@rt("/model/{name}/chat/stream")
+def get(name:str, prompt:str):
+    return EventStream(chat_events(name, prompt))
+
+@rt("/scheduler")
+def get():
+    stats = scheduler.stats()
+    rows = lambda mapping: [Tr(Td(model), Td(value)) for model, value in mapping.items()] or [Tr(Td("-"), Td(""))]
+    loads = [Tr(Td(e["model"]), Td(e["evicted"] or "-"), Td(f"{e['seconds']:.2f} s" if e["seconds"] is not None else "loading"))
+             for e in reversed(stats["loads"])]
+    return Titled("Scheduler",
+        P(f"{stats['started']} requests started, {stats['switches']} model switches"),
+        H3("Resident, requests since loaded"), Table(*rows(stats["resident"])),
+        H3("Running"), Table(*rows(stats["running"])),
+        H3("Queued"), Table(*rows(stats["queued"])),
+        H3("Loads"), Table(Tr(Th("Model"), Th("Evicted"), Th("First request")), *loads),
+        hx_get="/scheduler", hx_trigger="every 2s", hx_select="main", hx_target="this", hx_swap="outerHTML"
+    )
+bench_log = deque(maxlen=200)
+bench_task = None
+
+async def run_bench(mock, levels):
+    # Straight to the daemon, the scheduler and the response cache would distort the measurements
+    backend = bench.MockClient() if mock else client
+    try:
+        await bench.run_bench(backend, levels=levels, mock=mock, progress=bench_log.append)
+        outcome = "Done"
+    except Exception as e:
+        # Nothing awaits the task, so this is the only place the failure shows up
+        outcome = f"Failed: {e!r}"
+    if not mock:
+        # The benchmark loaded and unloaded models behind the scheduler's back
+        try:
+            await scheduler.sync()
+        except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+            bench_log.append(f"Could not resync the scheduler: {e!r}")
+    bench_log.append(outcome)
+
+def bench_page(levels=None, error=None):
+    running = bench_task is not None and not bench_task.done()
+    entries = bench.load_history()[-30:]
+    tps = lambda value: f"{value:.1f}" if value else "-"
+    rows = [Tr(Td(e["at"]), Td(e["model"], " (mock)" if e.get("mock") else ""), Td(e.get("quantization") or "-"),
+               Td(f"{e['cold_load_s']:.2f} s"), Td(f"{e['ttft_s'] * 1000:.0f} ms"), Td(tps(e["prompt_tps"])),
+               Td(tps(e["gen_tps"])), Td(e["peak_concurrency"] or "-"),
+               Td(", ".join(e["regressions"]) or "-", style="color: red" if e["regressions"] else None))
+            for e in reversed(entries)]
+    return Titled("Model benchmark",
+        Form(
+            Label(Input(type="checkbox", name="mock", value="1"), " Mock backend"),
+            Input(name="levels", value=levels or ",".join(map(str, bench.LEVELS)), placeholder="Concurrency levels"),
+            Button("Run", disabled=running),
+            hx_post="/bench", hx_target="body"
+        ),
+        P(error, style="color: red") if error else None,
+        Pre("\n".join(bench_log)) if bench_log else None,
+        Table(Tr(*map(Th, ["When", "Model", "Quantization", "Cold load", "TTFT", "Prompt tok/s", "Gen tok/s",
+                           "Peak concurrency", "Regressions"])), *rows),
+        **(dict(hx_get="/bench", hx_trigger="every 2s", hx_select="main", hx_target="this", hx_swap="outerHTML")
+           if running else {})
     )
 
+@rt("/bench")
+def get():
+    return bench_page()
+
+@rt("/bench")
+async def post(levels:str, mock:str=""):
+    global bench_task
+    try:
+        parsed = bench.parse_levels(levels)
+    except ValueError as e:
+        return bench_page(levels, str(e))
+    if bench_task is None or bench_task.done():
+        bench_log.clear()
+        bench_task = asyncio.ensure_future(run_bench(bool(mock), parsed))
+    return Redirect("/bench")
+
+# async, so it renders on the event loop thread that updates the metrics
+@rt("/metrics")
+async def get():
+    return Response(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 
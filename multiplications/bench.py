@@ -0,0 +1,280 @@
+"""
+Throughput benchmark of the local ollama models.
+
+For every model from ollama.list(): cold-load time after unloading it, warm time to first token and prompt-eval
+and generation tokens/s over a fixed prompt suite, and the highest concurrency whose median latency stays
+within --degrade times the single-request latency. Time to first token is wall clock from sending the request
+to the first streamed chunk, like the chat page's, so it includes HTTP and queueing. The other timings are the
+durations the daemon reports, so the mock backend gives the same numbers on every run. Each run is appended to a JSONL history and
+compared with the model's previous entry to flag regressions after an ollama upgrade or a new quantization.
+
+    python multiplications/bench.py --models llama3.1:8b --levels 1,2,4,8
+    python multiplications/bench.py --mock        # deterministic, no daemon needed
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+
+import httpx
+import ollama
+
+HISTORY = "bench_history.jsonl"
+LEVELS = (1, 2, 4, 8, 16)
+
+PROMPTS = [
+    "What is the capital of France? Answer in one word.",
+    "What is 48213 × 9917? Reply with the exact product as a single integer.",
+    "Write a Python function that returns the n-th Fibonacci number iteratively.",
+    "Summarize in two sentences: The quick brown fox jumps over the lazy dog. This pangram contains every letter "
+    "of the English alphabet and has long been used to test typewriters, fonts and keyboards, because it shows "
+    "each glyph at least once in a short, memorable line.",
+]
+OPTIONS = {"temperature": 0, "seed": 0, "num_predict": 64}
+
+# Higher is better for these, lower for the rest
+HIGHER_IS_BETTER = {"prompt_tps", "gen_tps", "peak_concurrency"}
+COMPARED = ("cold_load_s", "ttft_s", "prompt_tps", "gen_tps", "peak_concurrency")
+
+
+def seconds(nanoseconds):
+    return (nanoseconds or 0) / 1e9
+
+
+def ollama_host():
+    # The daemon ollama.AsyncClient() talks to, OLLAMA_HOST may leave out the scheme
+    host = os.environ.get("OLLAMA_HOST") or "127.0.0.1:11434"
+    return host if "://" in host else f"http://{host}"
+
+
+async def daemon_version(host=None):
+    # The python client has no call for /api/version
+    async with httpx.AsyncClient(base_url=host or ollama_host(), timeout=5.0) as http:
+        try:
+            return (await http.get("/api/version")).json().get("version")
+        except (httpx.HTTPError, ValueError):
+            # No daemon, or not JSON
+            return None
+
+
+async def cold_load(client, model, keep_alive):
+    # An empty prompt with keep_alive=0 unloads the model, with a keep_alive it loads it
+    await client.generate(model=model, prompt="", keep_alive=0)
+    response = await client.generate(model=model, prompt="", keep_alive=keep_alive)
+    return seconds(response.load_duration or response.total_duration)
+
+
+async def ask(client, model, prompt, keep_alive):
+    return await client.chat(model=model, messages=[{"role": "user", "content": prompt}], options=OPTIONS,
+                             keep_alive=keep_alive)
+
+
+async def ask_streamed(client, model, prompt, keep_alive):
+    """(seconds to the first chunk, the final chunk with the daemon's durations) of one streamed chat."""
+    started = time.perf_counter()
+    first = None
+    async for part in await client.chat(model=model, messages=[{"role": "user", "content": prompt}],
+                                        options=OPTIONS, keep_alive=keep_alive, stream=True):
+        if first is None:
+            first = time.perf_counter() - started
+    return first, part
+
+
+async def bench_model(client, model, levels=LEVELS, degrade=1.5, keep_alive="5m"):
+    result = {"model": model, "cold_load_s": await cold_load(client, model, keep_alive)}
+
+    streamed = [await ask_streamed(client, model, prompt, keep_alive) for prompt in PROMPTS]
+    result["ttft_s"] = statistics.median(ttft for ttft, _ in streamed)
+    answers = [answer for _, answer in streamed]
+    prompt_seconds = sum(seconds(a.prompt_eval_duration) for a in answers)
+    gen_seconds = sum(seconds(a.eval_duration) for a in answers)
+    result["prompt_tps"] = sum(a.prompt_eval_count or 0 for a in answers) / prompt_seconds if prompt_seconds else None
+    result["gen_tps"] = sum(a.eval_count or 0 for a in answers) / gen_seconds if gen_seconds else None
+
+    # Ramp up until the median latency is more than degrade times the single request's
+    result["levels"] = []
+    result["peak_concurrency"] = baseline = None
+    for level in levels:
+        answers = await asyncio.gather(*(ask(client, model, PROMPTS[0], keep_alive) for _ in range(level)))
+        latency = statistics.median(seconds(a.total_duration) for a in answers)
+        slowest = max(seconds(a.total_duration) for a in answers)
+        throughput = sum(a.eval_count or 0 for a in answers) / slowest if slowest else None
+        result["levels"].append({"concurrency": level, "latency_s": latency, "throughput_tps": throughput})
+        baseline = baseline or latency
+        if latency > degrade * baseline:
+            break
+        result["peak_concurrency"] = level
+    return result
+
+
+def load_history(path=HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def regressions(entry, previous, tolerance=0.1):
+    """{metric: (before, after)} for every metric more than tolerance worse than in previous."""
+    worse = {}
+    tried = max((level["concurrency"] for level in entry.get("levels", [])), default=0)
+    for metric in COMPARED:
+        before, after = previous.get(metric), entry.get(metric)
+        if before is None or after is None:
+            continue
+        if metric == "peak_concurrency" and before > tried:
+            # This run did not try levels that high
+            continue
+        if (after < before * (1 - tolerance)) if metric in HIGHER_IS_BETTER else (after > before * (1 + tolerance)):
+            worse[metric] = (before, after)
+    return worse
+
+
+async def run_bench(client, models=None, levels=LEVELS, degrade=1.5, history=HISTORY, mock=False, progress=print,
+                    host=None):
+    """Benchmark models (all listed ones by default), append them to history and return the new entries."""
+    listed = {m.model: m for m in (await client.list()).models}
+    version = None if mock else await daemon_version(host)
+    past = load_history(history)
+    entries = []
+    for model in models or sorted(listed):
+        progress(f"{model}: benchmarking")
+        try:
+            result = await bench_model(client, model, levels, degrade)
+        except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+            progress(f"{model}: failed, {e!r}")
+            continue
+        info = listed.get(model)
+        details = info.details if info else None
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "mock": mock, "version": version,
+            "digest": info.digest if info else None,
+            "quantization": details.quantization_level if details else None,
+            "parameter_size": details.parameter_size if details else None,
+            **result,
+        }
+        previous = next((p for p in reversed(past) if p["model"] == model and p.get("mock") == mock), None)
+        entry["regressions"] = regressions(entry, previous) if previous else {}
+        entries.append(entry)
+        with open(history, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        progress(describe(entry))
+    return entries
+
+
+def describe(entry):
+    tps = lambda value: f"{value:.1f}" if value else "-"
+    text = (f"{entry['model']}: cold load {entry['cold_load_s']:.2f} s, ttft {entry['ttft_s'] * 1000:.0f} ms, "
+            f"prompt {tps(entry['prompt_tps'])} tok/s, generation {tps(entry['gen_tps'])} tok/s, "
+            f"peak concurrency {entry['peak_concurrency']}")
+    for metric, (before, after) in entry["regressions"].items():
+        text += f"\n  regression in {metric}: {before:.3g} -> {after:.3g}"
+    return text
+
+
+class MockClient:
+    """
+    Deterministic stand-in for ollama.AsyncClient with the calls the benchmark makes.
+
+    Durations follow from the model's size and the number of requests in flight, past `parallel` of them
+    latency grows linearly, so every run reports the same numbers.
+    """
+
+    def __init__(self, models=3, parallel=4):
+        self.names = [f"mock-{(i + 1) * 3}b:latest" for i in range(models)]
+        self.parallel = parallel
+        self.loaded = set()
+        self.active = 0
+
+    async def list(self):
+        return ollama.ListResponse(models=[
+            {"model": name, "digest": hashlib.sha256(name.encode()).hexdigest(), "size": self.billions(name) * 10 ** 9,
+             "details": {"parameter_size": f"{self.billions(name)}B", "quantization_level": "Q4_K_M"}}
+            for name in self.names])
+
+    def billions(self, name):
+        return int(name.split("-")[1].split("b")[0])
+
+    def check(self, model):
+        if model not in self.names:
+            raise ollama.ResponseError(f"model '{model}' not found", 404)
+
+    async def generate(self, model, prompt="", keep_alive=None, **kwargs):
+        self.check(model)
+        load = 0
+        if keep_alive == 0:
+            self.loaded.discard(model)
+        elif model not in self.loaded:
+            self.loaded.add(model)
+            load = 400_000_000 * self.billions(model)
+        return ollama.GenerateResponse(model=model, done=True, response="", load_duration=load, total_duration=load)
+
+    async def chat(self, model, messages, options=None, keep_alive=None, stream=False, **kwargs):
+        self.check(model)
+        self.active += 1
+        # Let every request gathered with this one start, so they all see the same load
+        await asyncio.sleep(0)
+        slowdown = max(1.0, self.active / self.parallel)
+        await asyncio.sleep(0)
+        self.active -= 1
+        load = 0 if model in self.loaded else 400_000_000 * self.billions(model)
+        self.loaded.add(model)
+        prompt_tokens = sum(len(m["content"].split()) for m in messages) * 4 // 3
+        tokens = (options or {}).get("num_predict", 64)
+        prompt_eval = int(prompt_tokens * 2_000_000 * self.billions(model) * slowdown)
+        eval_ = int(tokens * 6_000_000 * self.billions(model) * slowdown)
+        response = ollama.ChatResponse(
+            model=model, done=True, message={"role": "assistant", "content": "mock " * tokens},
+            load_duration=load, prompt_eval_count=prompt_tokens, prompt_eval_duration=prompt_eval,
+            eval_count=tokens, eval_duration=eval_, total_duration=load + prompt_eval + eval_)
+        if stream:
+            return self.stream(response, seconds(load + prompt_eval + eval_ // tokens))
+        return response
+
+    async def stream(self, response, first):
+        # The first chunk really takes as long as the durations say, the time to first token is wall clock
+        await asyncio.sleep(first)
+        yield ollama.ChatResponse(model=response.model, done=False, message={"role": "assistant", "content": "mock "})
+        yield response
+
+    async def close(self):
+        pass
+
+
+def parse_levels(text):
+    try:
+        levels = tuple(int(level) for level in text.split(","))
+    except ValueError:
+        raise ValueError(f"Concurrency levels must be comma-separated integers like 1,2,4,8, not {text!r}") from None
+    if any(level < 1 for level in levels):
+        raise ValueError(f"Concurrency levels must be at least 1, not {text!r}")
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark of the local ollama models")
+    parser.add_argument("--models", nargs="+", help="default: every model ollama lists")
+    parser.add_argument("--levels", type=parse_levels, default=LEVELS, help="concurrency levels to try, e.g. 1,2,4,8")
+    parser.add_argument("--degrade", type=float, default=1.5, help="latency factor over one request that counts as degraded")
+    parser.add_argument("--history", default=HISTORY, help="JSONL file the results are appended to")
+    parser.add_argument("--mock", action="store_true", help="deterministic in-process backend instead of the daemon")
+    args = parser.parse_args()
+
+    async def bench():
+        client = MockClient() if args.mock else ollama.AsyncClient()
+        try:
+            return await run_bench(client, args.models, args.levels, args.degrade, args.history, args.mock)
+        finally:
+            await client.close()
+
+    entries = asyncio.run(bench())
+    if any(entry["regressions"] for entry in entries):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Stand-in for the ollama daemon's HTTP API, for exercising the app without models or a GPU.
+
+Serves /api/tags and /api/show for a configurable number of made-up models, each answer delayed by --latency
+seconds, and /api/chat, which streams --tokens words --token-delay seconds apart. /fake/stats counts requests,
+peak concurrency and chat streams that were completed or abandoned by the client. Chat prompts asking for
+"A × B" are answered with the product, a --wrong fraction of them off by one digit, for the benchmark harness.
+Chat and generate load the model first, taking --load-time seconds and evicting the least recently used one
+past --max-loaded, like the daemon swapping weights; /api/ps lists what is loaded.
+
+    python multiplications/fake_ollama.py --port 11435 --models 200 --latency 0.05
+    OLLAMA_HOST=http://127.0.0.1:11435 python multiplications
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WORDS = "the quick brown fox jumps over the lazy dog while seven multiplications run in parallel".split()
+
+
+def fake_model(i):
+    name = f"fake-{i:04d}:latest"
+    return {
+        "name": name,
+        "model": name,
+        "modified_at": (EPOCH + timedelta(hours=i)).isoformat(),
+        "size": 1_000_000 * (i + 1),
+        "digest": hashlib.sha256(name.encode()).hexdigest(),
+        "details": {"format": "gguf", "family": "fake", "families": ["fake"], "parameter_size": f"{i % 70 + 1}B",
+                    "quantization_level": "Q4_0"},
+    }
+
+
+class FakeOllama:
+    def __init__(self, models=5, latency=0.0, tokens=20, token_delay=0.02, wrong=0.0, load_time=0.0, max_loaded=1):
+        self.models = {m["model"]: m for m in map(fake_model, range(models))}
+        self.latency = latency
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.wrong = wrong
+        self.load_time = load_time
+        self.max_loaded = max_loaded
+        self.loaded = OrderedDict() # name -> task of its load, least recently used first
+        self.loads = 0
+        self.requests = {}
+        self.active = self.peak = 0
+        self.streams = {"completed": 0, "abandoned": 0}
+
+    async def answer(self, endpoint, body):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            return body()
+        finally:
+            self.active -= 1
+
+    async def load(self, name, keep_alive=None):
+        """Nanoseconds spent waiting for the model to load, 0 if it was loaded."""
+        if keep_alive == 0:
+            self.loaded.pop(name, None)
+            return 0
+        task = self.loaded.get(name)
+        if task is None:
+            self.loads += 1
+            task = self.loaded[name] = asyncio.ensure_future(asyncio.sleep(self.load_time))
+            while len(self.loaded) > self.max_loaded:
+                self.loaded.popitem(last=False)
+        self.loaded.move_to_end(name)
+        if task.done():
+            return 0
+        started = time.perf_counter()
+        await task
+        return int((time.perf_counter() - started) * 1e9)
+
+    async def ps(self, request):
+        return JSONResponse({"models": [{**self.models[name], "expires_at": datetime.now(timezone.utc).isoformat(),
+                                         "size_vram": 0} for name in self.loaded]})
+
+    async def generate(self, request):
+        body = await request.json()
+        name = body.get("model")
+        if name not in self.models:
+            return JSONResponse({"error": f"model '{name}' not found"}, status_code=404)
+        self.requests["generate"] = self.requests.get("generate", 0) + 1
+        loading = await self.load(name, body.get("keep_alive"))
+        # Only the empty prompt that loads or, with keep_alive 0, unloads a model is supported
+        return JSONResponse({"model": name, "created_at": datetime.now(timezone.utc).isoformat(), "response": "",
+                             "done": True, "done_reason": "load" if body.get("keep_alive") != 0 else "unload",
+                             "load_duration": loading, "total_duration": loading})
+
+    async def tags(self, request):
+        return await self.answer("tags", lambda: JSONResponse({"models": list(self.models.values())}))
+
+    async def show(self, request):
+        name = (await request.json()).get("model")
+        model = self.models.get(name)
+        if model is None:
+            return JSONResponse({"error": f"model '{name}' not found"}, status_code=404)
+        return await self.answer("show", lambda: JSONResponse({
+            "modelfile": f"FROM {name}",
+            "parameters": "temperature 0.7",
+            "template": "{{ .Prompt }}",
+            "details": model["details"],
+            "model_info": {"general.architecture": "fake"},
+            "capabilities": ["completion"],
+            "modified_at": model["modified_at"],
+        }))
+
+    async def chat(self, request):
+        body = await request.json()
+        name = body.get("model")
+        if name not in self.models:
+            return JSONResponse({"error": f"model '{name}' not found"}, status_code=404)
+        self.requests["chat"] = self.requests.get("chat", 0) + 1
+        loading = await self.load(name)
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        # Deterministic reply per prompt, so cached and fresh answers can be compared
+        offset = int(hashlib.sha256(prompt.encode()).hexdigest(), 16)
+        words = [WORDS[(offset + i) % len(WORDS)] for i in range(self.tokens)]
+        operands = re.search(r"(\d+) × (\d+)", prompt)
+        if operands:
+            a, b = map(int, operands.groups())
+            product = a * b
+            if offset % 1000 < self.wrong * 1000:
+                product += 10 ** (offset % len(str(product)))
+            words = f"{a} × {b} = {product:,}".split()
+
+        def chunk(content, done, **extra):
+            return {"model": name, "created_at": datetime.now(timezone.utc).isoformat(),
+                    "message": {"role": "assistant", "content": content}, "done": done, **extra}
+
+        def final(started):
+            elapsed = int((time.perf_counter() - started) * 1e9)
+            return {"done_reason": "stop", "total_duration": loading + elapsed, "load_duration": loading,
+                    "prompt_eval_count": len(prompt.split()), "prompt_eval_duration": 1_000_000,
+                    "eval_count": len(words), "eval_duration": max(elapsed, 1)}
+
+        if not body.get("stream", True):
+            started = time.perf_counter()
+            await asyncio.sleep(self.latency + self.token_delay * len(words))
+            return JSONResponse(chunk(" ".join(words), True, **final(started)))
+
+        async def lines():
+            started = time.perf_counter()
+            completed = False
+            try:
+                await asyncio.sleep(self.latency)
+                for i, word in enumerate(words):
+                    await asyncio.sleep(self.token_delay)
+                    yield json.dumps(chunk(word if i == 0 else " " + word, False)) + "\n"
+                yield json.dumps(chunk("", True, **final(started))) + "\n"
+                completed = True
+            finally:
+                self.streams["completed" if completed else "abandoned"] += 1
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def stats(self, request):
+        return JSONResponse({"requests": self.requests, "active": self.active, "peak": self.peak, "streams": self.streams,
+                             "loads": self.loads})
+
+    def app(self):
+        return Starlette(routes=[
+            Route("/", lambda request: PlainTextResponse("Ollama is running")),
+            Route("/api/tags", self.tags),
+            Route("/api/show", self.show, methods=["POST"]),
+            Route("/api/chat", self.chat, methods=["POST"]),
+            Route("/api/generate", self.generate, methods=["POST"]),
+            Route("/api/ps", self.ps),
+            Route("/api/version", lambda request: JSONResponse({"version": "0.0.0-fake"})),
+            Route("/fake/stats", self.stats),
+        ])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--tokens", type=int, default=20, help="words per chat reply")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed words")
+    parser.add_argument("--wrong", type=float, default=0.0, help="fraction of multiplications answered wrongly")
+    parser.add_argument("--load-time", type=float, default=0.0, help="seconds to load a model that is not loaded")
+    parser.add_argument("--max-loaded", type=int, default=1, help="models kept loaded at once")
+    args = parser.parse_args()
+    app = FakeOllama(args.models, args.latency, args.tokens, args.token_delay, args.wrong, args.load_time,
+                     args.max_loaded).app()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Prometheus text-format metrics without the client library.
+
+Every update happens on the event loop thread (the middleware, async handlers and httpx hooks all run there),
+so the counters are plain dict entries with no locks, cheap enough to leave on. The /metrics handler is async
+too, and samples() iterates over copies of the series, so a render() from a threadpool thread is still safe.
+Values that already live elsewhere, like cache counters, are read at scrape time through collect callbacks
+instead of being mirrored.
+"""
+import bisect
+import time
+
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # collect() -> {label values: value}, for values read at scrape time
+        self.collect = collect
+        self.values = {}
+        registry.append(self)
+
+    def samples(self):
+        values = self.collect() if self.collect else self.values
+        for labels, value in list(values.items()):
+            yield self.name, _labels(self.labels, labels), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            # Per-bucket counts, the last one past every bound, then the sum
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in list(self.values.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(self.labels, labels, f'le="{_number(float(bound))}"'), cumulative
+            yield f"{self.name}_sum", _labels(self.labels, labels), series[-1]
+            yield f"{self.name}_count", _labels(self.labels, labels), cumulative
+
+
+def render():
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+def route_of(scope):
+    """Path template of the route the request will hit, so /model/{name} is one series rather than one per model."""
+    for route in getattr(scope.get("app"), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "other")
+    return "other"
+
+
+class MetricsMiddleware:
+    """Latency per route, method and status, and requests in flight per route, for every HTTP request."""
+
+    def __init__(self, app, latency, in_flight):
+        self.app = app
+        self.latency = latency
+        self.in_flight = in_flight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = route_of(scope)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        self.in_flight.inc(route)
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            self.in_flight.dec(route)
+            self.latency.observe(time.perf_counter() - started, route, scope["method"], status)
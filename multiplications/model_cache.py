@@ -0,0 +1,129 @@
+"""
+In-memory cache of ollama model metadata for the model pages.
+
+The model list is fetched again at most every list_ttl seconds. Details are keyed by (name, digest), and a
+digest changes whenever the model does, so they never go stale. They expire after show_ttl only to bound
+memory, and are dropped as soon as a refreshed list no longer has that digest.
+
+Lookups are async against one shared ollama.AsyncClient. Concurrent misses for the same key share one
+request, and each kind of call has its own timeout.
+"""
+import asyncio
+import hashlib
+import math
+import time
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import ollama
+
+TIMEOUTS = {"list": 5.0, "show": 15.0}
+
+
+class ModelCache:
+    def __init__(self, client=None, list_ttl=5.0, show_ttl=600.0, timeouts=None, clock=time.monotonic):
+        self.client = client or ollama.AsyncClient()
+        self.list_ttl = list_ttl
+        self.show_ttl = show_ttl
+        self.timeouts = {**TIMEOUTS, **(timeouts or {})}
+        self.clock = clock
+        self.listed_at = -math.inf
+        self.model_list = None
+        self.digests = {}
+        self.details = {} # (name, digest) -> (fetched at, ShowResponse)
+        self.inflight = {} # key -> task of the request every concurrent caller awaits
+        self.list_etag = None
+        self.list_modified = None
+        self.hits = self.misses = 0
+
+    async def fetch(self, key, call, *args):
+        # Single flight: one request per key however many handlers miss at once
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.wait_for(getattr(self.client, call)(*args), self.timeouts[call]))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def models(self):
+        if self.clock() - self.listed_at > self.list_ttl:
+            models = (await self.fetch("list", "list")).models
+            self.listed_at = self.clock()
+            digests = {m.model: m.digest for m in models}
+            if self.model_list is None or digests != self.digests:
+                self._set_models(models, digests)
+        return self.model_list
+
+    def _set_models(self, models, digests):
+        self.model_list = models
+        self.digests = digests
+        current = set(digests.items())
+        for key in [key for key in self.details if key not in current]:
+            del self.details[key]
+        signature = "\n".join(f"{name} {digest}" for name, digest in sorted(digests.items()))
+        # Weak, the pages built from the list are what is validated, not the list itself
+        self.list_etag = f'W/"{hashlib.sha1(signature.encode()).hexdigest()}"'
+        self.list_modified = max((m.modified_at for m in models if m.modified_at), default=None)
+
+    async def show(self, name):
+        await self.models()
+        digest = self.digests.get(name)
+        key = (name, digest)
+        # Names the list does not know (aliases, pulls in progress) have no digest to key on, keep them briefly
+        ttl = self.show_ttl if digest else self.list_ttl
+        entry = self.details.get(key)
+        if entry is not None and self.clock() - entry[0] <= ttl:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        details = await self.fetch(key, "show", name)
+        self.details[key] = (self.clock(), details)
+        return details
+
+    async def show_many(self, names):
+        """Details of every name, fetched concurrently."""
+        return await asyncio.gather(*(self.show(name) for name in names))
+
+    async def validators(self, name=None):
+        """(ETag, Last-Modified) of one model's details, or of the model list, None where unknown."""
+        await self.models()
+        if name is None:
+            return self.list_etag, self.list_modified
+        digest = self.digests.get(name)
+        entry = self.details.get((name, digest))
+        modified = entry[1].modified_at if entry is not None else None
+        return (f'W/"{digest}"' if digest else None), modified
+
+    def invalidate(self, name=None):
+        """Forget one model's details, or everything including the list, e.g. after a pull or delete."""
+        if name is None:
+            self.details.clear()
+            self.listed_at = -math.inf
+            self.model_list = None
+            self.digests = {}
+        else:
+            for key in [key for key in self.details if key[0] == name]:
+                del self.details[key]
+
+    async def close(self):
+        await self.client.close()
+
+
+def http_date(moment):
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(headers, etag, modified):
+    """Whether a request with these headers can get a 304, If-None-Match taking precedence over If-Modified-Since."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")])
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole seconds
+        return modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+    return False
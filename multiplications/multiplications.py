@@ -0,0 +1,220 @@
+"""
+Multiplication accuracy benchmark for local ollama models.
+
+Operand pairs are generated per digit count, asked of each model with a bounded number of requests in flight,
+the last integer of every answer is compared with the exact product, and accuracy is reported per operand
+digit count with each model's tokens/s and wall time. Results are appended to a JSONL file as they come in,
+rerunning with the same --out skips everything already answered, so a long run can be stopped and resumed.
+
+    python multiplications/multiplications.py --models llama3.1:8b qwen2.5:14b --digits 1-9 --per-digit 20
+    python multiplications/multiplications.py --check-table "grok3(beta).csv"   # verify a pasted table
+
+Run it as a script (or from inside multiplications/), from the repo root `import ollama` finds the local
+ollama/ package. OLLAMA_HOST picks the daemon, fake_ollama.py answers these prompts too. Answers go through
+the shared llm_cache, so asking the same model the same question again costs nothing, --no-cache asks anyway.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import ollama
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from llm_cache import ResponseCache, ollama_chat
+from scheduler import ModelScheduler
+
+PROMPT = "What is {a} × {b}? Reply with the exact product as a single integer."
+
+
+def parse_range(text):
+    """'3' -> [3], '1-8' -> [1, ..., 8], '2,4,8' -> [2, 4, 8]."""
+    digits = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        digits.extend(range(int(low), int(high or low) + 1))
+    return digits
+
+
+def operands(digits, per_digit, seed=0):
+    """per_digit (a, b) pairs for each digit count, both operands that many digits long."""
+    rng = random.Random(seed)
+    pairs = []
+    for d in digits:
+        low, high = 10 ** (d - 1), 10 ** d - 1
+        pairs.extend((rng.randint(low, high), rng.randint(low, high)) for _ in range(per_digit))
+    return pairs
+
+
+def parse_answer(text):
+    """The last integer in a model's reply, with thousands separators and any <think> block removed, or None."""
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.S)
+    text = re.sub(r"(?<=\d)[,_\u2009\u202f](?=\d{3}(?!\d))", "", text)
+    numbers = re.findall(r"\d+", text)
+    return int(numbers[-1]) if numbers else None
+
+
+def digit_count(a, b):
+    return max(len(str(a)), len(str(b)))
+
+
+def load_done(path):
+    """(model, a, b) of every answered question in a results file."""
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    done.add((row["model"], row["a"], row["b"]))
+    return done
+
+
+async def ask(client, cache, model, digest, a, b, options):
+    started = time.perf_counter()
+    messages = [{"role": "user", "content": PROMPT.format(a=a, b=b)}]
+    response = await ollama_chat(cache, client, model, messages, digest=digest, options=options)
+    answer = parse_answer(response.message.content)
+    return {
+        "model": model, "a": a, "b": b, "digits": digit_count(a, b),
+        "answer": answer, "correct": answer == a * b,
+        "eval_count": response.eval_count or 0, "eval_duration": response.eval_duration or 0,
+        "seconds": time.perf_counter() - started, "reply": response.message.content,
+    }
+
+
+async def run_model(scheduler, cache, model, digest, pairs, out, options=None):
+    """Ask model every pair, as many at once as the scheduler allows, appending each result to out. Returns (results, errors, wall)."""
+    results, errors = [], []
+
+    async def one(a, b):
+        try:
+            row = await ask(scheduler, cache, model, digest, a, b, options)
+        except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+            # Not written, a resumed run asks again
+            errors.append((a, b, e))
+            return
+        results.append(row)
+        out.write(json.dumps(row) + "\n")
+        out.flush()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(a, b) for a, b in pairs))
+    return results, errors, time.perf_counter() - started
+
+
+async def run(models, pairs, path, concurrency=4, options=None, timeout=300.0, cache=None, keep_alive="10m"):
+    # One model at a time, so the daemon keeps a single model loaded instead of swapping between them
+    client = ollama.AsyncClient(timeout=timeout)
+    scheduler = ModelScheduler(client, per_model=concurrency, keep_alive=keep_alive)
+    cache = cache or ResponseCache()
+    done = load_done(path)
+    walls = {}
+    try:
+        digests = {m.model: m.digest for m in (await client.list()).models}
+        with open(path, "a") as out:
+            for model in models:
+                todo = [(a, b) for a, b in pairs if (model, a, b) not in done]
+                print(f"{model}: {len(pairs) - len(todo)} already answered, asking {len(todo)}")
+                if not todo:
+                    # No wall time either, report() leaves it out rather than showing 0.0 s
+                    continue
+                # Loaded before the clock starts, so wall time is answering time
+                started = time.perf_counter()
+                try:
+                    await scheduler.warm([model])
+                except (ollama.ResponseError, ConnectionError, httpx.HTTPError) as e:
+                    print(f"  could not load it: {e!r}")
+                    continue
+                print(f"  loaded in {time.perf_counter() - started:.1f} s")
+                results, errors, walls[model] = await run_model(scheduler, cache, model, digests.get(model), todo, out,
+                                                                options)
+                for a, b, e in errors[:3]:
+                    print(f"  {a} × {b} failed: {e!r}")
+                if errors:
+                    print(f"  {len(errors)} failed, rerun to retry them")
+    finally:
+        await client.close()
+    stats = cache.stats()
+    print(f"cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    return walls
+
+
+def report(path, walls=None, models=None):
+    """Accuracy per model and digit count from a results file, with tokens/s and this run's wall time."""
+    rows = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if models is None or row["model"] in models:
+                    rows[row["model"]].append(row)
+    for model, results in rows.items():
+        eval_count = sum(r["eval_count"] for r in results)
+        eval_seconds = sum(r["eval_duration"] for r in results) / 1e9
+        rate = f"{eval_count / eval_seconds:.1f} tokens/s" if eval_seconds else "- tokens/s"
+        wall = f", {walls[model]:.1f} s wall" if walls and model in walls else ""
+        correct = sum(r["correct"] for r in results)
+        print(f"\n{model}: {correct}/{len(results)} correct, {rate}{wall}")
+        by_digits = defaultdict(list)
+        for r in results:
+            by_digits[r["digits"]].append(r["correct"])
+        for digits, marks in sorted(by_digits.items()):
+            print(f"  {digits:>3} digits  {sum(marks):>4}/{len(marks):<4} {sum(marks) / len(marks):6.1%}")
+
+
+def check_table(path):
+    """Wrong cells of a multiplication table CSV whose first row and column are the operands."""
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    header = [int(cell) for cell in rows[0][1:]]
+    wrong, total = [], 0
+    for row in rows[1:]:
+        a = int(row[0])
+        for b, cell in zip(header, row[1:]):
+            total += 1
+            value = parse_answer(cell)
+            if value != a * b:
+                wrong.append((a, b, cell, a * b))
+    return wrong, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multiplication accuracy benchmark for local ollama models")
+    parser.add_argument("--models", nargs="+", default=[])
+    parser.add_argument("--digits", type=parse_range, default=parse_range("1-8"), help="e.g. 3, 1-8 or 2,4,8")
+    parser.add_argument("--per-digit", type=int, default=10, help="questions per digit count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight per model")
+    parser.add_argument("--temperature", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds per answer")
+    parser.add_argument("--keep-alive", default="10m", help="how long the daemon keeps a model loaded after a request")
+    parser.add_argument("--out", default="multiplication_results.jsonl", help="results file, appended to and resumed from")
+    parser.add_argument("--no-cache", action="store_true", help="ask the models even when the answer is cached")
+    parser.add_argument("--check-table", metavar="CSV", help="verify a multiplication table instead of asking models")
+    args = parser.parse_args()
+
+    if args.check_table:
+        wrong, total = check_table(args.check_table)
+        for a, b, cell, product in wrong:
+            print(f"{a} × {b}: table has {cell}, product is {product}")
+        print(f"{total - len(wrong)}/{total} cells correct")
+        return
+    if not args.models:
+        parser.error("--models or --check-table is required")
+    pairs = operands(args.digits, args.per_digit, args.seed)
+    walls = asyncio.run(run(args.models, pairs, args.out, args.concurrency, {"temperature": args.temperature},
+                            args.timeout, ResponseCache(bypass=args.no_cache or None), args.keep_alive))
+    report(args.out, walls, args.models)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Model-affinity scheduling of ollama requests.
+
+Loading a model's weights takes seconds, a request to a loaded model milliseconds, so interleaving requests
+for different models makes the daemon evict and reload on every switch. Requests here wait in a queue per
+model. Up to max_loaded models are resident and run up to per_model requests at a time; a waiting model only
+takes over once a resident one goes idle, and a resident model that has started `batch` requests in a row
+stops taking new ones while another model waits, so nothing starves. Requests carry keep_alive so the
+daemon keeps the resident models loaded between bursts.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class ModelScheduler:
+    def __init__(self, client, per_model=4, max_loaded=1, batch=32, keep_alive="30m", clock=time.monotonic):
+        self.client = client
+        self.per_model = per_model
+        self.max_loaded = max_loaded
+        self.batch = batch
+        self.keep_alive = keep_alive
+        self.clock = clock
+        self.queues = {} # model -> deque of (ticket, future) waiting for a slot
+        self.tickets = itertools.count()
+        self.running = {}
+        self.resident = {} # model -> requests started since it was loaded, in load order
+        self.cold = {} # model -> its load event until the first request after the switch finishes
+        self.loads = deque(maxlen=100) # {"model", "evicted", "at", "seconds"} per switch
+        self.started = self.switches = 0
+
+    @asynccontextmanager
+    async def slot(self, model):
+        """Hold one of model's request slots, waiting for the model's turn."""
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (next(self.tickets), waiter)
+        self.queues.setdefault(model, deque()).append(entry)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # Granted just as the caller gave up
+                self._release(model)
+            elif entry in self.queues[model]:
+                self.queues[model].remove(entry)
+                self._dispatch()
+            raise
+        try:
+            yield
+        finally:
+            self._release(model)
+
+    def _release(self, model):
+        self.running[model] -= 1
+        event = self.cold.pop(model, None)
+        if event is not None:
+            # First request on a freshly switched model, its time is mostly the load
+            event["seconds"] = self.clock() - event["at"]
+        self._dispatch()
+
+    def _waiting(self):
+        return any(queue for model, queue in self.queues.items() if model not in self.resident)
+
+    def _start(self, model):
+        queue = self.queues.get(model)
+        while queue and self.running.get(model, 0) < self.per_model:
+            if self.resident[model] >= self.batch and self._waiting():
+                break
+            _, waiter = queue.popleft()
+            if waiter.cancelled():
+                continue
+            waiter.set_result(None)
+            self.running[model] = self.running.get(model, 0) + 1
+            self.resident[model] += 1
+            self.started += 1
+
+    def _dispatch(self):
+        for model in list(self.resident):
+            self._start(model)
+        while True:
+            # Oldest head of queue among the models that are not loaded
+            heads = [(queue[0][0], model) for model, queue in self.queues.items()
+                     if queue and model not in self.resident]
+            if not heads:
+                return
+            idle = [model for model in self.resident if not self.running.get(model)]
+            if len(self.resident) >= self.max_loaded and not idle:
+                return
+            evicted = None
+            if len(self.resident) >= self.max_loaded:
+                evicted = idle[0]
+                del self.resident[evicted]
+            _, model = min(heads)
+            self.resident[model] = 0
+            self.switches += 1
+            self.cold[model] = {"model": model, "evicted": evicted, "at": self.clock(), "seconds": None}
+            self.loads.append(self.cold[model])
+            self._start(model)
+
+    def queue_depths(self):
+        return {model: len(queue) for model, queue in self.queues.items() if queue}
+
+    def stats(self):
+        return {"resident": dict(self.resident), "running": {m: n for m, n in self.running.items() if n},
+                "queued": self.queue_depths(), "started": self.started, "switches": self.switches,
+                "loads": list(self.loads)}
+
+    async def chat(self, model, stream=False, **kwargs):
+        """AsyncClient.chat through the model's queue, with the scheduler's keep_alive unless one is given."""
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        if stream:
+            return self._stream(model, kwargs)
+        async with self.slot(model):
+            return await self.client.chat(model=model, **kwargs)
+
+    async def _stream(self, model, kwargs):
+        # The slot is held until the stream is exhausted or closed
+        async with self.slot(model):
+            stream = await self.client.chat(model=model, stream=True, **kwargs)
+            try:
+                async for part in stream:
+                    yield part
+            finally:
+                await stream.aclose()
+
+    async def warm(self, models):
+        """Load models ahead of the first request, in turn, through the queues like any request."""
+        for model in models:
+            async with self.slot(model):
+                # An empty prompt only loads the model
+                await self.client.generate(model=model, prompt="", keep_alive=self.keep_alive)
+
+    async def sync(self):
+        """Match the resident models to the ones the daemon has loaded, at startup or after something else (un)loaded some."""
+        loaded = [m.model for m in (await self.client.ps()).models]
+        for model in list(self.resident):
+            # A model with requests running keeps its place, they load it again anyway
+            if model not in loaded and not self.running.get(model):
+                del self.resident[model]
+        for model in loaded:
+            if len(self.resident) >= self.max_loaded:
+                break
+            self.resident.setdefault(model, 0)
+        # Freed places go to the models waiting for one
+        self._dispatch()
@@ -1,10 +1,17 @@
 """
 Create a game using pygame, it should combine elements of Tetris and Arkanoid.
 """
+import atexit
+import logging
 import sys
 
 import pygame
 import random
+from pathlib import Path
+
+# arena/ lives at the repo root, so the game also runs as python ollama/llama_3_1_8b_instruct_q4/tetranoid.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from arena.physics import FixedStep, first_hit, reflect
 
 # Define some colors
 BLACK = (0, 0, 0)
@@ -12,8 +19,19 @@ WHITE = (255, 255, 255)
 
 # Set the width and height of the screen (width, height).
 size = (700, 500)
-screen = pygame.display.set_mode(size)
-pygame.display.set_caption("Block Blast")
+screen = None
+FPS = 60
+PHYSICS_HZ = 240 # Ball substeps per second, a multiple of FPS
+
+
+def init_screen(headless=False):
+    global screen
+    if headless:
+        screen = pygame.Surface(size)
+    else:
+        screen = pygame.display.set_mode(size)
+        pygame.display.set_caption("Block Blast")
+    return screen
 
 class Block:
     def __init__(self):
@@ -27,6 +45,8 @@ class Ball:
         self.rect = pygame.Rect(350, 250, 10, 10)
         self.speed_x = random.choice([-1, 1]) * 2
         self.speed_y = -3
+        # Exact centre, the rect only holds whole pixels
+        self.x, self.y = self.rect.center
 
     def draw(self, screen):
         pygame.draw.ellipse(screen, WHITE, self.rect)
@@ -43,21 +63,53 @@ class Game:
                 pygame.quit()
                 sys.exit()
 
-    def update(self):
-        self.ball.rect.x += self.ball.speed_x
-        self.ball.rect.y += self.ball.speed_y
+    def spawn_blocks(self):
+        # Add new blocks every 2 seconds
+        if random.random() < 0.01:
+            self.blocks.append(Block())
+
+    def move_ball(self):
+        # One frame of movement in PHYSICS_HZ / FPS swept substeps, bouncing off the first block in the path
+        ball = self.ball
+        radius = ball.rect.width / 2
+        substeps = PHYSICS_HZ // FPS
+        reach = radius + abs(ball.speed_x) + abs(ball.speed_y)
+        near = [block.rect for block in self.blocks
+                if block.rect.left - reach < ball.x < block.rect.right + reach and block.rect.top - reach < ball.y < block.rect.bottom + reach]
+        boxes = [(rect.left, rect.top, rect.right, rect.bottom) for rect in near]
+        hit_block = False
+        for _ in range(substeps):
+            remaining = 1 / substeps
+            for _ in range(4):
+                dx, dy = ball.speed_x * remaining, ball.speed_y * remaining
+                hit = first_hit(ball.x, ball.y, radius, dx, dy, boxes)
+                if hit is None:
+                    ball.x += dx
+                    ball.y += dy
+                    break
+                t, nx, ny, _ = hit
+                ball.x += dx * t
+                ball.y += dy * t
+                remaining *= 1 - t
+                ball.speed_x, ball.speed_y = reflect(ball.speed_x, ball.speed_y, nx, ny)
+                hit_block = True
+
+            # Collision with top and bottom of screen
+            if ball.y - radius < 0:
+                ball.speed_y = abs(ball.speed_y)
+            if ball.y + radius > size[1]:
+                ball.speed_y = -abs(ball.speed_y)
+        ball.rect.center = (round(ball.x), round(ball.y))
+        return hit_block
 
-        # Collision with top and bottom of screen
-        if self.ball.rect.top < 0 or self.ball.rect.bottom > size[1]:
-            self.ball.speed_y *= -1
+    def update(self):
+        if self.move_ball():
+            logging.debug("Ball hit block!")
+            return False
 
         # Collision with left and right of screen
-        for block in self.blocks:
-            if self.ball.rect.colliderect(block.rect):
-                print("Ball hit block!")
-                return False
-            elif self.ball.rect.left < 0 or self.ball.rect.right > size[0]:
-                return True
+        if self.blocks and (self.ball.rect.left < 0 or self.ball.rect.right > size[0]):
+            return True
 
         # If ball hits the bottom, game over!
         if self.ball.rect.bottom > size[1]:
@@ -70,28 +122,52 @@ class Game:
             block.draw(screen)
         self.ball.draw(screen)
 
-def main():
+def main(profile_path=None):
     pygame.init()
+    init_screen()
     game = Game()
+    timer = None
+    if profile_path:
+        from arena.frametime import FrameTimer
+        timer = FrameTimer()
+        # handle_events exits the process on QUIT
+        atexit.register(timer.dump, profile_path)
+
+    # Game logic runs in fixed 1 / FPS ticks however long frames actually take
+    ticks = FixedStep(FPS)
+    frame_seconds = 1 / FPS
 
     running = True
     while running:
+        if timer:
+            timer.start()
         game.handle_events()
-        if not running:
-            print("Game Over!")
-            break
-
-        # Add new blocks every 2 seconds
-        if random.random() < 0.01:
-            game.blocks.append(Block())
+        if timer:
+            timer.mark("events")
+
+        for _ in range(ticks.steps(frame_seconds)):
+            game.spawn_blocks()
+            # True once the ball leaves the screen, it never comes back
+            if game.update():
+                running = False
+                break
+        if timer:
+            timer.mark("physics")
 
         screen.fill(BLACK)
         game.draw(screen)
+        if timer:
+            timer.mark("draw")
+            timer.draw(screen)
         pygame.display.flip()
+        if timer:
+            timer.mark("flip")
 
-        game.clock.tick(60)
+        frame_seconds = game.clock.tick(FPS) / 1000
 
+    print("Game Over!")
     # pygame.quit()
 
 if __name__ == "__main__":
-    main()
+    # --profile FILE: frame phase timings overlay, written to FILE at exit (.json Chrome trace, else CSV), run as python -m
+    main(sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None)